@@ -0,0 +1,419 @@
+# Script to benchmark the functions that extract information without LLM on a synthetic corpus of job postings
+# Emilio Lehoucq
+
+# Usage:
+# - "python benchmark_extractors.py run": run the benchmarks and compare them with the baseline (if there's one),
+#   exiting with code 1 if there are regressions (e.g., to use it in CI)
+# - "python benchmark_extractors.py run --save-baseline": same, and save the results as the new baseline
+# - "python benchmark_extractors.py": run the tests
+
+######################################### IMPORTING LIBRARIES #########################################
+import importlib
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+######################################### PATHS #########################################
+if os.environ.get("PIPELINE_RUN", "0") == "1":
+    path_benchmarks_folder = "../benchmarks/"
+else:
+    path_benchmarks_folder = "benchmarks/"
+path_baseline = "baseline_extractors.json"
+
+######################################### PARAMETERS #########################################
+# Corpus (the same seed always gives the same corpus)
+seed = 42
+num_documents = 200
+min_size_document = 1000 # Characters
+max_size_document = 20000 # Characters
+
+# Maximum proportion a result can get worse than the baseline before it's a regression
+tolerance = 0.2
+
+# Differences in peak memory below this aren't regressions (small allocations vary from run to run)
+min_difference_memory_kb = 64
+
+# Pieces of the synthetic job postings
+sentences_filler = [
+    "We are looking for a motivated team member to join our growing research group.",
+    "The position offers opportunities for professional development and collaboration across departments.",
+    "Responsibilities include maintaining documentation, supporting faculty, and coordinating projects.",
+    "The successful candidate will work closely with stakeholders to deliver high-quality results.",
+    "Our office values diversity, equity, and inclusion in everything we do.",
+    "This role reports to the Director of Research Computing.",
+    "Benefits include health insurance, retirement plans, and generous paid time off.",
+    "Applicants should submit a cover letter, a resume, and the contact information of three references.",
+    "The team supports data infrastructure for projects in the social sciences and the life sciences.",
+    "Review of applications will begin immediately and continue until the position is filled."
+    ]
+sentences_salary = [
+    "The salary range for this position is $55,000 - $70,000 per year.",
+    "Compensation: $25.50 per hour.",
+    "The starting salary is $80,000 annually, commensurate with experience.",
+    "Pay range: $60K-$75K.",
+    "We offer a competitive salary and benefits package."
+    ]
+sentences_experience = [
+    "Candidates must have 3+ years of experience in data analysis.",
+    "A minimum of five years of experience in software development is required.",
+    "2 years of relevant experience preferred.",
+    "Experience with cloud computing is a plus."
+    ]
+sentences_skills = [
+    "Proficiency in Python, R, and SQL is required.",
+    "Knowledge of machine learning, statistics, and data visualization is desired.",
+    "Strong communication skills and the ability to work in a team are essential.",
+    "Familiarity with Git, Docker, and Linux is preferred."
+    ]
+sentences_location = [
+    "The position is located in Evanston, IL.",
+    "This role is based in Chicago, Illinois.",
+    "Location: Ann Arbor, MI",
+    "The office is in Boston, Massachusetts, with hybrid work available."
+    ]
+sentences_organization = [
+    "Northwestern University is an equal opportunity employer.",
+    "Join the University of Michigan community.",
+    "Argonne National Laboratory is seeking a data scientist.",
+    "Harvard University offers a collaborative environment."
+    ]
+urls = [
+    "https://careers.northwestern.edu/job/12345",
+    "https://umich.wd1.myworkdayjobs.com/en-US/job/67890",
+    "https://www.anl.gov/careers/job/111",
+    "https://academicpositions.com/ad/some-university/2024/data-scientist/222",
+    "https://www.indeed.com/viewjob?jk=333"
+    ]
+
+# Keywords for get_matches
+keywords_get_matches = ["Python", " R ", "SQL", "machine learning", "statistics", "Git", "Docker", "communication"]
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def generate_corpus(num_documents=num_documents, seed=seed, min_size=min_size_document, max_size=max_size_document):
+    """
+    Function to generate a synthetic corpus of job postings.
+
+    Each posting has a random size between min_size and max_size characters, mostly filler sentences with
+    sentences about salary, experience, skills, location and organization here and there.
+
+    Inputs:
+    - num_documents (int): number of postings.
+    - seed (int): seed of the random generator.
+    - min_size (int): minimum number of characters of a posting.
+    - max_size (int): maximum number of characters of a posting.
+
+    Output:
+    - corpus (list): list of (url, text) tuples.
+    """
+    # Check the sizes
+    if min_size < 1 or max_size < min_size:
+        raise ValueError("The sizes must be positive and the maximum must be at least the minimum.")
+
+    rng = random.Random(seed)
+    groups = [sentences_salary, sentences_experience, sentences_skills, sentences_location, sentences_organization]
+
+    corpus = []
+    for _ in range(num_documents):
+        size = rng.randint(min_size, max_size)
+        sentences = []
+        length = 0
+        while length < size:
+            sentence = rng.choice(rng.choice(groups)) if rng.random() < 0.15 else rng.choice(sentences_filler)
+            sentences.append(sentence)
+            length += len(sentence) + 1
+        corpus.append((rng.choice(urls), " ".join(sentences)[:size]))
+
+    return corpus
+
+def get_extractors():
+    """
+    Function to get the extractors to benchmark (the ones whose modules and data can be loaded).
+
+    Outputs:
+    - extractors (dict): name of the extractor: function that takes (url, text).
+    - skipped (dict): name of the extractor: why it was skipped (e.g., missing data).
+    """
+    extractors = {}
+    skipped = {}
+
+    # Each extractor with the module that it needs
+    definitions = [
+        ("extract_salary", "functions_to_extract_salary", lambda module: lambda url, text: module.extract_salary(text)),
+        ("extract_years_experience", "functions_to_extract_experience", lambda module: lambda url, text: module.extract_years_experience(text)),
+        ("get_matches", "functions_to_extract_skills", lambda module: lambda url, text: module.get_matches(keywords_get_matches, text)),
+        ("extract_uscities", "functions_to_extract_location", lambda module: lambda url, text: module.extract_uscities(text)),
+        ("extract_city_or_state", "functions_to_extract_location", lambda module: lambda url, text: module.extract_city_or_state(text)),
+        ("extract_organization_from_url", "functions_to_extract_organization",
+         lambda module: lambda url, text: module.extract_organization_from_url(url, None, "ror")),
+        ("extract_organization_from_text", "functions_to_extract_organization",
+         lambda module: lambda url, text: module.extract_organization_from_text(text, module.get_dataset("world_universities"))),
+        ("extract_organization_from_text_ror", "functions_to_extract_organization",
+         lambda module: lambda url, text: module.extract_organization_from_text(text, None, "ror"))
+        ]
+
+    for name, module_name, get_function in definitions:
+        try:
+            module = importlib.import_module(module_name)
+
+            # Load the data now, so that it's not counted in the first document (and missing data is found here)
+            if hasattr(module, "warm_up"):
+                module.warm_up()
+            extractors[name] = get_function(module)
+        except Exception as e:
+            # Missing data or credentials
+            print(f"Skipping {name}: {e}")
+            skipped[name] = str(e)
+
+    return extractors, skipped
+
+def get_percentile(values, percentile):
+    """
+    Function to get a percentile of a list of values (nearest rank: the smallest value with at least that 
+    percentage of the values at or below it).
+
+    Inputs:
+    - values (list): values.
+    - percentile (float): percentile between 0 and 100.
+
+    Output:
+    - value (float): percentile of the values.
+    """
+    if not values:
+        raise ValueError("There must be at least one value.")
+    values = sorted(values)
+    rank = max(math.ceil(percentile / 100 * len(values)), 1)
+    return values[min(rank, len(values)) - 1]
+
+def benchmark_extractor(function, corpus):
+    """
+    Function to benchmark an extractor on a corpus.
+
+    The time is measured in a first pass and the memory in a second pass (tracemalloc slows the code down).
+
+    Inputs:
+    - function (function): extractor that takes (url, text).
+    - corpus (list): list of (url, text) tuples.
+
+    Output:
+    - result (dict): "docs_per_sec", "p50_ms", "p99_ms" (latency per posting) and "peak_memory_kb".
+    """
+    # Time per posting
+    times = []
+    for url, text in corpus:
+        start = time.perf_counter()
+        function(url, text)
+        times.append(time.perf_counter() - start)
+
+    # Peak memory
+    tracemalloc.start()
+    for url, text in corpus:
+        function(url, text)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "docs_per_sec": len(corpus) / sum(times) if sum(times) > 0 else float("inf"),
+        "p50_ms": get_percentile(times, 50) * 1000,
+        "p99_ms": get_percentile(times, 99) * 1000,
+        "peak_memory_kb": peak_memory / 1024
+        }
+
+def run_benchmarks(corpus, extractors):
+    """
+    Function to benchmark several extractors on a corpus.
+
+    Inputs:
+    - corpus (list): list of (url, text) tuples.
+    - extractors (dict): name of the extractor: function that takes (url, text).
+
+    Output:
+    - results (dict): name of the extractor: result (see benchmark_extractor).
+    """
+    results = {}
+    for name, function in extractors.items():
+        results[name] = benchmark_extractor(function, corpus)
+        print(f"{name}: {results[name]['docs_per_sec']:.1f} docs/sec, p50 {results[name]['p50_ms']:.2f} ms, "
+              f"p99 {results[name]['p99_ms']:.2f} ms, peak memory {results[name]['peak_memory_kb']:.1f} KB")
+    return results
+
+def save_results(results, path):
+    """
+    Function to save the results of the benchmarks (with the parameters of the corpus) as JSON.
+
+    Inputs:
+    - results (dict): results (see run_benchmarks).
+    - path (str): path of the JSON file.
+
+    Output: None
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as file:
+        json.dump({
+            "corpus": {"seed": seed, "num_documents": num_documents, "min_size": min_size_document, "max_size": max_size_document},
+            "results": results
+            }, file, indent=2)
+
+def compare_results(results, baseline, tolerance=tolerance):
+    """
+    Function to compare the results of the benchmarks with a baseline.
+
+    Inputs:
+    - results (dict): results (see run_benchmarks).
+    - baseline (dict): results of the baseline.
+    - tolerance (float): maximum proportion a result can get worse than the baseline.
+
+    Output:
+    - regressions (list): descriptions of the results that got worse than the tolerance.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        # Lower is worse for docs/sec, higher is worse for the rest
+        for metric in ["docs_per_sec", "p50_ms", "p99_ms", "peak_memory_kb"]:
+            old, new = baseline[name][metric], result[metric]
+            if metric == "docs_per_sec":
+                worse = new < old * (1 - tolerance)
+            elif metric == "peak_memory_kb":
+                worse = new > old * (1 + tolerance) and new - old > min_difference_memory_kb
+            else:
+                worse = new > old * (1 + tolerance)
+            if worse:
+                regressions.append(f"{name} {metric}: {old:.2f} -> {new:.2f}")
+
+    return regressions
+
+def report_comparison(results, baseline, skipped):
+    """
+    Function to print the comparison of the results with the baseline, warning about the extractors not compared.
+
+    Inputs:
+    - results (dict): results of this run (see run_benchmarks).
+    - baseline (dict): results of the baseline.
+    - skipped (dict): extractors skipped in this run and why (see get_extractors).
+
+    Output:
+    - regressions (list): descriptions of the results that got worse than the tolerance (see compare_results).
+    """
+    # Extractors that couldn't run (e.g., missing data), so the comparison doesn't cover them
+    if skipped:
+        print(f"Warning: {len(skipped)} of {len(results) + len(skipped)} extractors were skipped and aren't compared:")
+        for name, reason in skipped.items():
+            print(f"- {name}: {reason}")
+    not_run = [name for name in baseline if name not in results and name not in skipped]
+    if not_run:
+        print(f"Warning: extractors in the baseline that weren't run: {', '.join(not_run)}.")
+
+    regressions = compare_results(results, baseline)
+    print("Regressions:" if regressions else f"No regressions ({len([name for name in results if name in baseline])} extractors compared).")
+    for regression in regressions:
+        print(f"- {regression}")
+
+    return regressions
+
+if __name__ == "__main__":
+
+    # Run the benchmarks
+    if len(sys.argv) > 1 and sys.argv[1] == "run":
+        corpus = generate_corpus()
+        extractors, skipped = get_extractors()
+        results = run_benchmarks(corpus, extractors)
+
+        # Compare with the baseline
+        regressions = []
+        if os.path.exists(path_benchmarks_folder + path_baseline):
+            baseline = json.load(open(path_benchmarks_folder + path_baseline))
+            if baseline["corpus"] != {"seed": seed, "num_documents": num_documents, "min_size": min_size_document, "max_size": max_size_document}:
+                print("The baseline was run on a different corpus. Not comparing.")
+            else:
+                regressions = report_comparison(results, baseline["results"], skipped)
+        elif skipped:
+            print(f"Warning: {len(skipped)} extractors were skipped: {', '.join(skipped)}.")
+
+        # Save as the new baseline
+        if "--save-baseline" in sys.argv:
+            save_results(results, path_benchmarks_folder + path_baseline)
+            print(f"Baseline saved in {path_benchmarks_folder + path_baseline}.")
+
+        # Fail if there are regressions
+        sys.exit(1 if regressions else 0)
+
+    print("Module to benchmark the extractors running as main.")
+    print("Running tests...")
+
+    ##################################################################################
+    print("Tests for generate_corpus function:")
+
+    print("Test 1")
+    corpus = generate_corpus(20, min_size=1000, max_size=20000)
+    print([len(text) for _, text in corpus])
+    assert len(corpus) == 20
+    assert all(1000 <= len(text) <= 20000 for _, text in corpus)
+
+    print("Test 2")
+    assert generate_corpus(20, min_size=1000, max_size=20000) == corpus
+    assert generate_corpus(20, seed=1, min_size=1000, max_size=20000) != corpus
+
+    ##################################################################################
+    print("Tests for get_percentile function:")
+
+    print("Test 1")
+    print(get_percentile(list(range(1, 101)), 50), get_percentile(list(range(1, 101)), 99))
+    assert get_percentile(list(range(1, 101)), 50) == 50
+    assert get_percentile(list(range(1, 101)), 99) == 99
+
+    print("Test 2")
+    print(get_percentile([3], 99))
+    assert get_percentile([3], 99) == 3
+
+    ##################################################################################
+    print("Tests for benchmark_extractor and run_benchmarks functions:")
+
+    print("Test 1")
+    result = benchmark_extractor(lambda url, text: text.lower(), corpus)
+    print(result)
+    assert set(result) == {"docs_per_sec", "p50_ms", "p99_ms", "peak_memory_kb"}
+    assert result["docs_per_sec"] > 0 and result["p50_ms"] <= result["p99_ms"]
+
+    print("Test 2")
+    extractors, skipped = get_extractors()
+    print(list(skipped))
+    results = run_benchmarks(corpus[:5], extractors)
+    assert set(results) | set(skipped) == {"extract_salary", "extract_years_experience", "get_matches", "extract_uscities", "extract_city_or_state",
+                                            "extract_organization_from_url", "extract_organization_from_text", "extract_organization_from_text_ror"}
+    assert "extract_salary" in results and "extract_years_experience" in results and "get_matches" in results
+
+    ##################################################################################
+    print("Tests for compare_results function:")
+
+    print("Test 1")
+    baseline = {"a": {"docs_per_sec": 100, "p50_ms": 1, "p99_ms": 2, "peak_memory_kb": 10}}
+    results = {"a": {"docs_per_sec": 70, "p50_ms": 1.1, "p99_ms": 2, "peak_memory_kb": 100}}
+    print(compare_results(results, baseline))
+    assert compare_results(results, baseline) == ["a docs_per_sec: 100.00 -> 70.00", "a peak_memory_kb: 10.00 -> 100.00"]
+
+    print("Test 2")
+    results = {"a": {"docs_per_sec": 100, "p50_ms": 1, "p99_ms": 2, "peak_memory_kb": 20}}
+    print(compare_results(results, baseline))
+    assert compare_results(results, baseline) == []
+
+    print("Test 3")
+    print(compare_results(baseline, baseline))
+    assert compare_results(baseline, baseline) == []
+
+    ##################################################################################
+    print("Tests for report_comparison function:")
+
+    print("Test 1")
+    results = {"a": {"docs_per_sec": 70, "p50_ms": 1.1, "p99_ms": 2, "peak_memory_kb": 100}}
+    assert report_comparison(results, baseline, {"b": "missing data"}) == ["a docs_per_sec: 100.00 -> 70.00", "a peak_memory_kb: 10.00 -> 100.00"]
+    assert report_comparison(baseline, baseline, {}) == []
+
+    ##################################################################################
+    print("All tests passed.")
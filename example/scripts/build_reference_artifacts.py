@@ -0,0 +1,181 @@
+# Script to build the artifacts of the reference data (US cities, organizations, ROR)
+# Emilio Lehoucq
+
+# Usage (from the folder with the data, as the other scripts):
+#   python scripts/build_reference_artifacts.py build                   -> build all the artifacts
+#   python scripts/build_reference_artifacts.py build us_cities ror     -> build only some of them
+#
+# The extraction modules read the artifacts when they're there and up to date, and the original data otherwise
+# (see functions_reference_artifacts.py). The artifacts need to be built again when the data changes.
+
+######################################### IMPORTING LIBRARIES #########################################
+import json
+import os
+import sys
+import pandas as pd
+from functions_reference_artifacts import path_artifacts_folder, write_artifact, get_source_info
+
+######################################### PATHS #########################################
+if os.environ.get("PIPELINE_RUN", "0") == "1":
+    path_raw_data_folder = "../data/raw/"
+    path_processed_data_folder = "../data/processed/"
+else:
+    path_raw_data_folder = "data/raw/"
+    path_processed_data_folder = "data/processed/"
+path_data_us_cities = "uscities_processed.csv"
+path_data_national_labs = "national_laboratories.json"
+path_other_research_orgs = "other_research_organizations.json"
+
+######################################### PARAMETERS #########################################
+# Columns of the US cities used by functions_to_extract_location
+columns_us_cities = ["city", "city_ascii", "state_id", "state_name"]
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def build_us_cities_artifact(path_data, path_artifact):
+    """
+    Function to build the artifact of the US cities.
+
+    Inputs:
+    - path_data (str): path of the CSV with the US cities.
+    - path_artifact (str): path of the artifact.
+
+    Output: None
+    """
+    us_cities = pd.read_csv(path_data)
+    write_artifact(path_artifact, {column: us_cities[column].tolist() for column in columns_us_cities}, "1", get_source_info(path_data))
+
+def build_organizations_artifact(data, path_artifact, path_data):
+    """
+    Function to build the artifact of a list of organizations (with "name" and "domains").
+
+    Inputs:
+    - data (list): organizations.
+    - path_artifact (str): path of the artifact.
+    - path_data (str): path of the file the organizations come from, to know when the artifact is out of date.
+
+    Output: None
+    """
+    columns = {
+        "name": [record["name"] for record in data],
+        "domains": [list(record["domains"]) for record in data]
+        }
+    write_artifact(path_artifact, columns, "1", get_source_info(path_data))
+
+def build_ror_artifact(index, path_artifact, path_data):
+    """
+    Function to build the artifact of the index of the ROR data.
+
+    Inputs:
+    - index (dict): index of the ROR data (see functions_to_extract_organization.build_ror_index).
+    - path_artifact (str): path of the artifact.
+    - path_data (str): path of the ROR data.
+
+    Output: None
+    """
+    # The hosts are sorted to look them up with binary search (see functions_reference_artifacts.SortedMapping)
+    hosts = sorted(index["hosts"])
+    columns = {
+        "names": index["names"],
+        "aliases": [list(alias) for alias in index["aliases"]],
+        "hosts": hosts,
+        "host_names": [index["hosts"][host] for host in hosts]
+        }
+    write_artifact(path_artifact, columns, f"ror-index-{index['version']}", get_source_info(path_data))
+
+def build_artifacts(datasets):
+    """
+    Function to build the artifacts of the reference data.
+
+    Input:
+    - datasets (list): datasets to build ("us_cities", "world_universities", "national_labs", "other_research_orgs", "ror").
+
+    Output: None
+    """
+    for dataset in datasets:
+        print(f"Building the artifact of {dataset}...")
+        if dataset == "us_cities":
+            build_us_cities_artifact(path_processed_data_folder + path_data_us_cities, path_artifacts_folder + "uscities.refart")
+        elif dataset == "world_universities":
+            from enrich_world_universities_and_domains import data_world_universities
+            import functions_to_extract_organization as organization
+            build_organizations_artifact(data_world_universities, path_artifacts_folder + organization.path_artifacts["world_universities"],
+                                         organization.path_data_world_universities)
+        elif dataset == "national_labs":
+            build_organizations_artifact(json.load(open(path_raw_data_folder + path_data_national_labs)),
+                                         path_artifacts_folder + "national_laboratories.refart", path_raw_data_folder + path_data_national_labs)
+        elif dataset == "other_research_orgs":
+            build_organizations_artifact(json.load(open(path_raw_data_folder + path_other_research_orgs)),
+                                         path_artifacts_folder + "other_research_organizations.refart", path_raw_data_folder + path_other_research_orgs)
+        elif dataset == "ror":
+            # The index is built by the module that uses it
+            import functions_to_extract_organization as organization
+            path_data = organization.path_raw_data_folder + organization.path_data_ror
+            with open(path_data, "r") as file:
+                index = organization.build_ror_index(json.load(file))
+            build_ror_artifact(index, path_artifacts_folder + organization.path_artifacts["ror"], path_data)
+        else:
+            raise ValueError(f"Unknown dataset: {dataset}.")
+
+if __name__ == "__main__":
+
+    # Build the artifacts
+    if len(sys.argv) > 1 and sys.argv[1] == "build":
+        build_artifacts(sys.argv[2:] or ["us_cities", "world_universities", "national_labs", "other_research_orgs", "ror"])
+        print(f"Artifacts saved in {path_artifacts_folder}.")
+        sys.exit(0)
+
+    print("Script to build the artifacts of the reference data running as main.")
+    print("Running tests...")
+
+    import tempfile
+    from functions_reference_artifacts import load_artifact, Records, SortedMapping
+    path_test_folder = tempfile.mkdtemp()
+
+    ##################################################################################
+    print("Tests for build_us_cities_artifact function:")
+
+    print("Test 1")
+    path_test_data = os.path.join(path_test_folder, "uscities.csv")
+    pd.DataFrame({"city": ["Evanston", "Saint Louis"], "city_ascii": ["Evanston", "Saint Louis"], "state_id": ["IL", "MO"],
+                  "state_name": ["Illinois", "Missouri"], "population": [75000, 300000]}).to_csv(path_test_data, index=False)
+    build_us_cities_artifact(path_test_data, os.path.join(path_test_folder, "uscities.refart"))
+    artifact = load_artifact(os.path.join(path_test_folder, "uscities.refart"), path_source=path_test_data)
+    print(artifact["header"])
+    assert list(artifact["columns"]) == columns_us_cities
+    assert list(artifact["columns"]["state_id"]) == ["IL", "MO"]
+
+    ##################################################################################
+    print("Tests for build_organizations_artifact function:")
+
+    print("Test 1")
+    data = [{"name": "Argonne National Laboratory", "domains": ["anl.gov"]}, {"name": "Fermilab", "domains": ["fnal.gov", "fermilab.org"]}]
+    path_test_labs = os.path.join(path_test_folder, "labs.json")
+    with open(path_test_labs, "w") as file:
+        json.dump(data, file)
+    build_organizations_artifact(data, os.path.join(path_test_folder, "labs.refart"), path_test_labs)
+    records = Records(load_artifact(os.path.join(path_test_folder, "labs.refart"), path_source=path_test_labs)["columns"])
+    print(list(records))
+    assert list(records) == data
+
+    print("Test 2")
+    with open(path_test_labs, "w") as file:
+        json.dump(data + [{"name": "Ames Laboratory", "domains": ["ameslab.gov"]}], file)
+    print(load_artifact(os.path.join(path_test_folder, "labs.refart"), path_source=path_test_labs))
+    assert load_artifact(os.path.join(path_test_folder, "labs.refart"), path_source=path_test_labs) is None
+
+    ##################################################################################
+    print("Tests for build_ror_artifact function:")
+
+    print("Test 1")
+    index = {"version": 1, "names": ["The Alan Turing Institute"], "aliases": [["Turing Institute UK", "The Alan Turing Institute"]],
+             "hosts": {"turing.ac.uk": "The Alan Turing Institute", "stjude.org": "St. Jude Children's Research Hospital"}}
+    build_ror_artifact(index, os.path.join(path_test_folder, "ror.refart"), path_test_data)
+    columns = load_artifact(os.path.join(path_test_folder, "ror.refart"), "ror-index-1")["columns"]
+    print(list(columns["hosts"]))
+    assert list(columns["names"]) == index["names"]
+    assert list(columns["aliases"]) == index["aliases"]
+    assert SortedMapping(columns["hosts"], columns["host_names"]).get("stjude.org") == "St. Jude Children's Research Hospital"
+
+    ##################################################################################
+    print("All tests passed.")
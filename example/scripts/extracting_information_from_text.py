@@ -3,12 +3,8 @@
 
 ######################################### IMPORTING LIBRARIES #########################################
 import pandas as pd
-from functions_to_extract_salary import extract_salary
-from functions_to_extract_organization import extract_organization
-from functions_to_extract_job_title import extract_job_title
-from functions_to_extract_visa import extract_visa
-from functions_to_extract_location import extract_location
-from functions_to_extract_education import extract_education
+from functions_pipeline import run_pipeline_checkpointed, load_pipeline_results, run_pipeline_streaming
+from functions_metrics import reset_summary, print_summary
 import os
 
 ######################################### FILE PATHS #########################################
@@ -19,41 +15,75 @@ else:
     path_processed_data = "data/processed/"
 file_name_input_data = "data_to_test_accuracy_info_extraction_11_18_24.csv"
 file_name_output_data = "data_information_extracted_test.csv"
+folder_name_checkpoints = "checkpoints_information_extracted_test/" # Delete it to start the run from scratch
+folder_name_parts = "parts_information_extracted/" # Delete it to start the streaming run from scratch
 
-######################################### READING DATA #########################################
+######################################### PARAMETERS #########################################
 
-df = pd.read_csv(path_processed_data + file_name_input_data)
+# Fields to extract (see functions_pipeline.fields)
+# fields_to_extract = ["salary", "organization", "job_title", "location", "visa", "education"]
+fields_to_extract = ["education"]
 
-######################################### EXTRACTING INFORMATION #########################################
+# Number of threads (fields using LLM) and processes (fields using regular expressions and data)
+num_threads = 8
+num_processes = os.cpu_count() or 1
+
+# Number of rows extracted between checkpoints
+chunk_size_checkpoints = 500
+
+# Whether to read the whole dataset in batches instead of loading it (the memory used doesn't grow with the data)
+streaming = False
+
+# Number of rows read at a time when streaming
+batch_size_streaming = 1000
+
+######################################### FUNCTION DEFINITIONS #########################################
 
-# Iterate over the rows of the dataframe
-# for i, row in df.iterrows():
-for i, row in df.sample(50).iterrows(): # TODO: comment this line and uncomment the one above to run the whole dataset
+def main():
+    """
+    Function to extract the information and print the summary of the run.
 
-    # Create variable with text making sure it is a string
-    text = str(row['text'])
+    The pipeline starts processes, and with the "spawn" start method (the default on macOS and Windows) every process
+    imports this script again, so nothing can run when the script is imported (only under __main__).
 
-    # Create variable with URL making sure it is a string
-    url = str(row['url_job_post'])
+    Output: None
+    """
+    # Start measuring the run (time per stage, stage that resolved each field, requests, tokens, retries...)
+    reset_summary()
 
-    # # Salary
-    # df.at[i, 'salary_extracted'] = extract_salary(text)
+    if streaming:
 
-    # # Organization
-    # df.at[i, 'organization_extracted'] = extract_organization(url, text)
+        # Read, extract and save the whole dataset in batches (if the run stops, running the script again continues
+        # with the next batch)
+        run_pipeline_streaming(path_processed_data + file_name_input_data, fields_to_extract, 
+                               path_processed_data + file_name_output_data, path_processed_data + folder_name_parts, 
+                               batch_size_streaming, num_threads, num_processes)
 
-    # # Job title
-    # df.at[i, 'job_title_extracted'] = extract_job_title(text)
+    else:
 
-    # # Location
-    # df.at[i, 'location_extracted'] = extract_location(text)
+        # Read the data
+        df = pd.read_csv(path_processed_data + file_name_input_data)
 
-    # # Visa
-    # df.at[i, 'visa_extracted'] = extract_visa(text)
+        # Rows to extract information from
+        # df_to_extract = df
+        df_to_extract = df.sample(50, random_state=42) # TODO: comment this line and uncomment the one above to run the whole dataset
 
-    # Education
-    df.at[i, 'education_extracted'] = extract_education(text)
+        # Extract the information in parallel, saving the results every chunk of rows (if the run stops, running the 
+        # script again continues where it stopped)
+        run_pipeline_checkpointed(df_to_extract, fields_to_extract, path_processed_data + folder_name_checkpoints, 
+                                  chunk_size_checkpoints, num_threads, num_processes)
 
-######################################### SAVING DATA #########################################
+        # Merge the saved results (they keep the index of the rows)
+        df_extracted = load_pipeline_results(path_processed_data + folder_name_checkpoints, fields_to_extract)
+
+        # Add the extracted information to the data and save it
+        df = df.join(df_extracted)
+        df.to_csv(path_processed_data + file_name_output_data, index=False)
+
+    # Summary of the run
+    print_summary()
+
+######################################### EXTRACTING INFORMATION #########################################
 
-df.to_csv(path_processed_data + file_name_output_data, index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+# Script with a fake Azure OpenAI server to test the extraction without sending requests to Azure
+# Emilio Lehoucq
+
+# It implements the chat completions endpoint (/openai/deployments/{deployment}/chat/completions) with:
+# - latency drawn from a lognormal distribution
+# - 429 errors injected at random (with retry-after headers)
+# - malformed responses (without "Reasoning:" and "My answer is:") at random
+# - deterministic answers (the answer of the first key found in the message)
+# - responses stopped by the content filter (no content and finish reason "content_filter")
+# - the n parameter, JSON response formats, usage and rate limit headers
+#
+# To use it, run "python fake_azure_openai_server.py serve" and set AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8000
+# (any AZURE_OPENAI_API_KEY works). Running the script without arguments runs the tests.
+
+######################################### IMPORTING LIBRARIES #########################################
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+######################################### PARAMETERS #########################################
+# Default configuration of the server
+default_config = {
+    "latency_median": 0.5, # Median latency of a response in seconds (0 for no latency)
+    "latency_sigma": 0.5, # Sigma of the lognormal distribution of the latency
+    "prob_rate_limit": 0.0, # Probability of answering with a 429 error
+    "retry_after": 1.0, # Seconds to wait after a 429 error (retry-after headers)
+    "prob_malformed": 0.0, # Probability of each response being malformed
+    "answers": {}, # Answer when the key is in the message (first key found), e.g. {"bachelor degree": "bachelor"}
+    "default_answer": "missing", # Answer when no key is in the message
+    "filtered": [], # Responses stopped by the content filter when one of these keys is in the message
+    "requests_per_minute": 1000, # Quota of requests (only reported in the headers)
+    "tokens_per_minute": 1000000, # Quota of tokens (only reported in the headers)
+    "seed": 42 # Seed of the random draws (latency, 429 errors and malformed responses)
+    }
+
+# Path of the endpoint
+path_pattern = re.compile(r"^/openai/deployments/(?P<deployment>[^/]+)/chat/completions$")
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def get_answer(user_message, config):
+    """
+    Function to get the (deterministic) answer to a message.
+
+    Inputs:
+    - user_message (str): message of the user.
+    - config (dict): configuration of the server.
+
+    Output:
+    - answer (str): answer of the first key of config["answers"] in the message (config["default_answer"] if none).
+    """
+    for key, answer in config["answers"].items():
+        if key in user_message:
+            return answer
+    return config["default_answer"]
+
+def get_content(answer, malformed, response_format):
+    """
+    Function to get the content of a response.
+
+    Inputs:
+    - answer (str): answer.
+    - malformed (bool): whether the response must be malformed.
+    - response_format (dict): response_format parameter of the request (None for text).
+
+    Output:
+    - content (str): content of the response.
+    """
+    if malformed:
+        return f"I think the answer would be {answer}"
+    if response_format is not None and response_format.get("type") in ["json_object", "json_schema"]:
+        return json.dumps({"reasoning": "The job posting says so.", "answer": answer})
+    return f"Reasoning: The job posting says so.\n\nMy answer is: {answer}"
+
+def count_tokens(text):
+    """
+    Function to count the tokens of a text (approximately, 4 characters per token).
+
+    Input:
+    - text (str): text.
+
+    Output:
+    - num_tokens (int): number of tokens.
+    """
+    return len(text) // 4 + 1
+
+class FakeAzureOpenAIHandler(BaseHTTPRequestHandler):
+    """
+    Handler of the requests to the fake server (the configuration and the state are in the server).
+    """
+
+    def log_message(self, format, *args):
+        # Don't print every request
+        pass
+
+    def send_json(self, status_code, body, headers):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        config = server.config
+
+        # Check the endpoint
+        match = path_pattern.match(self.path.split("?")[0])
+        if match is None:
+            self.send_json(404, {"error": {"code": "404", "message": "Resource not found"}}, {})
+            return
+
+        # Read the request
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = body.get("messages", [])
+        user_message = "\n".join(message.get("content", "") for message in messages if message.get("role") == "user")
+        num_choices = int(body.get("n", 1))
+        num_tokens_prompt = sum(count_tokens(message.get("content", "")) for message in messages)
+
+        # Random draws (under the lock so that the sequence only depends on the seed and the order of the requests)
+        with server.lock:
+            latency = server.rng.lognormvariate(0, config["latency_sigma"]) * config["latency_median"] if config["latency_median"] > 0 else 0
+            rate_limited = server.rng.random() < config["prob_rate_limit"]
+            malformed = [server.rng.random() < config["prob_malformed"] for _ in range(num_choices)]
+
+        time.sleep(latency)
+
+        # Over the quota
+        if rate_limited:
+            with server.lock:
+                server.stats["rate_limited"] += 1
+            self.send_json(429, {"error": {"code": "429", "message": "Requests to the ChatCompletions_Create Operation have exceeded the rate limit."}}, {
+                "retry-after": str(int(config["retry_after"] + 0.999)),
+                "retry-after-ms": str(int(config["retry_after"] * 1000)),
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-remaining-tokens": "0"
+                })
+            return
+
+        # Responses
+        answer = get_answer(user_message, config)
+        filtered = any(key in user_message for key in config["filtered"])
+        contents = [None if filtered else get_content(answer, malformed[i], body.get("response_format")) for i in range(num_choices)]
+        num_tokens_completion = sum(count_tokens(content) for content in contents if content is not None)
+
+        # Requests and tokens in the last minute (for the rate limit headers)
+        now = time.monotonic()
+        with server.lock:
+            server.stats["requests"] += 1
+            server.stats["choices"] += num_choices
+            server.stats["malformed"] += sum(malformed)
+            server.window.append((now, num_tokens_prompt + num_tokens_completion))
+            while server.window and server.window[0][0] < now - 60:
+                server.window.popleft()
+            remaining_requests = max(config["requests_per_minute"] - len(server.window), 0)
+            remaining_tokens = max(config["tokens_per_minute"] - sum(num_tokens for _, num_tokens in server.window), 0)
+
+        self.send_json(200, {
+            "id": f"chatcmpl-fake-{server.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": match.group("deployment"),
+            "choices": [
+                {"index": i, "finish_reason": "content_filter" if filtered else "stop", "message": {"role": "assistant", "content": content}}
+                for i, content in enumerate(contents)
+                ],
+            "usage": {
+                "prompt_tokens": num_tokens_prompt,
+                "completion_tokens": num_tokens_completion,
+                "total_tokens": num_tokens_prompt + num_tokens_completion
+                }
+            }, {
+            "x-ratelimit-remaining-requests": str(remaining_requests),
+            "x-ratelimit-remaining-tokens": str(remaining_tokens)
+            })
+
+def start_server(port=0, **config):
+    """
+    Function to start the fake server in a background thread.
+
+    Inputs:
+    - port (int): port of the server (0 for any free port).
+    - config: configuration of the server (see default_config).
+
+    Output:
+    - server (ThreadingHTTPServer): server (server.config can be changed while it runs, server.stats has the counts).
+    - endpoint (str): endpoint to use as AZURE_OPENAI_ENDPOINT.
+    """
+    # Check the configuration
+    for key in config:
+        if key not in default_config:
+            raise ValueError(f"{key} is not one of {list(default_config)}.")
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeAzureOpenAIHandler)
+    server.daemon_threads = True
+    server.config = {**default_config, **config}
+    server.lock = threading.Lock()
+    server.rng = random.Random(server.config["seed"])
+    server.stats = {"requests": 0, "choices": 0, "rate_limited": 0, "malformed": 0}
+    server.window = deque()
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def stop_server(server):
+    """
+    Function to stop the fake server.
+
+    Input:
+    - server (ThreadingHTTPServer): server returned by start_server.
+
+    Output: None
+    """
+    server.shutdown()
+    server.server_close()
+
+if __name__ == "__main__":
+
+    # Run the server until it's stopped
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+        server, endpoint = start_server(port)
+        print(f"Fake Azure OpenAI server running at {endpoint}. Press Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            stop_server(server)
+        sys.exit(0)
+
+    print("Module with a fake Azure OpenAI server running as main.")
+    print("Running tests...")
+
+    # Start the server and point functions_azure to it (without the cache)
+    import os
+    server, endpoint = start_server(latency_median=0.01, answers={"bachelor degree": "bachelor", "Evanston": "Evanston, IL"})
+    os.environ["AZURE_OPENAI_ENDPOINT"] = endpoint
+    os.environ["AZURE_OPENAI_API_KEY"] = "fake"
+    os.environ["LLM_CACHE_MODE"] = "off"
+    import functions_azure
+    functions_azure.client = functions_azure.AzureOpenAI(azure_endpoint=endpoint, api_key="fake", api_version=functions_azure.api_version, max_retries=0)
+    functions_azure.backoff_base_time = 0.01
+    functions_azure.set_rate_limit(server.config["requests_per_minute"], server.config["tokens_per_minute"])
+
+    ##################################################################################
+    print("Tests for get_answer function:")
+
+    print("Test 1")
+    print(get_answer("A bachelor degree is required.", server.config))
+    assert get_answer("A bachelor degree is required.", server.config) == "bachelor"
+
+    print("Test 2")
+    print(get_answer("Nothing here.", server.config))
+    assert get_answer("Nothing here.", server.config) == "missing"
+
+    ##################################################################################
+    print("Tests for get_model_response function:")
+
+    print("Test 1")
+    response = functions_azure.get_model_response("prompt\n\nA bachelor degree is required.", 1)
+    print(response)
+    assert response == "Reasoning: The job posting says so.\n\nMy answer is: bachelor"
+
+    print("Test 2")
+    print(functions_azure.rate_limit_state)
+    assert functions_azure.rate_limit_state["requests"] <= server.config["requests_per_minute"] - 1
+
+    print("Test 3")
+    # Response stopped by the content filter
+    server.config.update(filtered=["violent"])
+    response = functions_azure.get_model_response("prompt\n\nA violent job posting.", 3)
+    print(response)
+    assert functions_azure.check_failed_response(response) and response.error_type == "content_filter"
+    responses = functions_azure.get_model_responses("prompt\n\nAnother violent job posting.", 3, 2)
+    print(responses)
+    assert all(functions_azure.check_failed_response(response) for response in responses)
+
+    ##################################################################################
+    print("Tests for get_model_responses function:")
+
+    print("Test 1")
+    num_requests = server.stats["requests"]
+    responses = functions_azure.get_model_responses("prompt\n\nThe job is in Evanston.", 1, 3)
+    print(responses)
+    assert [functions_azure.parse_response(response) for response in responses] == ["Evanston, IL"] * 3
+    assert server.stats["requests"] == num_requests + 1
+
+    ##################################################################################
+    print("Tests for errors 429:")
+
+    print("Test 1")
+    server.config.update(prob_rate_limit=0.5, retry_after=0.05)
+    responses = [functions_azure.get_model_response("prompt\n\nA bachelor degree is required.", 20) for _ in range(10)]
+    print(server.stats)
+    assert server.stats["rate_limited"] > 0
+    assert all(functions_azure.parse_response(response) == "bachelor" for response in responses)
+    server.config.update(prob_rate_limit=0.0)
+
+    ##################################################################################
+    print("Tests for get_response_full_process function:")
+
+    print("Test 1")
+    server.config.update(prob_malformed=0.3)
+    response = functions_azure.get_response_full_process("prompt", "A bachelor degree is required.", 5, 5, 10, 0.5, single_request=True)
+    print(response, server.stats)
+    assert response == "bachelor"
+    assert server.stats["malformed"] > 0
+
+    print("Test 2")
+    response = functions_azure.get_response_full_process_many("prompt", ["The job is in Evanston."] * 5, 5, 5, 10, 0.5, early_stopping=True)
+    print(response)
+    assert response == ["evanston, il"] * 5
+    server.config.update(prob_malformed=0.0)
+
+    print("Test 3")
+    from functions_metrics import measure_row
+    server.config.update(prob_malformed=0.3)
+    response, metrics = measure_row(functions_azure.get_response_full_process, "prompt", "A bachelor degree is required.", 5, 5, 10, 0.5, True)
+    print(response, metrics)
+    assert response == "bachelor"
+    assert metrics["counts"]["samples"] == 10 and metrics["counts"]["requests"] >= 2 and metrics["counts"]["format_retries"] > 0
+    assert metrics["counts"]["tokens_in"] > 0 and metrics["counts"]["tokens_out"] > 0 and metrics["time"]["llm_request"] > 0
+    server.config.update(prob_malformed=0.0)
+
+    print("Test 4")
+    functions_azure.set_response_format("json_object")
+    response = functions_azure.get_response_full_process("prompt", "A bachelor degree is required.", 5, 5, 3, 0.5)
+    print(response)
+    assert response == "bachelor"
+    functions_azure.set_response_format("text")
+
+    print("Test 5")
+    # A response stopped by the content filter doesn't stop the row (or the run)
+    response = functions_azure.get_response_full_process("prompt", "A violent job posting.", 5, 5, 3, 0.5)
+    print(response)
+    assert response == "problem_with_response"
+    import asyncio
+    print(asyncio.run(functions_azure.aget_model_response("prompt\n\nA violent job posting.", 3)))
+    assert asyncio.run(functions_azure.aget_model_response("prompt\n\nA violent job posting.", 3)).error_type == "content_filter"
+    server.config.update(filtered=[])
+
+    stop_server(server)
+
+    ##################################################################################
+    print("All tests passed.")
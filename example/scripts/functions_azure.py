@@ -4,8 +4,18 @@
 ######################################### IMPORTING LIBRARIES #########################################
 from dotenv import load_dotenv
 import os
-from openai import AzureOpenAI
+from openai import AzureOpenAI, AsyncAzureOpenAI, BadRequestError, RateLimitError, APIConnectionError, APIStatusError
 from time import sleep
+import asyncio
+import weakref
+import threading
+import time
+import random
+import re
+import json
+from collections import namedtuple
+from functions_cache import get_cache_key, get_cached_response, save_cached_response, check_replay_mode
+from functions_metrics import record_time, add_count
 
 ######################################### PATHS #########################################
 if os.environ.get("PIPELINE_RUN", "0") == "1":
@@ -13,9 +23,12 @@ if os.environ.get("PIPELINE_RUN", "0") == "1":
 else:
     path_prompts_folder = "prompts/"
 path_system_message = "system.txt"
+path_system_message_json = "system_json.txt"
 
 ######################################### READING DATA #########################################
-system_message = open(path_prompts_folder + path_system_message, "r").read()
+# Read the first time they're needed (see get_system_message, get_system_message_json and warm_up)
+system_message = None
+system_message_json = None
 
 ######################################### PARAMETERS #########################################
 # Get endpoint and API key from .env file
@@ -28,23 +41,678 @@ api_version = "2024-06-01" # https://learn.microsoft.com/en-us/azure/ai-services
 # deployment_name = "gpt-35-turbo-0125"
 deployment_name = "gpt-4o"
 
-# Initialize client
-client = AzureOpenAI(azure_endpoint=azure_endpoint, api_key=azure_key, api_version=api_version)
+# Client (created the first time it's needed, see get_client)
+client = None
 
-# Sleep time
-sleep_time = 2
+# Exponential backoff after errors: wait a random time between 0 and min(backoff_max_time, backoff_base_time * 2^retry)
+backoff_base_time = 1
+backoff_max_time = 60
+
+# Status codes of errors that won't go away by retrying (bad request, including content filter, authentication, etc.)
+status_codes_no_retry = [400, 401, 403, 404, 422]
+
+# Quota of the deployment (see the deployment in Azure AI Foundry)
+requests_per_minute = 60
+tokens_per_minute = 80000
+
+# Estimated number of tokens in each response (to meter the tokens before getting the response)
+estimated_tokens_response = 300
+
+# Whether the deployment accepts the n parameter (several responses in one request)
+# Set to False the first time the deployment rejects it, so that we go back to one request per response
+n_parameter_supported = True
+
+# Maximum number of requests in flight at the same time when using the async functions
+max_concurrent_requests = 10
+
+# Async clients and semaphores, one per event loop (they can't be shared across event loops)
+async_clients = weakref.WeakKeyDictionary()
+semaphores = weakref.WeakKeyDictionary()
+
+# State of the rate limiter, shared by all threads and asyncio tasks
+# The buckets start full and refill continuously at the rate of the quota
+rate_limit_state = {
+    "requests": float(requests_per_minute),
+    "tokens": float(tokens_per_minute),
+    "last_update": time.monotonic(),
+    "blocked_until": 0.0
+    }
+rate_limit_lock = threading.Lock()
+
+# Format of the responses:
+# - "text": "Reasoning: ... My answer is: ..." (system.txt)
+# - "json_object": JSON object with "reasoning" and "answer" (system_json.txt and JSON mode)
+# - "json_schema": same, with the schema enforced by the API (the answer can be restricted with set_answer_schema)
+response_format_types = ["text", "json_object", "json_schema"]
+response_format_type = "text"
+
+# Schema of the answer for the prompts that restrict it (e.g., a list of options), used with "json_schema"
+answer_schemas = {}
+
+# Abbreviations that end with a period without ending the answer (e.g., "St. Louis, MO")
+abbreviations = ["st", "mt", "ft", "dr", "jr", "sr", "inc", "co", "corp", "ltd", "univ", "dept", "no", "vs", "etc"]
+
+# Result returned instead of a response when the model couldn't give one
+# - error_type (str): "bad_request", "content_filter", "authentication", "rate_limit", "server", "connection", "other" or "no_attempts"
+# - message (str): message of the error
+# - status_code (int): status code of the error (None if there's no status code)
+# - retryable (bool): whether retrying could help
+FailedResponse = namedtuple("FailedResponse", ["error_type", "message", "status_code", "retryable"])
+
+######################################### RESOURCES #########################################
+
+def get_system_message():
+    """
+    Function to get the system message for the "text" format (reading it the first time).
+
+    Output:
+    - system_message (str): system message.
+    """
+    global system_message
+    if system_message is None:
+        system_message = open(path_prompts_folder + path_system_message, "r").read()
+    return system_message
+
+def get_system_message_json():
+    """
+    Function to get the system message for the JSON formats (reading it the first time).
+
+    Output:
+    - system_message_json (str): system message.
+    """
+    global system_message_json
+    if system_message_json is None:
+        system_message_json = open(path_prompts_folder + path_system_message_json, "r").read()
+    return system_message_json
+
+def get_client():
+    """
+    Function to get the client (creating it the first time).
+
+    Output:
+    - client (AzureOpenAI): client.
+    """
+    global client
+    if client is None:
+        client = AzureOpenAI(azure_endpoint=azure_endpoint, api_key=azure_key, api_version=api_version)
+    return client
+
+def warm_up():
+    """
+    Function to load the system messages and create the client now instead of the first time they're needed
+    (e.g., before starting the workers).
+
+    Output: None
+    """
+    get_system_message()
+    get_system_message_json()
+    get_client()
+
+######################################### RATE LIMITER #########################################
+
+def estimate_tokens(user_message, num_choices=1):
+    """
+    Function to estimate the number of tokens used by a request before sending it.
+
+    Inputs:
+    - user_message (str): string with the message to send to the model.
+    - num_choices (int): number of responses requested.
+
+    Output:
+    - num_tokens (int): estimated number of tokens (prompt and responses).
+    """
+    # Check if the input message is a string
+    if not isinstance(user_message, str):
+        raise TypeError("The input message must be a string.")
+    
+    # Roughly 4 characters per token in English
+    num_tokens_prompt = (len(get_request_format(user_message)[0]) + len(user_message)) // 4
+
+    return num_tokens_prompt + estimated_tokens_response * num_choices
+
+def refill_rate_limit():
+    """
+    Function to refill the buckets of the rate limiter with the time passed since the last update.
+
+    The caller must hold rate_limit_lock.
+
+    Output: None
+    """
+    now = time.monotonic()
+    minutes_passed = (now - rate_limit_state["last_update"]) / 60
+    rate_limit_state["requests"] = min(rate_limit_state["requests"] + minutes_passed * requests_per_minute, requests_per_minute)
+    rate_limit_state["tokens"] = min(rate_limit_state["tokens"] + minutes_passed * tokens_per_minute, tokens_per_minute)
+    rate_limit_state["last_update"] = now
+
+def reserve_rate_limit(num_tokens):
+    """
+    Function to reserve one request and a number of tokens from the rate limiter.
+
+    Input:
+    - num_tokens (int): number of tokens to reserve.
+
+    Output:
+    - wait_time (float): 0 if the request and tokens were reserved, otherwise seconds to wait before trying again.
+    """
+    # A request can't use more tokens than the whole quota
+    num_tokens = min(num_tokens, tokens_per_minute)
+
+    with rate_limit_lock:
+        refill_rate_limit()
+
+        # The API asked us to wait (retry-after)
+        wait_time = rate_limit_state["blocked_until"] - time.monotonic()
+        if wait_time > 0:
+            return wait_time
+
+        # Enough requests and tokens left
+        if rate_limit_state["requests"] >= 1 and rate_limit_state["tokens"] >= num_tokens:
+            rate_limit_state["requests"] -= 1
+            rate_limit_state["tokens"] -= num_tokens
+            return 0
+
+        # Time until there are enough requests and tokens
+        wait_requests = (1 - rate_limit_state["requests"]) / requests_per_minute * 60
+        wait_tokens = (num_tokens - rate_limit_state["tokens"]) / tokens_per_minute * 60
+        return max(wait_requests, wait_tokens, 0.01)
+
+def wait_for_rate_limit(num_tokens):
+    """
+    Function to wait until the rate limiter allows one more request with a number of tokens.
+
+    Input:
+    - num_tokens (int): estimated number of tokens of the request.
+
+    Output: None
+    """
+    wait_time = reserve_rate_limit(num_tokens)
+    while wait_time > 0:
+        with record_time("rate_limit_wait"):
+            sleep(wait_time)
+        wait_time = reserve_rate_limit(num_tokens)
+
+async def await_rate_limit(num_tokens):
+    """
+    Async version of wait_for_rate_limit.
+
+    Input:
+    - num_tokens (int): estimated number of tokens of the request.
+
+    Output: None
+    """
+    wait_time = reserve_rate_limit(num_tokens)
+    while wait_time > 0:
+        with record_time("rate_limit_wait"):
+            await asyncio.sleep(wait_time)
+        wait_time = reserve_rate_limit(num_tokens)
+
+def update_rate_limit_from_headers(headers):
+    """
+    Function to update the rate limiter with the headers of a response from the API.
+
+    The API tells us how many requests and tokens are left (x-ratelimit-remaining-*) and, when we're over the 
+    quota, how long to wait (retry-after). The API is the reference, so the buckets never go above what it says.
+
+    Input:
+    - headers (dict-like): headers of the response.
+
+    Output: None
+    """
+    if headers is None:
+        return
+
+    with rate_limit_lock:
+        refill_rate_limit()
+
+        # Requests and tokens left according to the API
+        for header, bucket in [("x-ratelimit-remaining-requests", "requests"), ("x-ratelimit-remaining-tokens", "tokens")]:
+            try:
+                remaining = float(headers.get(header))
+                rate_limit_state[bucket] = min(rate_limit_state[bucket], remaining)
+            except (TypeError, ValueError):
+                pass
+
+        # Time to wait according to the API
+        retry_after = get_retry_after(headers)
+        if retry_after:
+            rate_limit_state["blocked_until"] = max(rate_limit_state["blocked_until"], time.monotonic() + retry_after)
+
+def get_retry_after(headers):
+    """
+    Function to get how long the API asks to wait before the next request.
+
+    Input:
+    - headers (dict-like): headers of the response (can be None).
+
+    Output:
+    - retry_after (float): seconds to wait or None if the API doesn't say.
+    """
+    if headers is None:
+        return None
+    
+    # Milliseconds first because they're more precise
+    try:
+        return float(headers.get("retry-after-ms")) / 1000
+    except (TypeError, ValueError):
+        pass
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+def update_rate_limit_from_usage(estimated_tokens, usage):
+    """
+    Function to correct the tokens of the rate limiter once we know the actual usage of a request.
+
+    Inputs:
+    - estimated_tokens (int): number of tokens reserved before the request.
+    - usage (CompletionUsage): usage of the request returned by the API (can be None).
+
+    Output: None
+    """
+    if usage is None or getattr(usage, "total_tokens", None) is None:
+        return
+
+    with rate_limit_lock:
+        # Give back the tokens we overestimated (or take the ones we underestimated)
+        rate_limit_state["tokens"] = min(rate_limit_state["tokens"] + estimated_tokens - usage.total_tokens, tokens_per_minute)
+
+def set_response_format(new_response_format_type):
+    """
+    Function to set the format of the responses (see response_format_types).
+
+    Input:
+    - new_response_format_type (str): "text", "json_object" or "json_schema".
+
+    Output: None
+    """
+    global response_format_type
+
+    # Check that the format is valid
+    if new_response_format_type not in response_format_types:
+        raise ValueError(f"The format must be one of {response_format_types}.")
+
+    response_format_type = new_response_format_type
+
+def set_answer_schema(prompt, answer_schema):
+    """
+    Function to set the schema of the answer for a prompt (used when the format is "json_schema").
+
+    Inputs:
+    - prompt (str): prompt of the field.
+    - answer_schema (dict): JSON schema of the answer (e.g., {"type": "string", "enum": ["yes", "no", "missing"]}).
+
+    Output: None
+    """
+    # Check the inputs
+    if not isinstance(prompt, str):
+        raise TypeError("The prompt must be a string.")
+    if not isinstance(answer_schema, dict):
+        raise TypeError("The schema must be a dictionary.")
+
+    answer_schemas[prompt] = answer_schema
+
+def get_answer_schema(user_message):
+    """
+    Function to get the schema of the answer for a message (the schema of its prompt or any string).
+
+    Input:
+    - user_message (str): string with the message to send to the model (prompt and text).
+
+    Output:
+    - answer_schema (dict): JSON schema of the answer.
+    """
+    for prompt, answer_schema in answer_schemas.items():
+        if user_message.startswith(prompt + "\n\n"):
+            return answer_schema
+    return {"type": "string"}
+
+def get_request_format(user_message):
+    """
+    Function to get the system message and the response_format parameter for a message, given the format of the responses.
+
+    Input:
+    - user_message (str): string with the message to send to the model.
+
+    Output:
+    - system (str): system message.
+    - response_format (dict): response_format parameter (None for "text").
+    """
+    if response_format_type == "text":
+        return get_system_message(), None
+
+    if response_format_type == "json_object":
+        return get_system_message_json(), {"type": "json_object"}
+
+    # Schema with the reasoning and the answer
+    schema = {
+        "type": "object",
+        "properties": {"reasoning": {"type": "string"}, "answer": get_answer_schema(user_message)},
+        "required": ["reasoning", "answer"],
+        "additionalProperties": False
+        }
+    return get_system_message_json(), {"type": "json_schema", "json_schema": {"name": "answer", "strict": True, "schema": schema}}
+
+def get_cache_system_message(user_message):
+    """
+    Function to get what identifies the instructions of a message in the cache (system message and response format).
+
+    With "text", it's the system message, so the responses cached before there were other formats are still used.
+
+    Input:
+    - user_message (str): string with the message to send to the model.
+
+    Output:
+    - cache_system_message (str): system message (and response format) for the cache key.
+    """
+    system, response_format = get_request_format(user_message)
+    if response_format is None:
+        return system
+    return system + json.dumps(response_format, sort_keys=True)
+
+def create_chat_completion(user_message, num_choices=1):
+    """
+    Function to send a request to the model going through the rate limiter.
+
+    Inputs:
+    - user_message (str): string with the message to send to the model.
+    - num_choices (int): number of responses to get (n parameter).
+
+    Output:
+    - response (ChatCompletion): response from the API.
+    """
+    # Wait until the quota allows the request
+    estimated_tokens = estimate_tokens(user_message, num_choices)
+    wait_for_rate_limit(estimated_tokens)
+
+    # Only send n when asking for several responses
+    extra_parameters = {"n": num_choices} if num_choices > 1 else {}
+
+    # System message and response format
+    system, response_format = get_request_format(user_message)
+    if response_format is not None:
+        extra_parameters["response_format"] = response_format
+
+    try:
+
+        # Get response (raw to be able to read the headers)
+        add_count("requests")
+        with record_time("llm_request"):
+            raw_response = get_client().chat.completions.with_raw_response.create(
+                model=deployment_name,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": user_message}
+                    ],
+                **extra_parameters
+                )
+        
+    except RateLimitError as e:
+
+        # Wait as long as the API says
+        update_rate_limit_from_headers(e.response.headers)
+        raise
+
+    # Update the rate limiter with what the API says
+    update_rate_limit_from_headers(raw_response.headers)
+    response = raw_response.parse()
+    update_rate_limit_from_usage(estimated_tokens, response.usage)
+
+    # Tokens in and out
+    if response.usage is not None:
+        add_count("tokens_in", getattr(response.usage, "prompt_tokens", 0) or 0)
+        add_count("tokens_out", getattr(response.usage, "completion_tokens", 0) or 0)
+
+    return response
+
+async def acreate_chat_completion(user_message, num_choices=1):
+    """
+    Async version of create_chat_completion. The request also waits for a free slot (see max_concurrent_requests).
+
+    Inputs:
+    - user_message (str): string with the message to send to the model.
+    - num_choices (int): number of responses to get (n parameter).
+
+    Output:
+    - response (ChatCompletion): response from the API.
+    """
+    # Wait until the quota allows the request
+    estimated_tokens = estimate_tokens(user_message, num_choices)
+    await await_rate_limit(estimated_tokens)
+
+    # Only send n when asking for several responses
+    extra_parameters = {"n": num_choices} if num_choices > 1 else {}
+
+    # System message and response format
+    system, response_format = get_request_format(user_message)
+    if response_format is not None:
+        extra_parameters["response_format"] = response_format
+
+    try:
+
+        # Wait for a free slot and get response (raw to be able to read the headers)
+        add_count("requests")
+        with record_time("llm_request"):
+            async with get_semaphore():
+                raw_response = await get_async_client().chat.completions.with_raw_response.create(
+                    model=deployment_name,
+                    messages=[
+                        {"role": "system", "content": system},
+                        {"role": "user", "content": user_message}
+                        ],
+                    **extra_parameters
+                    )
+            
+    except RateLimitError as e:
+
+        # Wait as long as the API says
+        update_rate_limit_from_headers(e.response.headers)
+        raise
+
+    # Update the rate limiter with what the API says
+    update_rate_limit_from_headers(raw_response.headers)
+    response = raw_response.parse()
+    update_rate_limit_from_usage(estimated_tokens, response.usage)
+
+    # Tokens in and out
+    if response.usage is not None:
+        add_count("tokens_in", getattr(response.usage, "prompt_tokens", 0) or 0)
+        add_count("tokens_out", getattr(response.usage, "completion_tokens", 0) or 0)
+
+    return response
+
+def set_rate_limit(new_requests_per_minute, new_tokens_per_minute):
+    """
+    Function to set the quota of the deployment used by the rate limiter.
+
+    Inputs:
+    - new_requests_per_minute (int): requests per minute.
+    - new_tokens_per_minute (int): tokens per minute.
+
+    Output: None
+    """
+    global requests_per_minute, tokens_per_minute
+
+    # Check that the quotas are positive numbers
+    for quota in [new_requests_per_minute, new_tokens_per_minute]:
+        if not isinstance(quota, (int, float)):
+            raise TypeError("The quota must be a number.")
+        if quota <= 0:
+            raise ValueError("The quota must be positive.")
+
+    with rate_limit_lock:
+        requests_per_minute = new_requests_per_minute
+        tokens_per_minute = new_tokens_per_minute
+        rate_limit_state["requests"] = min(rate_limit_state["requests"], requests_per_minute)
+        rate_limit_state["tokens"] = min(rate_limit_state["tokens"], tokens_per_minute)
+
+######################################### ERROR HANDLING #########################################
+
+def classify_error(error):
+    """
+    Function to classify an error from the API.
+
+    Input:
+    - error (Exception): error raised when sending the request.
+
+    Output:
+    - failed_response (FailedResponse): type of error and whether retrying could help.
+    """
+    # Errors with a status code
+    if isinstance(error, APIStatusError):
+        status_code = error.status_code
+
+        # Over the quota
+        if isinstance(error, RateLimitError) or status_code == 429:
+            return FailedResponse("rate_limit", str(error), status_code, True)
+        
+        # The prompt or the response was filtered
+        if getattr(error, "code", None) == "content_filter":
+            return FailedResponse("content_filter", str(error), status_code, False)
+        
+        # Problems with the request itself
+        if status_code == 400 or status_code == 422:
+            return FailedResponse("bad_request", str(error), status_code, False)
+        if status_code in status_codes_no_retry:
+            return FailedResponse("authentication", str(error), status_code, False)
+        
+        # Problems on the server side
+        if status_code >= 500:
+            return FailedResponse("server", str(error), status_code, True)
+
+        return FailedResponse("other", str(error), status_code, status_code not in status_codes_no_retry)
+    
+    # Timeouts and connection problems
+    if isinstance(error, APIConnectionError):
+        return FailedResponse("connection", str(error), None, True)
+    
+    return FailedResponse("other", str(error), None, True)
+
+def get_choice_content(choice):
+    """
+    Function to get the content of a response (choice) from the API.
+
+    Input:
+    - choice: choice of the response from the API.
+
+    Output:
+    - response_content (str): content of the response or FailedResponse if there's none (e.g., the content filter
+      stopped the response: the content is None and the finish reason is "content_filter").
+    """
+    if choice.finish_reason == "content_filter" or not isinstance(choice.message.content, str):
+        print("Error: content_filter - no content in the response, finish reason:", choice.finish_reason)
+        add_count("errors")
+        return FailedResponse("content_filter", f"No content in the response (finish reason: {choice.finish_reason}).", None, False)
+    return choice.message.content
+
+def get_backoff_time(retry):
+    """
+    Function to get the time to wait before retrying (exponential backoff with full jitter).
+
+    Input:
+    - retry (int): number of the retry (starting at 0).
+
+    Output:
+    - backoff_time (float): seconds to wait.
+    """
+    return random.uniform(0, min(backoff_max_time, backoff_base_time * 2 ** retry))
+
+def get_wait_time_error(error, failed_response, retry):
+    """
+    Function to get the time to wait after an error before retrying.
+
+    When the API says how long to wait (retry-after), the rate limiter already waits that long.
+
+    Inputs:
+    - error (Exception): error raised when sending the request.
+    - failed_response (FailedResponse): classification of the error.
+    - retry (int): number of the retry (starting at 0).
+
+    Output:
+    - wait_time (float): seconds to wait.
+    """
+    # The rate limiter waits as long as the API says
+    if failed_response.error_type == "rate_limit":
+        response = getattr(error, "response", None)
+        if get_retry_after(response.headers if response is not None else None) is not None:
+            return 0
+        
+    return get_backoff_time(retry)
+
+def handle_error(error, retry, num_retries):
+    """
+    Function to deal with an error when sending a request: classify it and wait before retrying if it makes sense.
+
+    Inputs:
+    - error (Exception): error raised when sending the request.
+    - retry (int): number of the retry (starting at 0).
+    - num_retries (int): number of retries allowed.
+
+    Output:
+    - failed_response (FailedResponse): classification of the error.
+    """
+    failed_response = classify_error(error)
+    print("Error:", failed_response.error_type, "-", error)
+    add_count("errors")
+
+    # Wait only if we're going to retry
+    if failed_response.retryable and retry < num_retries - 1:
+        add_count("retries")
+        with record_time("backoff_wait"):
+            sleep(get_wait_time_error(error, failed_response, retry))
+
+    return failed_response
+
+async def ahandle_error(error, retry, num_retries):
+    """
+    Async version of handle_error.
+
+    Inputs:
+    - error (Exception): error raised when sending the request.
+    - retry (int): number of the retry (starting at 0).
+    - num_retries (int): number of retries allowed.
+
+    Output:
+    - failed_response (FailedResponse): classification of the error.
+    """
+    failed_response = classify_error(error)
+    print("Error:", failed_response.error_type, "-", error)
+    add_count("errors")
+
+    # Wait only if we're going to retry
+    if failed_response.retryable and retry < num_retries - 1:
+        add_count("retries")
+        with record_time("backoff_wait"):
+            await asyncio.sleep(get_wait_time_error(error, failed_response, retry))
+
+    return failed_response
+
+def check_failed_response(response):
+    """
+    Function to check if a response is a failure (the model couldn't give a response).
+
+    Input:
+    - response: response from get_model_response.
+
+    Output:
+    - bool: True if the response is a FailedResponse, False otherwise.
+    """
+    return isinstance(response, FailedResponse)
 
 ######################################### FUNCTIONS #########################################
-def get_model_response(user_message, num_retries_failure):
+def get_model_response(user_message, num_retries_failure, sample_index=0):
     """
     Function to get a response from an OpenAI model.
 
+    The response is taken from the cache on disk if it's there (see functions_cache).
+
     Input:
     - message (str): string with the message to send to the model.
     - num_retries (int): number of retries allowed if there's a problem getting the response.
+    - sample_index (int or str): index of the response for the same message (used for the cache).
 
     Output:
-    - response_content (str): string with the response from the model.
+    - response_content (str): string with the response from the model or FailedResponse if there was none.
     """
     # Check if the input message is a string
     if not isinstance(user_message, str):
@@ -57,6 +725,20 @@ def get_model_response(user_message, num_retries_failure):
     # Check if the number of retries is positive
     if num_retries_failure < 0:
         raise ValueError("The number of retries must be a positive integer.")
+    
+    # Get the response from the cache if it's there
+    key = get_cache_key(deployment_name, api_version, get_cache_system_message(user_message), user_message, sample_index)
+    response_content = get_cached_response(key)
+    if response_content is not None:
+        add_count("cache_hits")
+        return response_content
+    
+    # When replaying, the response must be in the cache
+    if check_replay_mode():
+        raise LookupError("The response is not in the cache and the cache is in replay mode.")
+    
+    # In case there are no attempts
+    failed_response = FailedResponse("no_attempts", "No attempts allowed.", None, False)
         
     # Iterate over the number of retries
     for i in range(num_retries_failure):
@@ -64,25 +746,27 @@ def get_model_response(user_message, num_retries_failure):
         try:
     
             # Get response
-            response = client.chat.completions.create(
-                model=deployment_name,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                    ]
-                )
+            response = create_chat_completion(user_message)
+
+            # Get the response content (FailedResponse if there's none, not saved in the cache)
+            response_content = get_choice_content(response.choices[0])
 
-            # Get the response content
-            response_content = response.choices[0].message.content
+            # Save the response in the cache
+            if not check_failed_response(response_content):
+                save_cached_response(key, response_content)
 
             return response_content
         
         except Exception as e:
 
-            print("Error:", e)
-            sleep(sleep_time)
+            # Wait before retrying (unless retrying won't help)
+            failed_response = handle_error(e, i, num_retries_failure)
+            if not failed_response.retryable:
+                break
 
-def get_model_response_with_text(prompt, text, num_retries_failure):
+    return failed_response
+
+def get_model_response_with_text(prompt, text, num_retries_failure, sample_index=0):
     """
     Function to get a response from an OpenAI model with a text.
 
@@ -90,6 +774,7 @@ def get_model_response_with_text(prompt, text, num_retries_failure):
     - prompt (str): string with the prompt to send to the model.
     - text (str): string with the text to send to the model.
     - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - sample_index (int or str): index of the response for the same prompt and text (used for the cache).
 
     Output:
     - response_content (str): string with the response from the model.
@@ -110,7 +795,7 @@ def get_model_response_with_text(prompt, text, num_retries_failure):
     if num_retries_failure < 0:
         raise ValueError("The number of retries must be a positive integer.")
     
-    return get_model_response(prompt + "\n\n" + text, num_retries_failure)
+    return get_model_response(prompt + "\n\n" + text, num_retries_failure, sample_index)
 
 def check_correct_format(response):
     """
@@ -131,7 +816,7 @@ def check_correct_format(response):
     # Check if the string starts with "Reasoning:" and contains "My answer is: "
     return response[:10] == "Reasoning:" and "My answer is: " in response
 
-def get_response_checking_format(prompt, text, num_retries_failure, num_retries_format):
+def get_response_checking_format(prompt, text, num_retries_failure, num_retries_format, sample_index=0):
     """
     Function to get a response from an OpenAI model and check if the response is correct.
 
@@ -140,6 +825,7 @@ def get_response_checking_format(prompt, text, num_retries_failure, num_retries_
     - text (str): string with the text to send to the model.
     - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
     - num_retries (int): number of retries to get a correct response.
+    - sample_index (int): index of the response for the same prompt and text (used for the cache).
 
     Output:
     - response_content (str): string with the response from the model.
@@ -171,46 +857,133 @@ def get_response_checking_format(prompt, text, num_retries_failure, num_retries_
     # Iterate over the number of retries
     for i in range(num_retries_format):
 
-        # Get response
-        response = get_model_response_with_text(prompt, text, num_retries_failure)
-        
-        # Check if the response is in the correct format
-        if check_correct_format(response):
-            return get_relevant_part_response(response)
+        # The previous response wasn't in the correct format
+        if i > 0:
+            add_count("format_retries")
+
+        # Get response (each retry is a different entry in the cache)
+        response = get_model_response_with_text(prompt, text, num_retries_failure, get_sample_index_retry(sample_index, i))
+
+        # The model couldn't give a response: give up (asking again won't help)
+        if check_failed_response(response):
+            break
         
-        # Sleep
-        sleep(sleep_time)
+        # Check if there's an answer in the response
+        relevant_part = parse_response(response)
+        if relevant_part is not None:
+            return relevant_part
         
     return "problem_with_response"
 
-def get_relevant_part_response(response):
+def get_sample_index_retry(sample_index, retry):
+    """
+    Function to get the index used in the cache for a retry of a response.
+
+    Inputs:
+    - sample_index (int): index of the response for the same prompt and text.
+    - retry (int): number of the retry to get a response in the correct format.
+
+    Output:
+    - sample_index_retry (str): index used in the cache.
+    """
+    return f"{sample_index}-{retry}"
+
+def get_answer_part(response):
     """
-    Get the relevant part of the response.
+    Function to get the part of a text response after "My answer is:" (in any case, with or without "Reasoning:"
+    and a space), e.g., to parse an answer that isn't a single line (see parse_response).
 
     Input:
-    - response (str): The response to check.
+    - response (str): The response.
 
     Output:
-    - relevant_part (str): The relevant part of the response.
+    - answer_part (str): The response after "My answer is:" (None if it's not in the response).
+    """
+    # Check if the input is a string
+    if not isinstance(response, str):
+        raise TypeError("Response must be a string.")
+
+    match = re.search(r"my answer is:", response, re.IGNORECASE)
+    return response[match.end():] if match is not None else None
+
+def parse_response(response):
+    """
+    Function to get the answer from a response, being lenient with the format so that the answer can be used 
+    instead of asking again.
+
+    It accepts JSON responses ({"reasoning": ..., "answer": ...}) and responses with "My answer is:" (in any case,
+    with or without "Reasoning:" and a space). The answer is the first line after "My answer is:", up to the end 
+    of the first sentence. Periods in abbreviations don't end the sentence (e.g., "Ph.D." or "St. Louis, MO").
+
+    Input:
+    - response (str): The response to parse.
+
+    Output:
+    - answer (str): The answer (None if there's no answer in the response).
+    """
+    # Check if the input is a string
+    if not isinstance(response, str):
+        raise TypeError("Response must be a string.")
+
+    # JSON response
+    response = response.strip()
+    if response.startswith("{"):
+        try:
+            answer = json.loads(response).get("answer")
+        except (json.JSONDecodeError, AttributeError):
+            answer = None
+        if answer is None:
+            return None
+        answer = str(answer).strip()
+        return answer if answer else None
+
+    # Text response: the first line after "My answer is:"
+    answer_part = get_answer_part(response)
+    if answer_part is None:
+        return None
+    lines = [line for line in answer_part.split("\n") if line.strip()]
+    if not lines:
+        return None
+    answer = lines[0]
+
+    # Cut at the end of the first sentence (a period followed by a space or the end, except in abbreviations)
+    for period in re.finditer(r"\.(?=\s|$)", answer):
+        words = answer[:period.start()].split()
+        previous_word = words[-1].strip("\"'“”*(") if words else ""
+        if len(previous_word) <= 1 or "." in previous_word or previous_word.lower() in abbreviations:
+            continue
+        answer = answer[:period.start()]
+        break
+
+    # Remove quotes and markdown around the answer
+    answer = answer.strip().strip("\"'“”*`").strip()
+
+    return answer if answer else None
+
+def get_relevant_part_response(response):
+    """
+    Get the relevant part of the response (see parse_response).
+
+    Input:
+    - response (str): The response to check.
+
+    Output:
+    - relevant_part (str): The relevant part of the response.
     """
     # Check if the input is a string
     if not isinstance(response, str):
         raise TypeError("Response must be a string.")
-    
-    # Check if the response is in the correct format
-    if not check_correct_format(response):
-        raise ValueError("The response is not in the correct format.")
     
     # Get the relevant part of the response
-    # The relevant part is the part after "My answer is: " and before "." (if there is)
-    response = response.split("My answer is: ")[1].split(".")[0]
+    relevant_part = parse_response(response)
 
-    # Remove leading and trailing whitespaces
-    response = response.strip()
+    # Check if there's an answer in the response
+    if relevant_part is None:
+        raise ValueError("The response is not in the correct format.")
 
-    return response
+    return relevant_part
 
-def get_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses):
+def get_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses, single_request=False, first_sample_index=0):
     """
     Function to get multiple responses from an OpenAI model and check if the responses are correct.
 
@@ -219,6 +992,8 @@ def get_multiple_responses(prompt, text, num_retries_failure, num_retries_format
     - text (str): string with the text to send to the model.
     - num_retries (int): number of retries to get a correct response.
     - num_responses (int): number of responses to get.
+    - single_request (bool): whether to get all the responses in a single request (using the n parameter).
+    - first_sample_index (int): index of the first response (used for the cache when getting responses in several calls).
 
     Output:
     - responses (list): list with the responses from the model.
@@ -255,38 +1030,892 @@ def get_multiple_responses(prompt, text, num_retries_failure, num_retries_format
     if num_responses < 0:
         raise ValueError("The number of responses must be a positive integer.")
     
-    # Initialize list to store responses
-    responses = []
-
-    # Iterate over the number of responses
-    for i in range(num_responses):
+    # Check that single_request is a boolean
+    if not isinstance(single_request, bool):
+        raise TypeError("single_request must be a boolean.")
+    
+    # Responses used for voting
+    add_count("samples", num_responses)
+
+    # Get all responses in a single request
+    if single_request:
+        return get_multiple_responses_single_request(prompt, text, num_retries_failure, num_retries_format, num_responses, first_sample_index)
+    
+    # Initialize list to store responses
+    responses = []
+
+    # Iterate over the number of responses
+    for i in range(num_responses):
+
+        # Get response
+        response = get_response_checking_format(prompt, text, num_retries_failure, num_retries_format, first_sample_index + i)
+        
+        # Append response to list of responses
+        responses.append(response)
+
+    return responses
+
+def get_model_responses(user_message, num_retries_failure, num_choices, sample_indexes=None):
+    """
+    Function to get several responses from an OpenAI model in a single request (using the n parameter).
+
+    If the deployment doesn't accept the n parameter, the responses are requested one by one.
+    The responses in the cache on disk are not requested again (see functions_cache).
+
+    Inputs:
+    - user_message (str): string with the message to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the responses.
+    - num_choices (int): number of responses to get.
+    - sample_indexes (list): index of each response for the same message (used for the cache). By default, 0, 1, 2...
+
+    Output:
+    - responses_content (list): list with the responses from the model (FailedResponse for the ones that couldn't be obtained).
+    """
+    global n_parameter_supported
+
+    # Check if the input message is a string
+    if not isinstance(user_message, str):
+        raise TypeError("The input message must be a string.")
+    
+    # Check if the number of retries is an integer
+    if not isinstance(num_retries_failure, int):
+        raise TypeError("The number of retries must be an integer.")
+    
+    # Check if the number of retries is positive
+    if num_retries_failure < 0:
+        raise ValueError("The number of retries must be a positive integer.")
+    
+    # Check if the number of choices is an integer
+    if not isinstance(num_choices, int):
+        raise TypeError("The number of choices must be an integer.")
+    
+    # Check if the number of choices is positive
+    if num_choices < 0:
+        raise ValueError("The number of choices must be a positive integer.")
+    
+    # Default indexes for the cache
+    if sample_indexes is None:
+        sample_indexes = list(range(num_choices))
+    
+    # Check that there's one index per response
+    if len(sample_indexes) != num_choices:
+        raise ValueError("There must be one sample index per response.")
+    
+    # If the deployment doesn't accept the n parameter (or there's only one response to get), one request per response
+    if not n_parameter_supported or num_choices <= 1:
+        return [get_model_response(user_message, num_retries_failure, sample_index) for sample_index in sample_indexes]
+    
+    # Get the responses from the cache if they're there
+    cache_system_message = get_cache_system_message(user_message)
+    keys = [get_cache_key(deployment_name, api_version, cache_system_message, user_message, sample_index) for sample_index in sample_indexes]
+    responses_content = [get_cached_response(key) for key in keys]
+    missing = [j for j, response_content in enumerate(responses_content) if response_content is None]
+    add_count("cache_hits", len(responses_content) - len(missing))
+    if not missing:
+        return responses_content
+    
+    # When replaying, the responses must be in the cache
+    if check_replay_mode():
+        raise LookupError("The responses are not in the cache and the cache is in replay mode.")
+    
+    # In case there are no attempts
+    failed_response = FailedResponse("no_attempts", "No attempts allowed.", None, False)
+
+    # Iterate over the number of retries
+    for i in range(num_retries_failure):
+
+        try:
+
+            # Get the responses that are not in the cache
+            response = create_chat_completion(user_message, len(missing))
+
+            # Get the content of each response and save it in the cache
+            for j, choice in zip(missing, response.choices):
+                responses_content[j] = get_choice_content(choice)
+                if not check_failed_response(responses_content[j]):
+                    save_cached_response(keys[j], responses_content[j])
+
+            return responses_content
+        
+        except BadRequestError as e:
+
+            # If the deployment rejected the n parameter, don't use it anymore
+            if check_n_parameter_rejected(e):
+                print("The deployment doesn't accept the n parameter. Getting the responses one by one.")
+                n_parameter_supported = False
+                return [get_model_response(user_message, num_retries_failure, sample_index) for sample_index in sample_indexes]
+
+            # Wait before retrying (unless retrying won't help)
+            failed_response = handle_error(e, i, num_retries_failure)
+            if not failed_response.retryable:
+                break
+        
+        except Exception as e:
+
+            # Wait before retrying (unless retrying won't help)
+            failed_response = handle_error(e, i, num_retries_failure)
+            if not failed_response.retryable:
+                break
+
+    # The responses we couldn't get
+    return [response_content if response_content is not None else failed_response for response_content in responses_content]
+
+def check_n_parameter_rejected(error):
+    """
+    Function to check if an error from the API is due to the deployment not accepting the n parameter.
+
+    Input:
+    - error (BadRequestError): error raised by the API.
+
+    Output:
+    - bool: True if the error is about the n parameter, False otherwise.
+    """
+    # The API says which parameter is the problem
+    if getattr(error, "param", None) == "n":
+        return True
+    
+    # Otherwise, look at the message
+    message = str(error).lower()
+    return "'n'" in message or "n parameter" in message or "parameter n " in message
+
+def get_relevant_parts_responses(responses):
+    """
+    Function to get the relevant part of each response, checking the format of each one.
+
+    Input:
+    - responses (list): list with the responses from the model (some can be None or FailedResponse).
+
+    Output:
+    - relevant_parts (list): list with the relevant part of each response (None for the malformed ones).
+    """
+    # Check if the input responses is a list
+    if not isinstance(responses, list):
+        raise TypeError("Responses must be a list.")
+    
+    return [
+        parse_response(response) if isinstance(response, str) else None
+        for response in responses
+        ]
+
+def get_multiple_responses_single_request(prompt, text, num_retries_failure, num_retries_format, num_responses, first_sample_index=0):
+    """
+    Function to get multiple responses from an OpenAI model in a single request and check if the responses are correct.
+
+    Only the responses that are not in the correct format are requested again.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the responses.
+    - num_retries_format (int): number of retries to get correct responses.
+    - num_responses (int): number of responses to get.
+    - first_sample_index (int): index of the first response (used for the cache).
+
+    Output:
+    - responses (list): list with the responses from the model.
+    """
+    # Initialize list to store responses (None means that we still need a correct response)
+    responses = [None] * num_responses
+
+    # Iterate over the number of retries
+    for i in range(num_retries_format):
+
+        # Positions of the responses that we still need
+        missing = [j for j, response in enumerate(responses) if response is None]
+        if not missing:
+            break
+
+        # The previous responses in these positions weren't in the correct format
+        if i > 0:
+            add_count("format_retries", len(missing))
+
+        # Get responses for the positions that we still need (same indexes in the cache as get_response_checking_format)
+        sample_indexes = [get_sample_index_retry(first_sample_index + j, i) for j in missing]
+        new_responses = get_model_responses(prompt + "\n\n" + text, num_retries_failure, len(missing), sample_indexes)
+
+        # Keep the responses in the correct format
+        for j, relevant_part in zip(missing, get_relevant_parts_responses(new_responses)):
+            responses[j] = relevant_part
+
+        # The model couldn't give responses: give up (asking again won't help)
+        if any(check_failed_response(response) for response in new_responses):
+            break
+
+    # Responses that never came in the correct format
+    return [response if response is not None else "problem_with_response" for response in responses]
+
+def get_majority_response(responses, prop_majority):
+    """
+    Function to get the majority response from a list of responses.
+
+    Inputs:
+    - responses (list): list with the responses to check.
+    - prop_majority (float): proportion of responses that must match.
+
+    Output:
+    - majority_response (str): string with the majority response.
+    """
+    # Check if the input responses is a list
+    if not isinstance(responses, list):
+        raise TypeError("Responses must be a list.")
+    
+    # Check if the input proportion is a number
+    if not isinstance(prop_majority, (int, float)):
+        raise TypeError("The proportion must be a number.")
+    
+    # Check if the input proportion is between 0 and 1
+    if prop_majority < 0 or prop_majority > 1:
+        raise ValueError("The proportion must be between 0 and 1.")
+    
+    # Initialize dictionary to store the count of each response
+    response_count = {}
+
+    # Iterate over the responses
+    for response in responses:
+
+        # Clean response
+        response_clean = clean_response_string(response)
+
+        # Check if the cleaned response is in the dictionary
+        if response_clean in response_count:
+            response_count[response_clean] += 1
+        else:
+            response_count[response_clean] = 1
+
+    # Get the response with the highest count
+    majority_response = max(response_count, key=response_count.get)
+
+    # Check if the proportion of the majority response is greater than the input proportion
+    if response_count[majority_response] / len(responses) >= prop_majority:
+        return majority_response
+
+def clean_response_string(response):
+    """
+    Function to clean a response string.
+
+    Inputs:
+    - response (str): string with the response to clean.
+
+    Output:
+    - response (str): string with the cleaned response.
+    """
+    # Check if the input is a string
+    if not isinstance(response, str):
+        raise TypeError("Response must be a string.")
+    
+    # Remove leading and trailing whitespaces
+    response = response.strip()
+
+    # Lowercase 
+    response = response.lower()
+
+    return response
+
+def get_response_full_process(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request=False, early_stopping=False):
+    """
+    Function to get a response from an OpenAI model and check if the response is correct.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - num_retries (int): number of retries to get a correct response.
+    - num_responses (int): number of responses to get.
+    - prop_majority (float): proportion of responses that must match.
+    - single_request (bool): whether to get all the responses in a single request (using the n parameter).
+    - early_stopping (bool): whether to stop getting responses as soon as the majority is decided.
+
+    Output:
+    - response_content (str): string with the response from the model.
+    """
+    # Check if the input prompt is a string
+    if not isinstance(prompt, str):
+        raise TypeError("The input prompt must be a string.")
+    
+    # Check if the input text is a string
+    if not isinstance(text, str):
+        raise TypeError("The input text must be a string.")
+
+    # Check if the number of retries is an integer
+    if not isinstance(num_retries_failure, int):
+        raise TypeError("The number of retries must be an integer.")
+    
+    # Check if the number of retries is positive
+    if num_retries_failure < 0:
+        raise ValueError("The number of retries must be a positive integer.")
+    
+    # Check if the number of retries is an integer
+    if not isinstance(num_retries_format, int):
+        raise TypeError("The number of retries must be an integer.")
+    
+    # Check if the number of retries is positive
+    if num_retries_format < 0:
+        raise ValueError("The number of retries must be a positive integer.")
+    
+    # Check if the number of responses is an integer
+    if not isinstance(num_responses, int):
+        raise TypeError("The number of responses must be an integer.")
+    
+    # Check if the number of responses is positive
+    if num_responses < 0:
+        raise ValueError("The number of responses must be a positive integer.")
+    
+    # Check if the input proportion is a number
+    if not isinstance(prop_majority, (int, float)):
+        raise TypeError("The proportion must be a number.")
+    
+    # Check if the input proportion is between 0 and 1
+    if prop_majority < 0 or prop_majority > 1:
+        raise ValueError("The proportion must be between 0 and 1.")
+    
+    # Stop getting responses as soon as the majority is decided
+    if early_stopping:
+        return get_response_full_process_early_stopping(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request)[0]
+    
+    # Get multiple responses
+    responses = get_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses, single_request)
+    
+    # Get majority response
+    majority_response = get_majority_response(responses, prop_majority)
+
+    return majority_response
+
+def get_min_count_majority(num_responses, prop_majority):
+    """
+    Function to get the minimum number of matching responses needed to reach the majority.
+
+    Inputs:
+    - num_responses (int): number of responses.
+    - prop_majority (float): proportion of responses that must match.
+
+    Output:
+    - min_count (int): minimum number of matching responses (num_responses + 1 if the majority can't be reached).
+    """
+    # Same comparison as in get_majority_response to avoid floating point surprises (e.g., 0.7 * 10 > 7)
+    for count in range(num_responses + 1):
+        if count / num_responses >= prop_majority:
+            return count
+        
+    return num_responses + 1
+
+def check_majority_decided(responses, num_responses, prop_majority):
+    """
+    Function to check if the majority response is already decided before getting all the responses.
+
+    The majority is decided when the leading response will be returned by get_majority_response no matter 
+    what the remaining responses are, or when no response can reach the majority anymore.
+
+    Inputs:
+    - responses (list): list with the responses collected so far.
+    - num_responses (int): total number of responses that would be collected.
+    - prop_majority (float): proportion of responses that must match.
+
+    Output:
+    - decided (bool): True if the majority is decided, False otherwise.
+    - majority_response (str): the majority response if decided (None if no response can reach the majority).
+    """
+    # Check if the input responses is a list
+    if not isinstance(responses, list):
+        raise TypeError("Responses must be a list.")
+    
+    # Nothing collected yet
+    if not responses:
+        return False, None
+    
+    # Count the responses (in order of appearance, which is how get_majority_response breaks ties)
+    response_count = {}
+    for response in responses:
+        response_clean = clean_response_string(response)
+        response_count[response_clean] = response_count.get(response_clean, 0) + 1
+
+    # Responses still to collect
+    num_remaining = num_responses - len(responses)
+
+    # Minimum number of matching responses to reach the majority
+    min_count = get_min_count_majority(num_responses, prop_majority)
+
+    # Get the leading response
+    leading_response = max(response_count, key=response_count.get)
+    leading_count = response_count[leading_response]
+
+    # No response can reach the majority anymore
+    if leading_count + num_remaining < min_count:
+        return True, None
+    
+    # The leading response hasn't reached the majority yet
+    if leading_count < min_count:
+        return False, None
+    
+    # A response that hasn't appeared yet could catch up (ties go to the response that appeared first)
+    if num_remaining > leading_count:
+        return False, None
+    
+    # Another response could catch up
+    seen_leading_response = False
+    for response_clean, count in response_count.items():
+        if response_clean == leading_response:
+            seen_leading_response = True
+            continue
+        # Responses that appeared before the leading one win the ties
+        if count + num_remaining > leading_count or (count + num_remaining == leading_count and not seen_leading_response):
+            return False, None
+        
+    return True, leading_response
+
+def get_num_responses_next_wave(responses, num_responses, prop_majority):
+    """
+    Function to get how many responses to request in the next wave when stopping early.
+
+    It's the number of responses the leading response still needs to reach the majority (at least 1).
+
+    Inputs:
+    - responses (list): list with the responses collected so far.
+    - num_responses (int): total number of responses that would be collected.
+    - prop_majority (float): proportion of responses that must match.
+
+    Output:
+    - num_responses_wave (int): number of responses to request.
+    """
+    # Count the most common response so far
+    response_count = {}
+    for response in responses:
+        response_clean = clean_response_string(response)
+        response_count[response_clean] = response_count.get(response_clean, 0) + 1
+    leading_count = max(response_count.values(), default=0)
+
+    # Responses still needed, without going over the total number of responses
+    num_responses_wave = max(get_min_count_majority(num_responses, prop_majority) - leading_count, 1)
+
+    return min(num_responses_wave, num_responses - len(responses))
+
+def get_response_full_process_early_stopping(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request=False):
+    """
+    Function to get the majority response from an OpenAI model, stopping as soon as the majority is decided.
+
+    Responses are requested in waves, each one as big as the number of responses the leading response still needs.
+    The result is the same as get_response_full_process without early stopping.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - num_retries (int): number of retries to get a correct response.
+    - num_responses (int): maximum number of responses to get.
+    - prop_majority (float): proportion of responses that must match.
+    - single_request (bool): whether to get the responses of each wave in a single request (using the n parameter).
+
+    Output:
+    - majority_response (str): string with the majority response.
+    - num_responses_used (int): number of responses actually obtained.
+    """
+    # Check if the number of responses is an integer
+    if not isinstance(num_responses, int):
+        raise TypeError("The number of responses must be an integer.")
+    
+    # Check if the number of responses is positive
+    if num_responses < 1:
+        raise ValueError("The number of responses must be a positive integer.")
+    
+    # Check if the input proportion is a number
+    if not isinstance(prop_majority, (int, float)):
+        raise TypeError("The proportion must be a number.")
+    
+    # Check if the input proportion is between 0 and 1
+    if prop_majority < 0 or prop_majority > 1:
+        raise ValueError("The proportion must be between 0 and 1.")
+    
+    # Initialize list to store responses
+    responses = []
+
+    # Get responses until the majority is decided or we have all of them
+    while len(responses) < num_responses:
+
+        # Check if the majority is decided
+        decided, majority_response = check_majority_decided(responses, num_responses, prop_majority)
+        if decided:
+            return majority_response, len(responses)
+        
+        # Get the next wave of responses
+        num_responses_wave = get_num_responses_next_wave(responses, num_responses, prop_majority)
+        responses += get_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses_wave, single_request, len(responses))
+
+    return get_majority_response(responses, prop_majority), len(responses)
+
+######################################### ASYNC FUNCTIONS #########################################
+# Counterparts of the functions above using AsyncAzureOpenAI, so that the responses for one text and the
+# responses for many texts can be requested concurrently. The number of requests in flight is bounded by
+# max_concurrent_requests.
+
+def set_max_concurrent_requests(num_requests):
+    """
+    Function to set the maximum number of requests in flight at the same time when using the async functions.
+
+    Input:
+    - num_requests (int): maximum number of requests in flight.
+
+    Output: None
+    """
+    global max_concurrent_requests
+
+    # Check if the number of requests is an integer
+    if not isinstance(num_requests, int):
+        raise TypeError("The number of requests must be an integer.")
+    
+    # Check if the number of requests is positive
+    if num_requests < 1:
+        raise ValueError("The number of requests must be a positive integer.")
+    
+    max_concurrent_requests = num_requests
+
+    # Drop the existing semaphores so that the new limit is used from now on
+    semaphores.clear()
+
+def get_async_client():
+    """
+    Function to get the async client for the running event loop.
+
+    Output:
+    - async_client (AsyncAzureOpenAI): async client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+
+    # Create the client the first time it's used in this event loop
+    if loop not in async_clients:
+        async_clients[loop] = AsyncAzureOpenAI(azure_endpoint=azure_endpoint, api_key=azure_key, api_version=api_version)
+
+    return async_clients[loop]
+
+def get_semaphore():
+    """
+    Function to get the semaphore bounding the requests in flight for the running event loop.
+
+    Output:
+    - semaphore (asyncio.Semaphore): semaphore for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+
+    # Create the semaphore the first time it's used in this event loop
+    if loop not in semaphores:
+        semaphores[loop] = asyncio.Semaphore(max_concurrent_requests)
+
+    return semaphores[loop]
+
+async def aget_model_response(user_message, num_retries_failure, sample_index=0):
+    """
+    Async version of get_model_response.
+
+    Input:
+    - message (str): string with the message to send to the model.
+    - num_retries (int): number of retries allowed if there's a problem getting the response.
+    - sample_index (int or str): index of the response for the same message (used for the cache).
+
+    Output:
+    - response_content (str): string with the response from the model or FailedResponse if there was none.
+    """
+    # Check if the input message is a string
+    if not isinstance(user_message, str):
+        raise TypeError("The input message must be a string.")
+    
+    # Check if the number of retries is an integer
+    if not isinstance(num_retries_failure, int):
+        raise TypeError("The number of retries must be an integer.")
+    
+    # Check if the number of retries is positive
+    if num_retries_failure < 0:
+        raise ValueError("The number of retries must be a positive integer.")
+    
+    # Get the response from the cache if it's there
+    key = get_cache_key(deployment_name, api_version, get_cache_system_message(user_message), user_message, sample_index)
+    response_content = get_cached_response(key)
+    if response_content is not None:
+        add_count("cache_hits")
+        return response_content
+    
+    # When replaying, the response must be in the cache
+    if check_replay_mode():
+        raise LookupError("The response is not in the cache and the cache is in replay mode.")
+    
+    # In case there are no attempts
+    failed_response = FailedResponse("no_attempts", "No attempts allowed.", None, False)
+        
+    # Iterate over the number of retries
+    for i in range(num_retries_failure):
+
+        try:
+    
+            # Get response
+            response = await acreate_chat_completion(user_message)
+
+            # Get the response content (FailedResponse if there's none, not saved in the cache)
+            response_content = get_choice_content(response.choices[0])
+
+            # Save the response in the cache
+            if not check_failed_response(response_content):
+                save_cached_response(key, response_content)
+
+            return response_content
+        
+        except Exception as e:
+
+            # Wait before retrying (unless retrying won't help)
+            failed_response = await ahandle_error(e, i, num_retries_failure)
+            if not failed_response.retryable:
+                break
+
+    return failed_response
+
+async def aget_model_response_with_text(prompt, text, num_retries_failure, sample_index=0):
+    """
+    Async version of get_model_response_with_text.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - sample_index (int or str): index of the response for the same prompt and text (used for the cache).
+
+    Output:
+    - response_content (str): string with the response from the model.
+    """
+    # Check if the input prompt is a string
+    if not isinstance(prompt, str):
+        raise TypeError("The input prompt must be a string.")
+    
+    # Check if the input text is a string
+    if not isinstance(text, str):
+        raise TypeError("The input text must be a string.")
+    
+    return await aget_model_response(prompt + "\n\n" + text, num_retries_failure, sample_index)
+
+async def aget_response_checking_format(prompt, text, num_retries_failure, num_retries_format, sample_index=0):
+    """
+    Async version of get_response_checking_format.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - num_retries (int): number of retries to get a correct response.
+    - sample_index (int): index of the response for the same prompt and text (used for the cache).
+
+    Output:
+    - response_content (str): string with the response from the model.
+    """
+    # Check if the number of retries is an integer
+    if not isinstance(num_retries_format, int):
+        raise TypeError("The number of retries must be an integer.")
+    
+    # Check if the number of retries is positive
+    if num_retries_format < 0:
+        raise ValueError("The number of retries must be a positive integer.")
+    
+    # Iterate over the number of retries
+    for i in range(num_retries_format):
+
+        # The previous response wasn't in the correct format
+        if i > 0:
+            add_count("format_retries")
+
+        # Get response (each retry is a different entry in the cache)
+        response = await aget_model_response_with_text(prompt, text, num_retries_failure, get_sample_index_retry(sample_index, i))
+
+        # The model couldn't give a response: give up (asking again won't help)
+        if check_failed_response(response):
+            break
+        
+        # Check if there's an answer in the response
+        relevant_part = parse_response(response)
+        if relevant_part is not None:
+            return relevant_part
+        
+    return "problem_with_response"
+
+async def aget_model_responses(user_message, num_retries_failure, num_choices, sample_indexes=None):
+    """
+    Async version of get_model_responses.
+
+    Inputs:
+    - user_message (str): string with the message to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the responses.
+    - num_choices (int): number of responses to get.
+    - sample_indexes (list): index of each response for the same message (used for the cache). By default, 0, 1, 2...
+
+    Output:
+    - responses_content (list): list with the responses from the model (FailedResponse for the ones that couldn't be obtained).
+    """
+    global n_parameter_supported
+
+    # Check if the number of choices is an integer
+    if not isinstance(num_choices, int):
+        raise TypeError("The number of choices must be an integer.")
+    
+    # Default indexes for the cache
+    if sample_indexes is None:
+        sample_indexes = list(range(num_choices))
+    
+    # Check that there's one index per response
+    if len(sample_indexes) != num_choices:
+        raise ValueError("There must be one sample index per response.")
+    
+    # If the deployment doesn't accept the n parameter (or there's only one response to get), one request per response
+    if not n_parameter_supported or num_choices <= 1:
+        return list(await asyncio.gather(*[aget_model_response(user_message, num_retries_failure, sample_index) for sample_index in sample_indexes]))
+    
+    # Get the responses from the cache if they're there
+    cache_system_message = get_cache_system_message(user_message)
+    keys = [get_cache_key(deployment_name, api_version, cache_system_message, user_message, sample_index) for sample_index in sample_indexes]
+    responses_content = [get_cached_response(key) for key in keys]
+    missing = [j for j, response_content in enumerate(responses_content) if response_content is None]
+    add_count("cache_hits", len(responses_content) - len(missing))
+    if not missing:
+        return responses_content
+    
+    # When replaying, the responses must be in the cache
+    if check_replay_mode():
+        raise LookupError("The responses are not in the cache and the cache is in replay mode.")
+    
+    # In case there are no attempts
+    failed_response = FailedResponse("no_attempts", "No attempts allowed.", None, False)
+
+    # Iterate over the number of retries
+    for i in range(num_retries_failure):
+
+        try:
+
+            # Get the responses that are not in the cache
+            response = await acreate_chat_completion(user_message, len(missing))
+
+            # Get the content of each response and save it in the cache
+            for j, choice in zip(missing, response.choices):
+                responses_content[j] = get_choice_content(choice)
+                if not check_failed_response(responses_content[j]):
+                    save_cached_response(keys[j], responses_content[j])
+
+            return responses_content
+        
+        except BadRequestError as e:
+
+            # If the deployment rejected the n parameter, don't use it anymore
+            if check_n_parameter_rejected(e):
+                print("The deployment doesn't accept the n parameter. Getting the responses one by one.")
+                n_parameter_supported = False
+                return list(await asyncio.gather(*[aget_model_response(user_message, num_retries_failure, sample_index) for sample_index in sample_indexes]))
+
+            # Wait before retrying (unless retrying won't help)
+            failed_response = await ahandle_error(e, i, num_retries_failure)
+            if not failed_response.retryable:
+                break
+        
+        except Exception as e:
+
+            # Wait before retrying (unless retrying won't help)
+            failed_response = await ahandle_error(e, i, num_retries_failure)
+            if not failed_response.retryable:
+                break
+
+    # The responses we couldn't get
+    return [response_content if response_content is not None else failed_response for response_content in responses_content]
+
+async def aget_multiple_responses_single_request(prompt, text, num_retries_failure, num_retries_format, num_responses, first_sample_index=0):
+    """
+    Async version of get_multiple_responses_single_request.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the responses.
+    - num_retries_format (int): number of retries to get correct responses.
+    - num_responses (int): number of responses to get.
+    - first_sample_index (int): index of the first response (used for the cache).
+
+    Output:
+    - responses (list): list with the responses from the model.
+    """
+    # Initialize list to store responses (None means that we still need a correct response)
+    responses = [None] * num_responses
+
+    # Iterate over the number of retries
+    for i in range(num_retries_format):
+
+        # Positions of the responses that we still need
+        missing = [j for j, response in enumerate(responses) if response is None]
+        if not missing:
+            break
+
+        # The previous responses in these positions weren't in the correct format
+        if i > 0:
+            add_count("format_retries", len(missing))
+
+        # Get responses for the positions that we still need (same indexes in the cache as get_response_checking_format)
+        sample_indexes = [get_sample_index_retry(first_sample_index + j, i) for j in missing]
+        new_responses = await aget_model_responses(prompt + "\n\n" + text, num_retries_failure, len(missing), sample_indexes)
+
+        # Keep the responses in the correct format
+        for j, relevant_part in zip(missing, get_relevant_parts_responses(new_responses)):
+            responses[j] = relevant_part
+
+        # The model couldn't give responses: give up (asking again won't help)
+        if any(check_failed_response(response) for response in new_responses):
+            break
+
+    # Responses that never came in the correct format
+    return [response if response is not None else "problem_with_response" for response in responses]
+
+async def aget_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses, single_request=False, first_sample_index=0):
+    """
+    Async version of get_multiple_responses. All the responses are requested concurrently.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries (int): number of retries to get a correct response.
+    - num_responses (int): number of responses to get.
+    - single_request (bool): whether to get all the responses in a single request (using the n parameter).
+    - first_sample_index (int): index of the first response (used for the cache when getting responses in several calls).
+
+    Output:
+    - responses (list): list with the responses from the model.
+    """
+    # Check if the number of responses is an integer
+    if not isinstance(num_responses, int):
+        raise TypeError("The number of responses must be an integer.")
+    
+    # Check if the number of responses is positive
+    if num_responses < 0:
+        raise ValueError("The number of responses must be a positive integer.")
+    
+    # Responses used for voting
+    add_count("samples", num_responses)
 
-        # Get response
-        response = get_response_checking_format(prompt, text, num_retries_failure, num_retries_format)
-        
-        # Append response to list of responses
-        responses.append(response)
-
-        # Sleep
-        sleep(sleep_time)
+    # Get all responses in a single request
+    if single_request:
+        return await aget_multiple_responses_single_request(prompt, text, num_retries_failure, num_retries_format, num_responses, first_sample_index)
+    
+    # Get all responses at once (the semaphore limits how many are in flight)
+    responses = await asyncio.gather(*[
+        aget_response_checking_format(prompt, text, num_retries_failure, num_retries_format, first_sample_index + i)
+        for i in range(num_responses)
+        ])
 
-    return responses
+    return list(responses)
 
-def get_majority_response(responses, prop_majority):
+async def aget_response_full_process(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request=False, early_stopping=False):
     """
-    Function to get the majority response from a list of responses.
+    Async version of get_response_full_process.
 
     Inputs:
-    - responses (list): list with the responses to check.
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - num_retries (int): number of retries to get a correct response.
+    - num_responses (int): number of responses to get.
     - prop_majority (float): proportion of responses that must match.
+    - single_request (bool): whether to get all the responses in a single request (using the n parameter).
+    - early_stopping (bool): whether to stop getting responses as soon as the majority is decided.
 
     Output:
-    - majority_response (str): string with the majority response.
+    - response_content (str): string with the response from the model.
     """
-    # Check if the input responses is a list
-    if not isinstance(responses, list):
-        raise TypeError("Responses must be a list.")
-    
     # Check if the input proportion is a number
     if not isinstance(prop_majority, (int, float)):
         raise TypeError("The proportion must be a number.")
@@ -295,112 +1924,109 @@ def get_majority_response(responses, prop_majority):
     if prop_majority < 0 or prop_majority > 1:
         raise ValueError("The proportion must be between 0 and 1.")
     
-    # Initialize dictionary to store the count of each response
-    response_count = {}
-
-    # Iterate over the responses
-    for response in responses:
-
-        # Clean response
-        response_clean = clean_response_string(response)
-
-        # Check if the cleaned response is in the dictionary
-        if response_clean in response_count:
-            response_count[response_clean] += 1
-        else:
-            response_count[response_clean] = 1
-
-    # Get the response with the highest count
-    majority_response = max(response_count, key=response_count.get)
+    # Stop getting responses as soon as the majority is decided
+    if early_stopping:
+        return (await aget_response_full_process_early_stopping(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request))[0]
+    
+    # Get multiple responses
+    responses = await aget_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses, single_request)
+    
+    # Get majority response
+    majority_response = get_majority_response(responses, prop_majority)
 
-    # Check if the proportion of the majority response is greater than the input proportion
-    if response_count[majority_response] / len(responses) >= prop_majority:
-        return majority_response
+    return majority_response
 
-def clean_response_string(response):
+async def aget_response_full_process_early_stopping(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request=False):
     """
-    Function to clean a response string.
+    Async version of get_response_full_process_early_stopping. The responses of each wave are requested concurrently.
 
     Inputs:
-    - response (str): string with the response to clean.
+    - prompt (str): string with the prompt to send to the model.
+    - text (str): string with the text to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - num_retries (int): number of retries to get a correct response.
+    - num_responses (int): maximum number of responses to get.
+    - prop_majority (float): proportion of responses that must match.
+    - single_request (bool): whether to get the responses of each wave in a single request (using the n parameter).
 
     Output:
-    - response (str): string with the cleaned response.
+    - majority_response (str): string with the majority response.
+    - num_responses_used (int): number of responses actually obtained.
     """
-    # Check if the input is a string
-    if not isinstance(response, str):
-        raise TypeError("Response must be a string.")
+    # Check if the number of responses is an integer
+    if not isinstance(num_responses, int):
+        raise TypeError("The number of responses must be an integer.")
     
-    # Remove leading and trailing whitespaces
-    response = response.strip()
+    # Check if the number of responses is positive
+    if num_responses < 1:
+        raise ValueError("The number of responses must be a positive integer.")
+    
+    # Initialize list to store responses
+    responses = []
 
-    # Lowercase 
-    response = response.lower()
+    # Get responses until the majority is decided or we have all of them
+    while len(responses) < num_responses:
 
-    return response
+        # Check if the majority is decided
+        decided, majority_response = check_majority_decided(responses, num_responses, prop_majority)
+        if decided:
+            return majority_response, len(responses)
+        
+        # Get the next wave of responses
+        num_responses_wave = get_num_responses_next_wave(responses, num_responses, prop_majority)
+        responses += await aget_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses_wave, single_request, len(responses))
 
-def get_response_full_process(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority):
+    return get_majority_response(responses, prop_majority), len(responses)
+
+async def aget_response_full_process_many(prompt, texts, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request=False, early_stopping=False):
     """
-    Function to get a response from an OpenAI model and check if the response is correct.
+    Function to run aget_response_full_process concurrently for many texts.
 
     Inputs:
     - prompt (str): string with the prompt to send to the model.
-    - text (str): string with the text to send to the model.
+    - texts (list): list with the texts to send to the model.
     - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
     - num_retries (int): number of retries to get a correct response.
     - num_responses (int): number of responses to get.
     - prop_majority (float): proportion of responses that must match.
+    - single_request (bool): whether to get all the responses for a text in a single request (using the n parameter).
+    - early_stopping (bool): whether to stop getting responses for a text as soon as the majority is decided.
 
     Output:
-    - response_content (str): string with the response from the model.
+    - responses (list): list with the majority response for each text (in the same order as texts).
     """
-    # Check if the input prompt is a string
-    if not isinstance(prompt, str):
-        raise TypeError("The input prompt must be a string.")
+    # Check if the input texts is a list
+    if not isinstance(texts, list):
+        raise TypeError("Texts must be a list.")
     
-    # Check if the input text is a string
-    if not isinstance(text, str):
-        raise TypeError("The input text must be a string.")
+    # Get the responses for all texts at once (the semaphore limits how many requests are in flight)
+    responses = await asyncio.gather(*[
+        aget_response_full_process(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request, early_stopping)
+        for text in texts
+        ])
 
-    # Check if the number of retries is an integer
-    if not isinstance(num_retries_failure, int):
-        raise TypeError("The number of retries must be an integer.")
-    
-    # Check if the number of retries is positive
-    if num_retries_failure < 0:
-        raise ValueError("The number of retries must be a positive integer.")
-    
-    # Check if the number of retries is an integer
-    if not isinstance(num_retries_format, int):
-        raise TypeError("The number of retries must be an integer.")
-    
-    # Check if the number of retries is positive
-    if num_retries_format < 0:
-        raise ValueError("The number of retries must be a positive integer.")
-    
-    # Check if the number of responses is an integer
-    if not isinstance(num_responses, int):
-        raise TypeError("The number of responses must be an integer.")
-    
-    # Check if the number of responses is positive
-    if num_responses < 0:
-        raise ValueError("The number of responses must be a positive integer.")
-    
-    # Check if the input proportion is a number
-    if not isinstance(prop_majority, (int, float)):
-        raise TypeError("The proportion must be a number.")
-    
-    # Check if the input proportion is between 0 and 1
-    if prop_majority < 0 or prop_majority > 1:
-        raise ValueError("The proportion must be between 0 and 1.")
-    
-    # Get multiple responses
-    responses = get_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses)
-    
-    # Get majority response
-    majority_response = get_majority_response(responses, prop_majority)
+    return list(responses)
 
-    return majority_response
+def get_response_full_process_many(prompt, texts, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request=False, early_stopping=False):
+    """
+    Function to get the majority response for many texts, sending the requests concurrently.
+
+    This is the function to call from regular (not async) code.
+
+    Inputs:
+    - prompt (str): string with the prompt to send to the model.
+    - texts (list): list with the texts to send to the model.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the response.
+    - num_retries (int): number of retries to get a correct response.
+    - num_responses (int): number of responses to get.
+    - prop_majority (float): proportion of responses that must match.
+    - single_request (bool): whether to get all the responses for a text in a single request (using the n parameter).
+    - early_stopping (bool): whether to stop getting responses for a text as soon as the majority is decided.
+
+    Output:
+    - responses (list): list with the majority response for each text (in the same order as texts).
+    """
+    return asyncio.run(aget_response_full_process_many(prompt, texts, num_retries_failure, num_retries_format, num_responses, prop_majority, single_request, early_stopping))
 
 if __name__ == "__main__":
     print("Module with functions to interact with Azure services running as main.")
@@ -453,6 +2079,151 @@ if __name__ == "__main__":
     print(get_majority_response(responses, prop_majority))
     assert get_majority_response(responses, prop_majority) == "hello"
 
+    ##################################################################################
+    print("Tests for classify_error function:")
+
+    # Minimal stand-ins for the HTTP response and request of the errors
+    from types import SimpleNamespace
+    def get_http_response(status_code):
+        return SimpleNamespace(status_code=status_code, headers={}, request=None)
+
+    print("Test 1")
+    error = BadRequestError("Content filtered", response=get_http_response(400), body={"code": "content_filter"})
+    print(classify_error(error))
+    assert classify_error(error).error_type == "content_filter" and classify_error(error).retryable == False
+
+    print("Test 2")
+    error = RateLimitError("Too many requests", response=get_http_response(429), body=None)
+    print(classify_error(error))
+    assert classify_error(error).error_type == "rate_limit" and classify_error(error).retryable == True
+
+    print("Test 3")
+    error = APIStatusError("Server error", response=get_http_response(503), body=None)
+    print(classify_error(error))
+    assert classify_error(error).error_type == "server" and classify_error(error).retryable == True
+
+    print("Test 4")
+    error = APIConnectionError(request=None)
+    print(classify_error(error))
+    assert classify_error(error).error_type == "connection" and classify_error(error).retryable == True
+
+    ##################################################################################
+    print("Tests for get_backoff_time function:")
+
+    print("Test 1")
+    print(get_backoff_time(0))
+    assert 0 <= get_backoff_time(0) <= backoff_base_time
+
+    print("Test 2")
+    print(get_backoff_time(100))
+    assert 0 <= get_backoff_time(100) <= backoff_max_time
+
+    ##################################################################################
+    print("Tests for get_retry_after function:")
+
+    print("Test 1")
+    print(get_retry_after({"retry-after": "3"}))
+    assert get_retry_after({"retry-after": "3"}) == 3
+
+    print("Test 2")
+    print(get_retry_after({"retry-after-ms": "1500", "retry-after": "2"}))
+    assert get_retry_after({"retry-after-ms": "1500", "retry-after": "2"}) == 1.5
+
+    print("Test 3")
+    print(get_retry_after({}))
+    assert get_retry_after({}) == None
+
+    ##################################################################################
+    print("Tests for estimate_tokens function:")
+
+    print("Test 1")
+    print(estimate_tokens("a" * 400))
+    assert estimate_tokens("a" * 400) == (len(get_system_message()) + 400) // 4 + estimated_tokens_response
+
+    ##################################################################################
+    print("Tests for reserve_rate_limit function:")
+
+    print("Test 1")
+    set_rate_limit(2, 1000)
+    print(reserve_rate_limit(100), reserve_rate_limit(100))
+    wait_time = reserve_rate_limit(100)
+    print(wait_time)
+    assert 0 < wait_time <= 30
+
+    print("Test 2")
+    set_rate_limit(60, 80000)
+    rate_limit_state["requests"], rate_limit_state["tokens"] = 60.0, 80000.0
+    print(reserve_rate_limit(100))
+    assert reserve_rate_limit(100) == 0
+
+    ##################################################################################
+    print("Tests for update_rate_limit_from_headers function:")
+
+    print("Test 1")
+    update_rate_limit_from_headers({"x-ratelimit-remaining-requests": "5", "x-ratelimit-remaining-tokens": "1000"})
+    print(rate_limit_state)
+    assert rate_limit_state["requests"] <= 5 and rate_limit_state["tokens"] <= 1000
+
+    print("Test 2")
+    update_rate_limit_from_headers({"retry-after": "3"})
+    print(reserve_rate_limit(100))
+    assert reserve_rate_limit(100) > 2
+    rate_limit_state["blocked_until"] = 0.0
+
+    ##################################################################################
+    print("Tests for get_min_count_majority function:")
+
+    print("Test 1")
+    print(get_min_count_majority(10, 0.5))
+    assert get_min_count_majority(10, 0.5) == 5
+
+    print("Test 2")
+    print(get_min_count_majority(10, 0.7))
+    assert get_min_count_majority(10, 0.7) == 7
+
+    ##################################################################################
+    print("Tests for check_majority_decided function:")
+
+    print("Test 1")
+    responses = ["42"] * 6
+    print(check_majority_decided(responses, 10, 0.5))
+    assert check_majority_decided(responses, 10, 0.5) == (True, "42")
+
+    print("Test 2")
+    responses = ["42"] * 5
+    print(check_majority_decided(responses, 10, 0.5))
+    assert check_majority_decided(responses, 10, 0.5) == (True, "42")
+
+    print("Test 3")
+    responses = ["43", "42", "42", "42", "42", "42"]
+    print(check_majority_decided(responses, 10, 0.5))
+    assert check_majority_decided(responses, 10, 0.5) == (False, None)
+
+    print("Test 4")
+    responses = ["42", "43", "44", "45", "46", "47", "48"]
+    print(check_majority_decided(responses, 10, 0.5))
+    assert check_majority_decided(responses, 10, 0.5) == (True, None)
+
+    print("Test 5")
+    responses = ["42", "43"]
+    print(check_majority_decided(responses, 10, 0.5))
+    assert check_majority_decided(responses, 10, 0.5) == (False, None)
+
+    ##################################################################################
+    print("Tests for get_num_responses_next_wave function:")
+
+    print("Test 1")
+    print(get_num_responses_next_wave([], 10, 0.5))
+    assert get_num_responses_next_wave([], 10, 0.5) == 5
+
+    print("Test 2")
+    print(get_num_responses_next_wave(["42", "42", "42", "43"], 10, 0.5))
+    assert get_num_responses_next_wave(["42", "42", "42", "43"], 10, 0.5) == 2
+
+    print("Test 3")
+    print(get_num_responses_next_wave(["42"] * 5 + ["43"] * 4, 10, 0.5))
+    assert get_num_responses_next_wave(["42"] * 5 + ["43"] * 4, 10, 0.5) == 1
+
     ##################################################################################
     # print("Tests for get_model_response function:")
 
@@ -488,6 +2259,109 @@ if __name__ == "__main__":
     print(get_relevant_part_response(response))
     assert get_relevant_part_response(response) == "42"
 
+    print("Test 4")
+    response = "Reasoning: The posting asks for a doctorate. My answer is: Ph.D."
+    print(get_relevant_part_response(response))
+    assert get_relevant_part_response(response) == "Ph.D."
+
+    ##################################################################################
+    print("Tests for get_answer_part function:")
+
+    print("Test 1")
+    print(get_answer_part('my answer is:{"a": 1}'))
+    assert get_answer_part('my answer is:{"a": 1}') == '{"a": 1}'
+    assert get_answer_part("Reasoning: It says so.") == None
+
+    ##################################################################################
+    print("Tests for parse_response function:")
+
+    print("Test 1")
+    response = "Reasoning: It says so. My answer is: St. Louis, MO."
+    print(parse_response(response))
+    assert parse_response(response) == "St. Louis, MO"
+
+    print("Test 2")
+    response = "Reasoning: It says so. My answer is: bachelor. The posting mentions a bachelor's degree."
+    print(parse_response(response))
+    assert parse_response(response) == "bachelor"
+
+    print("Test 3")
+    response = "The posting says so.\n\nMy answer is:\n\"Washington, D.C.\""
+    print(parse_response(response))
+    assert parse_response(response) == "Washington, D.C."
+
+    print("Test 4")
+    response = '{"reasoning": "It says so.", "answer": "St. Louis, MO"}'
+    print(parse_response(response))
+    assert parse_response(response) == "St. Louis, MO"
+
+    print("Test 5")
+    response = "Reasoning: I don't know."
+    print(parse_response(response))
+    assert parse_response(response) == None
+
+    print("Test 6")
+    response = '{"reasoning": "It says so."'
+    print(parse_response(response))
+    assert parse_response(response) == None
+
+    ##################################################################################
+    print("Tests for get_client and warm_up functions:")
+
+    print("Test 1")
+    client_before = client
+    warm_up()
+    print(client)
+    assert client is not None and get_client() is client
+    assert client_before is None or client_before is client
+    assert system_message == get_system_message() and system_message_json == get_system_message_json()
+
+    ##################################################################################
+    print("Tests for get_request_format and get_cache_system_message functions:")
+
+    print("Test 1")
+    print(get_request_format("prompt\n\ntext"))
+    assert get_request_format("prompt\n\ntext") == (get_system_message(), None)
+    assert get_cache_system_message("prompt\n\ntext") == get_system_message()
+
+    print("Test 2")
+    set_response_format("json_schema")
+    set_answer_schema("prompt", {"type": "string", "enum": ["yes", "no", "missing"]})
+    system, response_format = get_request_format("prompt\n\ntext")
+    print(response_format)
+    assert system == get_system_message_json()
+    assert response_format["json_schema"]["schema"]["properties"]["answer"]["enum"] == ["yes", "no", "missing"]
+    assert get_request_format("other prompt\n\ntext")[1]["json_schema"]["schema"]["properties"]["answer"] == {"type": "string"}
+    assert get_cache_system_message("prompt\n\ntext") != get_cache_system_message("other prompt\n\ntext")
+
+    print("Test 3")
+    set_response_format("json_object")
+    print(get_request_format("prompt\n\ntext"))
+    assert get_request_format("prompt\n\ntext") == (get_system_message_json(), {"type": "json_object"})
+    set_response_format("text")
+    answer_schemas.clear()
+
+    ##################################################################################
+    print("Tests for get_relevant_parts_responses function:")
+
+    print("Test 1")
+    responses = ["Reasoning: My answer is: 42.", "42", None, "Reasoning: My answer is: 43"]
+    print(get_relevant_parts_responses(responses))
+    assert get_relevant_parts_responses(responses) == ["42", None, None, "43"]
+
+    ##################################################################################
+    print("Tests for check_n_parameter_rejected function:")
+
+    print("Test 1")
+    error = Exception("Error code: 400 - {'error': {'message': \"Unrecognized request argument supplied: 'n'\"}}")
+    print(check_n_parameter_rejected(error))
+    assert check_n_parameter_rejected(error) == True
+
+    print("Test 2")
+    error = Exception("Error code: 400 - {'error': {'code': 'content_filter'}}")
+    print(check_n_parameter_rejected(error))
+    assert check_n_parameter_rejected(error) == False
+
     ##################################################################################
     # print("Tests for get_response_checking_format function:")
 
@@ -509,6 +2383,9 @@ if __name__ == "__main__":
     # num_responses = 5
     # assert [response.lower() for response in get_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses)] == ["paris"] * num_responses
 
+    # print("Test 2")
+    # assert [response.lower() for response in get_multiple_responses(prompt, text, num_retries_failure, num_retries_format, num_responses, single_request=True)] == ["paris"] * num_responses
+
     ##################################################################################
     # print("Tests for get_response_full_process function:")
 
@@ -520,6 +2397,32 @@ if __name__ == "__main__":
     # num_responses = 5
     # prop_majority = 0.5
     # assert get_response_full_process(prompt, text, num_retries_failure, num_retries_format, num_responses, prop_majority) == "paris"
+
+    # print("Test 2")
+    # assert get_response_full_process_early_stopping(prompt, text, num_retries_failure, num_retries_format, 10, prop_majority) == ("paris", 5)
+
+    ##################################################################################
+    print("Tests for set_max_concurrent_requests function:")
+
+    print("Test 1")
+    set_max_concurrent_requests(3)
+    print(max_concurrent_requests)
+    assert max_concurrent_requests == 3
+    set_max_concurrent_requests(10)
+
+    print("Test 2")
+    async def get_semaphore_value():
+        return get_semaphore()._value
+    print(asyncio.run(get_semaphore_value()))
+    assert asyncio.run(get_semaphore_value()) == 10
+
+    ##################################################################################
+    # print("Tests for get_response_full_process_many function:")
+
+    # print("Test 1")
+    # prompt = "What is the capital of this country?"
+    # texts = ["France", "Germany"]
+    # assert get_response_full_process_many(prompt, texts, 2, 2, 5, 0.5) == ["paris", "berlin"]
     
     ##################################################################################
     print("All tests passed.")
\ No newline at end of file
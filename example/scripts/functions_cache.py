@@ -0,0 +1,342 @@
+# Script with functions to cache the responses from the model on disk
+# Emilio Lehoucq
+
+######################################### IMPORTING LIBRARIES #########################################
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+######################################### PATHS #########################################
+if os.environ.get("PIPELINE_RUN", "0") == "1":
+    path_cache_folder = "../cache/"
+else:
+    path_cache_folder = "cache/"
+path_cache = "llm_responses.sqlite"
+
+######################################### PARAMETERS #########################################
+# Mode of the cache:
+# - "read_write": use the responses in the cache and save the new ones
+# - "replay": only use the responses in the cache (never save, never call the model)
+# - "off": don't use the cache
+cache_modes = ["read_write", "replay", "off"]
+cache_mode = os.environ.get("LLM_CACHE_MODE", "read_write")
+
+# Size limits of the cache (the least recently used responses are removed first)
+cache_max_entries = 1000000
+cache_max_size_mb = 2000
+
+# Check the size limits every this many new responses
+num_saves_between_evictions = 1000
+
+# Write when the responses were last used every this many uses (they're kept in memory until then, so reading
+# from the cache doesn't write to the database every time)
+num_uses_between_writes = 1000
+
+# Connection to the database (opened the first time it's needed) and lock to use it from several threads
+connection = None
+lock = threading.Lock()
+num_saves_since_eviction = 0
+
+# When the responses read from the cache were last used, not written to the database yet (key: time)
+pending_last_used = {}
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def set_cache_mode(mode):
+    """
+    Function to set the mode of the cache.
+
+    Input:
+    - mode (str): "read_write", "replay" or "off".
+
+    Output: None
+    """
+    global cache_mode
+
+    # Check that the mode is valid
+    if mode not in cache_modes:
+        raise ValueError(f"The mode must be one of {cache_modes}.")
+
+    cache_mode = mode
+
+def check_replay_mode():
+    """
+    Function to check if the cache is in replay mode (only responses from the cache, no calls to the model).
+
+    Output:
+    - bool: True if the cache is in replay mode, False otherwise.
+    """
+    return cache_mode == "replay"
+
+def get_cache_key(deployment_name, api_version, system_message, user_message, sample_index):
+    """
+    Function to get the key of a response in the cache.
+
+    The key is a hash of everything that determines the response, so changing the prompt, the model or the text
+    gives a different key. The sample index distinguishes the different responses for the same message.
+
+    Inputs:
+    - deployment_name (str): name of the deployment.
+    - api_version (str): version of the API.
+    - system_message (str): system message.
+    - user_message (str): message sent to the model.
+    - sample_index (int or str): index of the response for the same message.
+
+    Output:
+    - key (str): key of the response in the cache.
+    """
+    # Check that the messages are strings
+    if not isinstance(system_message, str) or not isinstance(user_message, str):
+        raise TypeError("The messages must be strings.")
+
+    # Serialize everything in a fixed order
+    content = json.dumps([deployment_name, api_version, system_message, user_message, str(sample_index)])
+
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def get_connection():
+    """
+    Function to get the connection to the database of the cache, creating it if needed.
+
+    Output:
+    - connection (sqlite3.Connection): connection to the database.
+    """
+    global connection
+
+    if connection is None:
+
+        # Create the folder if needed
+        os.makedirs(path_cache_folder, exist_ok=True)
+
+        # Open the database (the lock takes care of the access from several threads)
+        connection = sqlite3.connect(path_cache_folder + path_cache, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, size INTEGER, last_used REAL)"
+            )
+        connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        connection.commit()
+
+    return connection
+
+def get_cached_response(key):
+    """
+    Function to get a response from the cache.
+
+    Input:
+    - key (str): key of the response (see get_cache_key).
+
+    Output:
+    - response (str): response from the cache or None if it's not there.
+    """
+    # Don't use the cache if it's off
+    if cache_mode == "off":
+        return None
+
+    with lock:
+        connection = get_connection()
+        row = connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+
+        # Not in the cache
+        if row is None:
+            return None
+
+        # Keep track of when the response was last used (for eviction), but not when replaying
+        if cache_mode == "read_write":
+            pending_last_used[key] = time.time()
+            if len(pending_last_used) >= num_uses_between_writes:
+                write_last_used(connection)
+
+    return row[0]
+
+def write_last_used(connection):
+    """
+    Function to write when the responses were last used (see pending_last_used) to the database, all at once.
+
+    Input:
+    - connection (sqlite3.Connection): connection to the database (the caller holds the lock).
+
+    Output: None
+    """
+    if not pending_last_used:
+        return
+    connection.executemany("UPDATE responses SET last_used = ? WHERE key = ?", [(last_used, key) for key, last_used in pending_last_used.items()])
+    connection.commit()
+    pending_last_used.clear()
+
+def flush_last_used():
+    """
+    Function to write when the responses were last used to the database (called at exit, so they aren't lost).
+
+    Output: None
+    """
+    with lock:
+        if connection is not None:
+            write_last_used(connection)
+
+def save_cached_response(key, response):
+    """
+    Function to save a response in the cache.
+
+    Inputs:
+    - key (str): key of the response (see get_cache_key).
+    - response (str): response from the model.
+
+    Output: None
+    """
+    global num_saves_since_eviction
+
+    # Only save when reading and writing
+    if cache_mode != "read_write":
+        return
+
+    # Only save actual responses
+    if not isinstance(response, str):
+        return
+
+    with lock:
+        connection = get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, response, len(response.encode("utf-8")), time.time())
+            )
+        connection.commit()
+
+        # Check the size limits from time to time
+        num_saves_since_eviction += 1
+        if num_saves_since_eviction >= num_saves_between_evictions:
+            num_saves_since_eviction = 0
+            evict_cached_responses(connection)
+
+def evict_cached_responses(connection):
+    """
+    Function to remove the least recently used responses until the cache is within the size limits.
+
+    Input:
+    - connection (sqlite3.Connection): connection to the database (the caller holds the lock).
+
+    Output:
+    - num_removed (int): number of responses removed.
+    """
+    # The responses used recently must count as used
+    write_last_used(connection)
+
+    num_entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+    max_size = cache_max_size_mb * 1024 * 1024
+
+    # Within the limits
+    if num_entries <= cache_max_entries and size <= max_size:
+        return 0
+
+    # Go over the responses from the least recently used one, until we're within the limits
+    keys_to_remove = []
+    for key, size_response in connection.execute("SELECT key, size FROM responses ORDER BY last_used"):
+        if num_entries <= cache_max_entries and size <= max_size:
+            break
+        keys_to_remove.append((key,))
+        num_entries -= 1
+        size -= size_response
+
+    connection.executemany("DELETE FROM responses WHERE key = ?", keys_to_remove)
+    connection.commit()
+
+    return len(keys_to_remove)
+
+def clear_cache():
+    """
+    Function to remove all the responses from the cache.
+
+    Output: None
+    """
+    with lock:
+        connection = get_connection()
+        connection.execute("DELETE FROM responses")
+        connection.commit()
+        pending_last_used.clear()
+
+# Don't lose when the responses were last used
+atexit.register(flush_last_used)
+
+if __name__ == "__main__":
+    print("Module with functions to cache the responses from the model running as main.")
+    print("Running tests...")
+
+    # Use a temporary cache for the tests
+    import tempfile
+    path_cache_folder = tempfile.mkdtemp() + "/"
+
+    ##################################################################################
+    print("Tests for get_cache_key function:")
+
+    print("Test 1")
+    key_1 = get_cache_key("gpt-4o", "2024-06-01", "system", "message", 0)
+    key_2 = get_cache_key("gpt-4o", "2024-06-01", "system", "message", 1)
+    print(key_1, key_2)
+    assert key_1 != key_2
+
+    print("Test 2")
+    print(get_cache_key("gpt-4o", "2024-06-01", "system", "message", 0))
+    assert get_cache_key("gpt-4o", "2024-06-01", "system", "message", 0) == key_1
+
+    ##################################################################################
+    print("Tests for get_cached_response and save_cached_response functions:")
+
+    print("Test 1")
+    print(get_cached_response(key_1))
+    assert get_cached_response(key_1) == None
+
+    print("Test 2")
+    save_cached_response(key_1, "Reasoning: My answer is: 42.")
+    print(get_cached_response(key_1))
+    assert get_cached_response(key_1) == "Reasoning: My answer is: 42."
+
+    print("Test 3")
+    set_cache_mode("replay")
+    save_cached_response(key_2, "Reasoning: My answer is: 43.")
+    print(get_cached_response(key_2))
+    assert get_cached_response(key_2) == None
+    set_cache_mode("read_write")
+
+    print("Test 4")
+    set_cache_mode("off")
+    print(get_cached_response(key_1))
+    assert get_cached_response(key_1) == None
+    set_cache_mode("read_write")
+
+    print("Test 5")
+    # Using a response doesn't write to the database until there are enough uses
+    last_used = get_connection().execute("SELECT last_used FROM responses WHERE key = ?", (key_1,)).fetchone()[0]
+    get_cached_response(key_1)
+    print(pending_last_used)
+    assert key_1 in pending_last_used
+    assert get_connection().execute("SELECT last_used FROM responses WHERE key = ?", (key_1,)).fetchone()[0] == last_used
+    flush_last_used()
+    assert pending_last_used == {}
+    assert get_connection().execute("SELECT last_used FROM responses WHERE key = ?", (key_1,)).fetchone()[0] > last_used
+
+    ##################################################################################
+    print("Tests for evict_cached_responses function:")
+
+    print("Test 1")
+    save_cached_response(key_2, "Reasoning: My answer is: 43.")
+    get_cached_response(key_1)
+    cache_max_entries = 1
+    print(evict_cached_responses(get_connection()))
+    assert get_cached_response(key_1) == "Reasoning: My answer is: 42."
+    assert get_cached_response(key_2) == None
+    cache_max_entries = 1000000
+
+    ##################################################################################
+    print("Tests for clear_cache function:")
+
+    print("Test 1")
+    clear_cache()
+    print(get_cached_response(key_1))
+    assert get_cached_response(key_1) == None
+
+    ##################################################################################
+    print("All tests passed.")
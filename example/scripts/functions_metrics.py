@@ -0,0 +1,261 @@
+# Script with functions to measure where the time (and the requests to the model) of the extraction goes
+# Emilio Lehoucq
+
+# The metrics are recorded for the current row (see measure_row) and then added to the summary of the run
+# (see add_to_summary). For each row there are:
+# - "time": seconds spent in each stage (e.g., "organization_url", "llm_request")
+# - "resolved_by": stage that resolved each field (e.g., {"organization": "organization_text"})
+# - "counts": counts such as "requests", "tokens_in", "tokens_out", "retries", "format_retries", "samples"
+
+######################################### IMPORTING LIBRARIES #########################################
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+######################################### PARAMETERS #########################################
+# Whether to record metrics
+metrics_enabled = True
+
+# Metrics of the current row (one per thread and asyncio task)
+current_metrics = contextvars.ContextVar("current_metrics", default=None)
+
+# Summary of the run and lock to update it from several threads
+run_summary = None
+summary_lock = threading.Lock()
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def get_empty_metrics():
+    """
+    Function to get empty metrics for a row.
+
+    Output:
+    - metrics (dict): metrics with "time", "resolved_by" and "counts".
+    """
+    return {"time": {}, "resolved_by": {}, "counts": {}}
+
+def get_current_metrics():
+    """
+    Function to get the metrics of the current row (creating them if needed).
+
+    Output:
+    - metrics (dict): metrics of the current row.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        metrics = get_empty_metrics()
+        current_metrics.set(metrics)
+    return metrics
+
+@contextmanager
+def record_time(stage):
+    """
+    Context manager to add the time spent in a block to a stage of the current row.
+
+    Input:
+    - stage (str): name of the stage.
+    """
+    if not metrics_enabled:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = get_current_metrics()
+        metrics["time"][stage] = metrics["time"].get(stage, 0.0) + time.perf_counter() - start
+
+def record_resolved(field, stage):
+    """
+    Function to record the stage that resolved a field for the current row.
+
+    Inputs:
+    - field (str): field (e.g., "organization").
+    - stage (str): name of the stage.
+
+    Output: None
+    """
+    if metrics_enabled:
+        get_current_metrics()["resolved_by"][field] = stage
+
+def add_count(name, value=1):
+    """
+    Function to add to a count of the current row.
+
+    Inputs:
+    - name (str): name of the count (e.g., "requests").
+    - value (int): value to add.
+
+    Output: None
+    """
+    if metrics_enabled and value:
+        counts = get_current_metrics()["counts"]
+        counts[name] = counts.get(name, 0) + value
+
+def measure_row(function, *args):
+    """
+    Function to run a function with its own metrics.
+
+    Inputs:
+    - function (function): function to run.
+    - args: inputs of the function.
+
+    Outputs:
+    - result: result of the function.
+    - metrics (dict): metrics recorded while running the function.
+    """
+    metrics = get_empty_metrics()
+    token = current_metrics.set(metrics)
+    try:
+        result = function(*args)
+    finally:
+        current_metrics.reset(token)
+    return result, metrics
+
+def merge_metrics(metrics, other_metrics):
+    """
+    Function to add some metrics to others.
+
+    Inputs:
+    - metrics (dict): metrics to update.
+    - other_metrics (dict): metrics to add.
+
+    Output: None
+    """
+    for stage, seconds in other_metrics["time"].items():
+        metrics["time"][stage] = metrics["time"].get(stage, 0.0) + seconds
+    for name, value in other_metrics["counts"].items():
+        metrics["counts"][name] = metrics["counts"].get(name, 0) + value
+    metrics["resolved_by"].update(other_metrics["resolved_by"])
+
+def reset_summary():
+    """
+    Function to start a new summary of the run.
+
+    Output: None
+    """
+    global run_summary
+    with summary_lock:
+        run_summary = {"num_rows": 0, "time": {}, "resolved_by": {}, "counts": {}}
+
+def add_to_summary(metrics):
+    """
+    Function to add the metrics of a row to the summary of the run.
+
+    Input:
+    - metrics (dict): metrics of the row.
+
+    Output: None
+    """
+    if run_summary is None:
+        reset_summary()
+
+    with summary_lock:
+        run_summary["num_rows"] += 1
+        for stage, seconds in metrics["time"].items():
+            run_summary["time"][stage] = run_summary["time"].get(stage, 0.0) + seconds
+        for name, value in metrics["counts"].items():
+            run_summary["counts"][name] = run_summary["counts"].get(name, 0) + value
+        for field, stage in metrics["resolved_by"].items():
+            stages = run_summary["resolved_by"].setdefault(field, {})
+            stages[stage] = stages.get(stage, 0) + 1
+
+def get_summary():
+    """
+    Function to get the summary of the run.
+
+    Output:
+    - summary (dict): "num_rows", total "time" per stage, number of rows "resolved_by" each stage per field and total "counts".
+    """
+    if run_summary is None:
+        reset_summary()
+    with summary_lock:
+        return {
+            "num_rows": run_summary["num_rows"],
+            "time": dict(run_summary["time"]),
+            "resolved_by": {field: dict(stages) for field, stages in run_summary["resolved_by"].items()},
+            "counts": dict(run_summary["counts"])
+            }
+
+def print_summary():
+    """
+    Function to print the summary of the run.
+
+    Output: None
+    """
+    summary = get_summary()
+    print(f"Rows: {summary['num_rows']}")
+    print("Time per stage (seconds, added over rows and workers):")
+    for stage, seconds in sorted(summary["time"].items(), key=lambda item: -item[1]):
+        print(f"- {stage}: {seconds:.2f}")
+    print("Stage that resolved each field (rows):")
+    for field, stages in summary["resolved_by"].items():
+        print(f"- {field}: " + ", ".join(f"{stage} {count}" for stage, count in stages.items()))
+    print("Counts:")
+    for name, value in summary["counts"].items():
+        print(f"- {name}: {value}")
+
+if __name__ == "__main__":
+    print("Module with functions to measure the extraction running as main.")
+    print("Running tests...")
+
+    ##################################################################################
+    print("Tests for measure_row, record_time, record_resolved and add_count functions:")
+
+    print("Test 1")
+    def function_to_measure(x):
+        with record_time("stage_1"):
+            time.sleep(0.01)
+        add_count("requests", 2)
+        add_count("requests")
+        record_resolved("field", "stage_1")
+        return x * 2
+    result, metrics = measure_row(function_to_measure, 21)
+    print(result, metrics)
+    assert result == 42
+    assert metrics["time"]["stage_1"] >= 0.01
+    assert metrics["counts"] == {"requests": 3}
+    assert metrics["resolved_by"] == {"field": "stage_1"}
+
+    print("Test 2")
+    _, metrics_2 = measure_row(function_to_measure, 1)
+    print(metrics_2)
+    assert metrics_2["counts"] == {"requests": 3}
+
+    print("Test 3")
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda x: measure_row(function_to_measure, x), range(8)))
+    print(results[0])
+    assert all(metrics["counts"] == {"requests": 3} for _, metrics in results)
+
+    ##################################################################################
+    print("Tests for merge_metrics function:")
+
+    print("Test 1")
+    metrics_merged = get_empty_metrics()
+    merge_metrics(metrics_merged, metrics)
+    merge_metrics(metrics_merged, metrics_2)
+    print(metrics_merged)
+    assert metrics_merged["counts"] == {"requests": 6}
+    assert metrics_merged["time"]["stage_1"] >= 0.02
+
+    ##################################################################################
+    print("Tests for add_to_summary and get_summary functions:")
+
+    print("Test 1")
+    reset_summary()
+    add_to_summary(metrics)
+    add_to_summary(metrics_2)
+    add_to_summary({"time": {}, "resolved_by": {"field": "stage_2"}, "counts": {}})
+    summary = get_summary()
+    print(summary)
+    assert summary["num_rows"] == 3
+    assert summary["counts"] == {"requests": 6}
+    assert summary["resolved_by"] == {"field": {"stage_1": 2, "stage_2": 1}}
+    print_summary()
+
+    ##################################################################################
+    print("All tests passed.")
@@ -0,0 +1,1025 @@
+# Script with functions to run the information extraction over a dataframe in parallel
+# Emilio Lehoucq
+
+######################################### IMPORTING LIBRARIES #########################################
+import gc
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+import pandas as pd
+from functions_metrics import measure_row, get_empty_metrics, merge_metrics, add_to_summary
+
+######################################### PARAMETERS #########################################
+
+# Number of threads for the fields that send requests to the model (they spend their time waiting for the API)
+num_threads = 8
+
+# Number of processes for the fields that use regular expressions and lookups (they use the CPU)
+num_processes = os.cpu_count() or 1
+
+# Number of rows sent to a process at a time
+chunk_size_processes = 16
+
+# Number of rows extracted between checkpoints (each checkpoint is a new shard in the output folder)
+chunk_size_checkpoints = 500
+
+# Name of the manifest in the output folder of checkpointed runs
+file_name_manifest = "manifest.json"
+
+# Number of rows read from the CSV at a time in streaming runs
+batch_size_streaming = 1000
+
+# Maximum number of results kept per field in streaming runs to give them to the duplicates in later batches
+# (the least recently used are dropped first, so the memory used doesn't grow with the size of the data)
+max_known_results = 100000
+
+# Fields that can be extracted
+# - "inputs": columns of the dataframe passed to the functions
+# - "regex": function that doesn't use LLM (run in the process pool)
+# - "llm": function that uses LLM (run in the thread pool), only for the rows where the "regex" function found nothing
+# - "llm_inputs": columns passed to the "llm" function
+# Functions are given as (module, function) so that only the modules needed are imported
+fields = {
+    "salary": {
+        "inputs": ["text"],
+        "regex": ("functions_to_extract_salary", "extract_salary"),
+        "llm": None,
+        "llm_inputs": None
+        },
+    "organization": {
+        "inputs": ["url_job_post", "text"],
+        "regex": ("functions_to_extract_organization", "extract_organization_without_llm"),
+        "llm": ("functions_to_extract_organization", "extract_organization_with_llm"),
+        "llm_inputs": ["text"]
+        },
+    "job_title": {
+        "inputs": ["text"],
+        "regex": None,
+        "llm": ("functions_to_extract_job_title", "extract_job_title"),
+        "llm_inputs": ["text"]
+        },
+    "location": {
+        "inputs": ["text"],
+        "regex": ("functions_to_extract_location", "extract_location_without_llm"),
+        "llm": ("functions_to_extract_location", "extract_location_with_llm"),
+        "llm_inputs": ["text"]
+        },
+    "visa": {
+        "inputs": ["text"],
+        "regex": None,
+        "llm": ("functions_to_extract_visa", "extract_visa"),
+        "llm_inputs": ["text"]
+        },
+    "education": {
+        "inputs": ["text"],
+        "regex": None,
+        "llm": ("functions_to_extract_education", "extract_education"),
+        "llm_inputs": ["text"]
+        },
+    "experience": {
+        "inputs": ["text"],
+        "regex": ("functions_to_extract_experience", "extract_years_experience"),
+        "llm": None,
+        "llm_inputs": None
+        }
+    }
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def get_function(module_function):
+    """
+    Function to get a function from the name of its module and its name, importing the module if needed.
+
+    Input:
+    - module_function (tuple): (name of the module, name of the function).
+
+    Output:
+    - function (callable): the function.
+    """
+    module_name, function_name = module_function
+    return getattr(importlib.import_module(module_name), function_name)
+
+def warm_up_fields(fields_to_extract):
+    """
+    Function to load the resources (data, prompts, regular expressions, client) of the modules of some fields
+    now instead of the first time each worker needs them. The processes started after this share them (see
+    start_process_pool).
+
+    Input:
+    - fields_to_extract (list): fields to extract (keys of fields).
+
+    Output: None
+    """
+    modules = []
+    for field in fields_to_extract:
+        modules += [fields[field][part][0] for part in ["regex", "llm"] if fields[field][part]]
+    if any(fields[field]["llm"] for field in fields_to_extract):
+        modules.append("functions_azure")
+
+    for module_name in dict.fromkeys(modules):
+        module = importlib.import_module(module_name)
+        if hasattr(module, "warm_up"):
+            module.warm_up()
+
+def apply_function(module_function, inputs):
+    """
+    Function to apply a function to some inputs. This is what runs in the processes and threads.
+
+    Inputs:
+    - module_function (tuple): (name of the module, name of the function).
+    - inputs (tuple): inputs of the function.
+
+    Outputs:
+    - result: what the function returns.
+    - metrics (dict): metrics recorded while running the function (see functions_metrics).
+    """
+    return measure_row(get_function(module_function), *inputs)
+
+def get_inputs(df, columns):
+    """
+    Function to get the inputs of a function for each row of a dataframe, making sure they are strings.
+
+    Inputs:
+    - df (pd.DataFrame): dataframe with the data.
+    - columns (list): columns to use as inputs.
+
+    Output:
+    - inputs (list): list of tuples with the inputs for each row (in the order of the dataframe).
+    """
+    # Check that the columns are in the dataframe
+    for column in columns:
+        if column not in df.columns:
+            raise ValueError(f"Column {column} is not in the dataframe.")
+
+    # Same conversion as str(row[column]) (missing values become "nan")
+    return list(zip(*[[str(value) for value in df[column].tolist()] for column in columns]))
+
+def normalize_text(text):
+    """
+    Function to normalize a text to find duplicates (copies of the same posting that only differ in whitespace).
+
+    Input:
+    - text (str): text.
+
+    Output:
+    - text (str): text with the whitespace collapsed to single spaces and stripped.
+    """
+    return re.sub(r"\s+", " ", text).strip()
+
+def get_input_key(input_row):
+    """
+    Function to get the key of the inputs of a row, the same for the rows whose inputs only differ in whitespace.
+
+    Input:
+    - input_row (tuple): inputs of the row (see get_inputs).
+
+    Output:
+    - key (str): hash of the normalized inputs.
+    """
+    return hashlib.sha256(json.dumps([normalize_text(value) for value in input_row]).encode("utf-8")).hexdigest()
+
+def get_unique_rows(inputs):
+    """
+    Function to find the rows with the same (normalized) inputs, so that each field is extracted once per unique input.
+
+    Input:
+    - inputs (list): list of tuples with the inputs for each row (see get_inputs).
+
+    Outputs:
+    - unique_rows (list): position of the first row with each unique input.
+    - inverse (list): for each row, position in unique_rows of the row with its input.
+    - keys (list): key of each unique input (see get_input_key).
+    """
+    unique_rows = []
+    inverse = []
+    positions = {}
+    for i, input_row in enumerate(inputs):
+
+        # Key: hash of the normalized inputs
+        key = get_input_key(input_row)
+        if key not in positions:
+            positions[key] = len(unique_rows)
+            unique_rows.append(i)
+        inverse.append(positions[key])
+
+    return unique_rows, inverse, list(positions)
+
+def run_functions(module_function, inputs, executor, chunk_size=1):
+    """
+    Function to run a function over a list of inputs, in an executor if there's one.
+
+    Inputs:
+    - module_function (tuple): (name of the module, name of the function).
+    - inputs (list): list of tuples with the inputs.
+    - executor (Executor): pool of processes or threads (None to run here).
+    - chunk_size (int): number of inputs sent to a process at a time.
+
+    Output:
+    - results (list): (result, metrics) in the same order as the inputs.
+    """
+    if executor is None:
+        return [apply_function(module_function, input_function) for input_function in inputs]
+
+    # map keeps the order of the inputs
+    return list(executor.map(apply_function, repeat(module_function), inputs, chunksize=chunk_size))
+
+def start_process_pool(num_processes):
+    """
+    Function to start a pool of processes that share the resources already loaded in this process (see warm_up_fields).
+
+    Where the system allows it, all the processes are forked now, before any pool of threads is started, so that
+    they get the data and indexes of the modules as they are here instead of each one loading and building its own
+    copy. The objects are frozen while forking so that the garbage collector of the processes doesn't write to (and
+    copy) the memory they're in. Elsewhere (e.g., Windows), each process loads the resources the first time it needs them.
+
+    Input:
+    - num_processes (int): number of processes.
+
+    Output:
+    - executor (ProcessPoolExecutor): pool of processes.
+    """
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=num_processes)
+
+    gc.freeze()
+    try:
+        # With fork, the first task starts all the processes
+        executor = ProcessPoolExecutor(max_workers=num_processes, mp_context=multiprocessing.get_context("fork"))
+        executor.submit(int).result()
+    finally:
+        gc.unfreeze()
+    return executor
+
+def start_executors(num_threads=num_threads, num_processes=num_processes):
+    """
+    Function to start the pools of processes and threads used by run_pipeline.
+
+    Inputs:
+    - num_threads (int): number of threads for the LLM (1 to not use threads).
+    - num_processes (int): number of processes for the rest (1 to not use processes).
+
+    Output:
+    - executors (tuple): (pool of processes, pool of threads), None for the ones not used.
+    """
+    # The processes first (see start_process_pool)
+    executor_processes = start_process_pool(num_processes) if num_processes > 1 else None
+    return (executor_processes, ThreadPoolExecutor(max_workers=num_threads) if num_threads > 1 else None)
+
+def shutdown_executors(executors):
+    """
+    Function to stop the pools of processes and threads started with start_executors.
+
+    Input:
+    - executors (tuple): (pool of processes, pool of threads).
+
+    Output: None
+    """
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown()
+
+def run_pipeline(df, fields_to_extract, num_threads=num_threads, num_processes=num_processes, dedup=True, metrics_column=False, warm_up=True, executors=None, known_results=None, summary=True):
+    """
+    Function to extract information from the rows of a dataframe in parallel.
+
+    The parts of the extraction that don't use LLM run in a pool of processes (to use all cores) and the parts
+    that use LLM run in a pool of threads (to have several requests in flight). The LLM only runs for the
+    rows where the first part found nothing. Rows with the same inputs (up to whitespace) are extracted once 
+    and get the same result.
+
+    Inputs:
+    - df (pd.DataFrame): dataframe with the job postings (columns "text" and "url_job_post").
+    - fields_to_extract (list): fields to extract (keys of fields).
+    - num_threads (int): number of threads for the LLM (1 to not use threads).
+    - num_processes (int): number of processes for the rest (1 to not use processes).
+    - dedup (bool): whether to extract only once the rows with the same inputs.
+    - metrics_column (bool): whether to add a column "metrics" with the metrics of each row (the metrics of 
+      the rows are also added to the summary of the run unless summary is False, see functions_metrics).
+    - warm_up (bool): whether to load the resources of the modules before starting the workers (see warm_up_fields).
+    - executors (tuple): pools of processes and threads to use (see start_executors), e.g., the same ones for all the
+      chunks of a run. They're not stopped here. If None, they're started and stopped here.
+    - known_results (dict): for each field, results of the rows already extracted (e.g., in previous chunks) by the key
+      of their inputs (see get_input_key). The rows with those keys aren't extracted again (they count as duplicates),
+      and the results of the new rows are added. Only used when deduplicating.
+    - summary (bool): whether to add the metrics of the rows to the summary of the run (e.g., not when the caller adds
+      them itself after putting together the metrics of several calls for the same rows).
+
+    Output:
+    - df_extracted (pd.DataFrame): dataframe with a column "<field>_extracted" per field, with the same index as df.
+    """
+    # Check the input is a dataframe
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("Input must be a dataframe.")
+
+    # Check the fields
+    for field in fields_to_extract:
+        if field not in fields:
+            raise ValueError(f"Field {field} is not one of {list(fields)}.")
+
+    # Check the number of workers
+    if not isinstance(num_threads, int) or not isinstance(num_processes, int):
+        raise TypeError("The number of threads and processes must be integers.")
+    if num_threads < 1 or num_processes < 1:
+        raise ValueError("The number of threads and processes must be positive.")
+
+    # Rows to extract for each field (once per unique input when deduplicating)
+    rows = {}
+    inverse = {}
+    keys = {}
+    for field in fields_to_extract:
+        columns = list(dict.fromkeys(fields[field]["inputs"] + (fields[field]["llm_inputs"] or [])))
+        if dedup:
+            rows[field], inverse[field], keys[field] = get_unique_rows(get_inputs(df, columns))
+            if len(rows[field]) < len(df):
+                print(f"Field {field}: {len(df)} rows, {len(rows[field])} unique ({len(df) - len(rows[field])} duplicates not extracted).")
+        else:
+            rows[field], inverse[field], keys[field] = list(range(len(df))), list(range(len(df))), None
+
+    # Initialize dictionaries to store the results and the metrics of each field (for the rows to extract)
+    results = {field: [None] * len(rows[field]) for field in fields_to_extract}
+    metrics = {field: [get_empty_metrics() for _ in rows[field]] for field in fields_to_extract}
+
+    # Rows already extracted before (they count as duplicates)
+    to_extract = {}
+    for field in fields_to_extract:
+        known_results_field = known_results.setdefault(field, {}) if known_results is not None and dedup else {}
+        to_extract[field] = []
+        for i in range(len(rows[field])):
+            if keys[field] is not None and keys[field][i] in known_results_field:
+                results[field][i] = known_results_field[keys[field][i]]
+
+                # Most recently used (see trim_known_results)
+                if isinstance(known_results_field, OrderedDict):
+                    known_results_field.move_to_end(keys[field][i])
+                metrics[field][i]["resolved_by"][field] = "duplicate"
+                metrics[field][i]["counts"]["duplicates"] = 1
+            else:
+                to_extract[field].append(i)
+
+    # Load the resources once here, so that the processes don't each load them (and the time isn't counted in the rows)
+    if warm_up and any(to_extract.values()):
+        warm_up_fields(fields_to_extract)
+
+    # Pools of processes and threads (started here unless they're given)
+    executor_processes, executor_threads = executors if executors is not None else (None, None)
+
+    try:
+        # 1) Fields (or parts of fields) without LLM, in processes
+        fields_regex = [field for field in fields_to_extract if fields[field]["regex"] and to_extract[field]]
+        if fields_regex:
+            if executors is None and num_processes > 1:
+                executor_processes = start_process_pool(num_processes)
+            for field in fields_regex:
+                inputs = get_inputs(df.iloc[[rows[field][i] for i in to_extract[field]]], fields[field]["inputs"])
+                for i, (result, metrics_row) in zip(to_extract[field], run_functions(fields[field]["regex"], inputs, executor_processes, chunk_size_processes)):
+                    results[field][i] = result
+                    merge_metrics(metrics[field][i], metrics_row)
+                    if result:
+                        metrics[field][i]["resolved_by"].setdefault(field, "regex")
+
+        # 2) Fields (or parts of fields) with LLM, in threads, only for the rows without a result
+        fields_llm = [field for field in fields_to_extract if fields[field]["llm"] and to_extract[field]]
+        if fields_llm:
+            if executors is None and num_threads > 1:
+                executor_threads = ThreadPoolExecutor(max_workers=num_threads)
+            for field in fields_llm:
+                rows_llm = [i for i in to_extract[field] if not results[field][i]]
+                inputs = get_inputs(df.iloc[[rows[field][i] for i in rows_llm]], fields[field]["llm_inputs"])
+                for i, (result, metrics_row) in zip(rows_llm, run_functions(fields[field]["llm"], inputs, executor_threads)):
+                    results[field][i] = result
+                    merge_metrics(metrics[field][i], metrics_row)
+                    metrics[field][i]["resolved_by"].setdefault(field, "llm")
+    finally:
+        if executors is None:
+            shutdown_executors((executor_processes, executor_threads))
+
+    # Results of the new rows, for the next calls
+    if known_results is not None and dedup:
+        for field in fields_to_extract:
+            for i in to_extract[field]:
+                known_results[field][keys[field][i]] = results[field][i]
+
+    # Stage that resolved each field (if the functions didn't record a more specific one)
+    for field in fields_to_extract:
+        for i, result in enumerate(results[field]):
+            if field not in metrics[field][i]["resolved_by"]:
+                if not result:
+                    metrics[field][i]["resolved_by"][field] = "unresolved"
+                elif fields[field]["llm"] and metrics[field][i]["counts"].get("samples"):
+                    metrics[field][i]["resolved_by"][field] = "llm"
+                else:
+                    metrics[field][i]["resolved_by"][field] = "regex"
+
+    # Fields that no stage resolved
+    for field in fields_to_extract:
+        for metrics_row in metrics[field]:
+            metrics_row["resolved_by"].setdefault(field, "unresolved")
+
+    # Metrics of each row (the duplicate rows only count as duplicates)
+    metrics_rows = []
+    for i in range(len(df)):
+        metrics_row = get_empty_metrics()
+        for field in fields_to_extract:
+            j = inverse[field][i]
+            if rows[field][j] == i:
+                merge_metrics(metrics_row, metrics[field][j])
+            else:
+                metrics_row["resolved_by"][field] = "duplicate"
+                metrics_row["counts"]["duplicates"] = metrics_row["counts"].get("duplicates", 0) + 1
+        if summary:
+            add_to_summary(metrics_row)
+        metrics_rows.append(metrics_row)
+
+    # Copy the results to the duplicate rows
+    results = {field: [results[field][j] for j in inverse[field]] for field in fields_to_extract}
+
+    # Put the results together in the order of the dataframe
+    df_extracted = pd.DataFrame({field + "_extracted": results[field] for field in fields_to_extract}, index=df.index)
+    if metrics_column:
+        df_extracted["metrics"] = metrics_rows
+
+    return df_extracted
+
+def get_field_hash(field):
+    """
+    Function to get a hash identifying how a field is extracted.
+
+    For fields using LLM, it changes when the prompt, the system message, the format of the responses or the model change, so that the
+    results of a previous run are not reused after changing them.
+
+    Input:
+    - field (str): field (key of fields).
+
+    Output:
+    - field_hash (str): hash identifying how the field is extracted.
+    """
+    # Check the field
+    if field not in fields:
+        raise ValueError(f"Field {field} is not one of {list(fields)}.")
+
+    # Functions used
+    content = [field, fields[field]["regex"], fields[field]["llm"]]
+
+    # Prompt, system message and model
+    if fields[field]["llm"]:
+        module_llm = importlib.import_module(fields[field]["llm"][0])
+        functions_azure = importlib.import_module("functions_azure")
+        content += [module_llm.get_prompt() if hasattr(module_llm, "get_prompt") else None, functions_azure.get_system_message(), functions_azure.response_format_type, functions_azure.deployment_name]
+
+    return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()[:16]
+
+def get_row_id(row_id):
+    """
+    Function to get a row id (index of the dataframe) that can be saved in JSON.
+
+    Input:
+    - row_id: index of a row of the dataframe.
+
+    Output:
+    - row_id (int or str): row id.
+    """
+    # Integers (including numpy integers) stay integers, everything else becomes a string
+    try:
+        if int(row_id) == row_id:
+            return int(row_id)
+    except (TypeError, ValueError):
+        pass
+    return str(row_id)
+
+def read_manifest(path_output_folder):
+    """
+    Function to read the manifest of a checkpointed run.
+
+    Input:
+    - path_output_folder (str): folder with the output of the run.
+
+    Output:
+    - manifest (dict): manifest with the shards of the run (empty manifest if the run hasn't started).
+    """
+    path_manifest = os.path.join(path_output_folder, file_name_manifest)
+
+    # The run hasn't started
+    if not os.path.exists(path_manifest):
+        return {"version": 1, "shards": [], "field_hashes": {}}
+
+    with open(path_manifest, "r") as file:
+        return json.load(file)
+
+def write_manifest(path_output_folder, manifest):
+    """
+    Function to write the manifest of a checkpointed run (replacing the file at once so it's never half-written).
+
+    Inputs:
+    - path_output_folder (str): folder with the output of the run.
+    - manifest (dict): manifest with the shards of the run.
+
+    Output: None
+    """
+    path_manifest = os.path.join(path_output_folder, file_name_manifest)
+    with open(path_manifest + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(path_manifest + ".tmp", path_manifest)
+
+def read_shards(path_output_folder, manifest):
+    """
+    Function to read the records saved in the shards of a checkpointed run, one at a time.
+
+    Inputs:
+    - path_output_folder (str): folder with the output of the run.
+    - manifest (dict): manifest with the shards of the run.
+
+    Output:
+    - records (generator): records with "row_id", "field", "field_hash" and "value".
+    """
+    # Only the shards in the manifest are complete
+    for shard in manifest["shards"]:
+        with open(os.path.join(path_output_folder, shard), "r") as file:
+            for line in file:
+                yield json.loads(line)
+
+def write_shard(path_output_folder, manifest, records):
+    """
+    Function to save records in a new shard and add it to the manifest.
+
+    Inputs:
+    - path_output_folder (str): folder with the output of the run.
+    - manifest (dict): manifest with the shards of the run (it's updated).
+    - records (list): records with "row_id", "field", "field_hash" and "value".
+
+    Output: None
+    """
+    # Write the shard first and then the manifest, so a shard is only used if it was fully written
+    shard = f"shard_{len(manifest['shards']):06d}.jsonl"
+    with open(os.path.join(path_output_folder, shard), "w") as file:
+        for record in records:
+            file.write(json.dumps(record, default=str) + "\n")
+    manifest["shards"].append(shard)
+    write_manifest(path_output_folder, manifest)
+
+def get_done_keys(path_output_folder, manifest):
+    """
+    Function to get the (row id, field, field hash) already extracted in a checkpointed run.
+
+    Inputs:
+    - path_output_folder (str): folder with the output of the run.
+    - manifest (dict): manifest with the shards of the run.
+
+    Output:
+    - done_keys (set): set of (row id, field, field hash).
+    """
+    return {(record["row_id"], record["field"], record["field_hash"]) for record in read_shards(path_output_folder, manifest)}
+
+def run_pipeline_checkpointed(df, fields_to_extract, path_output_folder, chunk_size=chunk_size_checkpoints, num_threads=num_threads, num_processes=num_processes):
+    """
+    Function to extract information from the rows of a dataframe saving the results as it goes.
+
+    The rows are extracted in chunks with run_pipeline and each chunk is saved as a new shard (JSONL) in the 
+    output folder, listed in a manifest. If the run stops, running it again skips the (row, field) already 
+    extracted with the same prompt (see get_field_hash). Use load_pipeline_results to read the results.
+    The pools of processes and threads are the same for all the chunks, and the rows with the same inputs as 
+    a row of a previous chunk get its result without extracting them again.
+
+    Inputs:
+    - df (pd.DataFrame): dataframe with the job postings (columns "text" and "url_job_post").
+    - fields_to_extract (list): fields to extract (keys of fields).
+    - path_output_folder (str): folder to save the shards and the manifest.
+    - chunk_size (int): number of rows between checkpoints.
+    - num_threads (int): number of threads for the LLM.
+    - num_processes (int): number of processes for the rest.
+
+    Output:
+    - num_extracted (int): number of (row, field) extracted in this run.
+    """
+    # Check the input is a dataframe
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("Input must be a dataframe.")
+
+    # Check the chunk size
+    if not isinstance(chunk_size, int) or chunk_size < 1:
+        raise ValueError("The chunk size must be a positive integer.")
+
+    # Read what was already done
+    os.makedirs(path_output_folder, exist_ok=True)
+    manifest = read_manifest(path_output_folder)
+    done_keys = get_done_keys(path_output_folder, manifest)
+
+    # Hash of each field (the results with another hash are extracted again)
+    field_hashes = {field: get_field_hash(field) for field in fields_to_extract}
+    manifest["field_hashes"].update(field_hashes)
+
+    # Row ids that can be saved in JSON
+    row_ids = [get_row_id(row_id) for row_id in df.index]
+
+    # Results by the key of the inputs, for the duplicates in later chunks (see run_pipeline)
+    known_results = {}
+
+    # Load the resources and start the pools once for all the chunks
+    if len(df) > 0:
+        warm_up_fields(fields_to_extract)
+    executors = start_executors(num_threads, num_processes)
+
+    # Iterate over the chunks of rows
+    num_extracted = 0
+    try:
+        for start in range(0, len(df), chunk_size):
+            records = []
+            metrics_chunk = {}
+
+            for field in fields_to_extract:
+
+                # Rows of the chunk still to extract for this field
+                positions = [i for i in range(start, min(start + chunk_size, len(df))) if (row_ids[i], field, field_hashes[field]) not in done_keys]
+                if not positions:
+                    continue
+
+                # Extract
+                df_extracted = run_pipeline(df.iloc[positions], [field], num_threads, num_processes, metrics_column=True, warm_up=False,
+                                            executors=executors, known_results=known_results, summary=False)
+                for i, value, metrics_row in zip(positions, df_extracted[field + "_extracted"].tolist(), df_extracted["metrics"].tolist()):
+                    records.append({"row_id": row_ids[i], "field": field, "field_hash": field_hashes[field], "value": value})
+                    merge_metrics(metrics_chunk.setdefault(i, get_empty_metrics()), metrics_row)
+
+            # One row of the summary per row of the chunk (with the metrics of all its fields)
+            for i in sorted(metrics_chunk):
+                add_to_summary(metrics_chunk[i])
+            
+            # Save the chunk
+            if records:
+                write_shard(path_output_folder, manifest, records)
+                num_extracted += len(records)
+                print(f"Checkpoint: {min(start + chunk_size, len(df))} of {len(df)} rows, {len(records)} values saved.")
+    finally:
+        shutdown_executors(executors)
+
+    return num_extracted
+
+def load_pipeline_results(path_output_folder, fields_to_extract):
+    """
+    Function to load the results of a checkpointed run.
+
+    Inputs:
+    - path_output_folder (str): folder with the output of the run.
+    - fields_to_extract (list): fields to load.
+
+    Output:
+    - df_extracted (pd.DataFrame): dataframe with a column "<field>_extracted" per field, indexed by row id.
+    """
+    manifest = read_manifest(path_output_folder)
+
+    # Only the results extracted with the current prompts
+    field_hashes = {field: get_field_hash(field) for field in fields_to_extract}
+
+    # Later shards overwrite earlier ones
+    results = {field: {} for field in fields_to_extract}
+    for record in read_shards(path_output_folder, manifest):
+        if record["field"] in results and record["field_hash"] == field_hashes[record["field"]]:
+            results[record["field"]][record["row_id"]] = record["value"]
+
+    return pd.DataFrame({field + "_extracted": pd.Series(results[field], dtype=object) for field in fields_to_extract})
+
+def get_streaming_config(path_input, fields_to_extract, batch_size):
+    """
+    Function to get what determines the parts of a streaming run (the parts saved with another one can't be reused).
+
+    Inputs:
+    - path_input (str): CSV with the job postings.
+    - fields_to_extract (list): fields to extract.
+    - batch_size (int): number of rows read at a time.
+
+    Output:
+    - config (dict): input file (name, size and modification time), fields, hash of each field (see get_field_hash) and batch size.
+    """
+    stat = os.stat(path_input)
+    return {
+        "version": 1,
+        "input": {"path": os.path.basename(path_input), "size": stat.st_size, "mtime": int(stat.st_mtime)},
+        "fields": list(fields_to_extract),
+        "field_hashes": {field: get_field_hash(field) for field in fields_to_extract},
+        "batch_size": batch_size
+        }
+
+def trim_known_results(known_results, max_results):
+    """
+    Function to keep only the most recently used results of each field (see run_pipeline), so that they don't
+    grow with the size of the data.
+
+    Inputs:
+    - known_results (dict): for each field, OrderedDict with the results by the key of their inputs (the least
+      recently used first).
+    - max_results (int): maximum number of results kept per field.
+
+    Output: None
+    """
+    for known_results_field in known_results.values():
+        while len(known_results_field) > max_results:
+            known_results_field.popitem(last=False)
+
+def run_pipeline_streaming(path_input, fields_to_extract, path_output, path_output_folder, batch_size=batch_size_streaming, num_threads=num_threads, num_processes=num_processes,
+                           max_results=max_known_results):
+    """
+    Function to extract information from a CSV reading it in batches, so that the memory used doesn't grow with
+    the size of the data.
+
+    Each batch is read, extracted with run_pipeline and saved right away as a part (CSV) in the output folder. 
+    If the run stops, running it again skips the batches already saved. The configuration of the run is saved in
+    a manifest in the output folder (see get_streaming_config), and if it changes (another input, fields, prompts 
+    or batch size), the parts are extracted again. At the end, the parts are put together in the output file 
+    (the columns of the input plus a column "<field>_extracted" per field).
+
+    Inputs:
+    - path_input (str): CSV with the job postings (columns "text" and "url_job_post").
+    - fields_to_extract (list): fields to extract (keys of fields).
+    - path_output (str): CSV to save the output.
+    - path_output_folder (str): folder to save the parts.
+    - batch_size (int): number of rows read at a time.
+    - num_threads (int): number of threads for the LLM.
+    - num_processes (int): number of processes for the rest.
+    - max_results (int): maximum number of results kept per field for the duplicates in later batches (the least
+      recently used are dropped first, see trim_known_results). None for no limit.
+
+    Output:
+    - num_rows (int): number of rows in the output.
+    """
+    # Check the batch size
+    if not isinstance(batch_size, int) or batch_size < 1:
+        raise ValueError("The batch size must be a positive integer.")
+
+    # Check the maximum number of results kept
+    if max_results is not None and (not isinstance(max_results, int) or max_results < 0):
+        raise ValueError("The maximum number of results kept must be a non-negative integer or None.")
+
+    os.makedirs(path_output_folder, exist_ok=True)
+
+    # The parts of a previous run can only be reused if it had the same configuration
+    config = get_streaming_config(path_input, fields_to_extract, batch_size)
+    path_manifest = os.path.join(path_output_folder, file_name_manifest)
+    previous_config = None
+    if os.path.exists(path_manifest):
+        with open(path_manifest, "r") as file:
+            previous_config = json.load(file)
+    if previous_config != config:
+        previous_parts = [file_name for file_name in os.listdir(path_output_folder) if file_name.startswith("part_")]
+        if previous_parts:
+            print(f"The {len(previous_parts)} parts in {path_output_folder} were saved with another configuration, extracting them again.")
+            for file_name in previous_parts:
+                os.remove(os.path.join(path_output_folder, file_name))
+        write_manifest(path_output_folder, config)
+
+    # Load the resources and start the pools once for all the batches, and keep the results for the duplicates in later batches
+    known_results = {field: OrderedDict() for field in fields_to_extract}
+    warm_up_fields(fields_to_extract)
+    executors = start_executors(num_threads, num_processes)
+
+    # Iterate over the batches
+    parts = []
+    num_rows = 0
+    try:
+        for i, df_batch in enumerate(pd.read_csv(path_input, chunksize=batch_size)):
+            path_part = os.path.join(path_output_folder, f"part_{i:06d}.csv")
+            parts.append(path_part)
+            num_rows += len(df_batch)
+
+            # Already saved in a previous run
+            if os.path.exists(path_part):
+                continue
+
+            # Extract and save (only the first part has the header, so the parts can be put together as they are)
+            df_extracted = run_pipeline(df_batch, fields_to_extract, num_threads, num_processes, warm_up=False, executors=executors, known_results=known_results)
+            if max_results is not None:
+                trim_known_results(known_results, max_results)
+            df_batch = df_batch.join(df_extracted)
+            df_batch.to_csv(path_part + ".tmp", index=False, header=(i == 0))
+            os.replace(path_part + ".tmp", path_part)
+            print(f"Batch {i}: {num_rows} rows saved.")
+    finally:
+        shutdown_executors(executors)
+
+    # Put the parts together
+    with open(path_output, "wb") as file_output:
+        for path_part in parts:
+            with open(path_part, "rb") as file_part:
+                shutil.copyfileobj(file_part, file_output)
+
+    return num_rows
+
+if __name__ == "__main__":
+    print("Module to run the information extraction in parallel running as main script.")
+    print("Running tests...")
+
+    ##################################################################################
+    print("Tests for get_inputs function:")
+
+    print("Test 1")
+    df = pd.DataFrame({"text": ["a", "c"], "url_job_post": ["b", float("nan")]})
+    print(get_inputs(df, ["url_job_post", "text"]))
+    assert get_inputs(df, ["url_job_post", "text"]) == [("b", "a"), ("nan", "c")]
+
+    ##################################################################################
+    from functions_metrics import reset_summary, get_summary
+
+    ##################################################################################
+    print("Tests for normalize_text function:")
+
+    print("Test 1")
+    print(normalize_text("  Data\n\nScientist\t at  NU "))
+    assert normalize_text("  Data\n\nScientist\t at  NU ") == "Data Scientist at NU"
+
+    ##################################################################################
+    print("Tests for get_unique_rows function:")
+
+    print("Test 1")
+    unique_rows, inverse, keys = get_unique_rows([("a b", "x"), ("a  b", "x"), ("a b", "y"), ("c", "x"), ("a\nb ", "x")])
+    print(unique_rows, inverse)
+    assert (unique_rows, inverse) == ([0, 2, 3], [0, 0, 1, 2, 0])
+    assert keys == [get_input_key(("a b", "x")), get_input_key(("a b", "y")), get_input_key(("c", "x"))]
+
+    ##################################################################################
+    print("Tests for run_pipeline function:")
+
+    print("Test 1")
+    df = pd.DataFrame({
+        "text": ["salary: $30,000 - $40,000 per year", "We offer a competitive salary.", "3 years of experience. The salary is $10 per hour."]
+        }, index=[10, 5, 7])
+    df_extracted = run_pipeline(df, ["salary", "experience"], num_threads=2, num_processes=2)
+    print(df_extracted)
+    assert df_extracted.index.tolist() == [10, 5, 7]
+    assert df_extracted["salary_extracted"].tolist() == [["$30,000 - $40,000"], None, ["$10"]]
+    assert df_extracted["experience_extracted"].tolist() == [[], [], ["3"]]
+
+    print("Test 2")
+    df_extracted_serial = run_pipeline(df, ["salary", "experience"], num_threads=1, num_processes=1)
+    print(df_extracted_serial)
+    assert df_extracted_serial.equals(df_extracted)
+
+    print("Test 3")
+    reset_summary()
+    df_extracted_metrics = run_pipeline(df, ["salary", "experience"], num_threads=1, num_processes=2, metrics_column=True)
+    print(df_extracted_metrics["metrics"].tolist())
+    assert df_extracted_metrics["metrics"].tolist()[1]["resolved_by"] == {"salary": "unresolved", "experience": "unresolved"}
+    assert df_extracted_metrics["metrics"].tolist()[2]["resolved_by"] == {"salary": "regex", "experience": "regex"}
+    print(get_summary())
+    assert get_summary()["num_rows"] == 3
+    assert get_summary()["resolved_by"]["salary"] == {"regex": 2, "unresolved": 1}
+
+    print("Test 4")
+    df_duplicates = pd.DataFrame({"text": ["3 years  of experience.", "We offer a competitive salary.", " 3 years of\nexperience. "]})
+    df_extracted_duplicates = run_pipeline(df_duplicates, ["experience"], num_threads=1, num_processes=1)
+    print(df_extracted_duplicates)
+    assert df_extracted_duplicates["experience_extracted"].tolist() == [["3"], [], ["3"]]
+    assert df_extracted_duplicates.equals(run_pipeline(df_duplicates, ["experience"], num_threads=1, num_processes=1, dedup=False))
+
+    print("Test 5")
+    reset_summary()
+    run_pipeline(df_duplicates, ["experience"], num_threads=1, num_processes=1)
+    print(get_summary())
+    assert get_summary()["resolved_by"]["experience"] == {"regex": 1, "unresolved": 1, "duplicate": 1}
+    assert get_summary()["counts"] == {"duplicates": 1}
+
+    print("Test 6")
+    # Rows extracted in a previous call aren't extracted again
+    reset_summary()
+    known_results = {}
+    run_pipeline(df_duplicates.iloc[:1], ["experience"], num_threads=1, num_processes=1, known_results=known_results)
+    df_extracted_known = run_pipeline(df_duplicates.iloc[1:], ["experience"], num_threads=1, num_processes=1, known_results=known_results)
+    print(df_extracted_known, get_summary())
+    assert df_extracted_known["experience_extracted"].tolist() == [[], ["3"]]
+    assert get_summary()["resolved_by"]["experience"] == {"regex": 1, "unresolved": 1, "duplicate": 1}
+    assert len(known_results["experience"]) == 2
+
+    print("Test 7")
+    executors = start_executors(num_threads=2, num_processes=2)
+    df_extracted_executors = run_pipeline(df, ["salary", "experience"], executors=executors)
+    assert df_extracted_executors.equals(run_pipeline(df, ["salary", "experience"], executors=executors))
+    shutdown_executors(executors)
+    print(df_extracted_executors)
+    assert df_extracted_executors.equals(df_extracted)
+
+    ##################################################################################
+    print("Tests for warm_up_fields function:")
+
+    print("Test 1")
+    import functions_to_extract_job_title
+    warm_up_fields(["job_title"])
+    print(functions_to_extract_job_title.prompt[:50])
+    assert functions_to_extract_job_title.prompt != None
+
+    ##################################################################################
+    print("Tests for start_process_pool function:")
+
+    def get_prompt_job_title():
+        return functions_to_extract_job_title.prompt
+
+    print("Test 1")
+    executor = start_process_pool(2)
+    prompts = [executor.submit(get_prompt_job_title).result() for _ in range(4)]
+    executor.shutdown()
+    print([prompt[:50] for prompt in prompts if prompt])
+    if "fork" in multiprocessing.get_all_start_methods():
+        # The processes have the prompt loaded by warm_up_fields above (they didn't read it)
+        assert prompts == [functions_to_extract_job_title.prompt] * 4
+
+    ##################################################################################
+    print("Tests for get_row_id function:")
+
+    print("Test 1")
+    print(get_row_id(df.index[0]))
+    assert get_row_id(df.index[0]) == 10 and isinstance(get_row_id(df.index[0]), int)
+
+    print("Test 2")
+    print(get_row_id("a"))
+    assert get_row_id("a") == "a"
+
+    ##################################################################################
+    print("Tests for run_pipeline_checkpointed and load_pipeline_results functions:")
+
+    import tempfile
+    path_output_folder = tempfile.mkdtemp()
+
+    print("Test 1")
+    print(run_pipeline_checkpointed(df, ["salary", "experience"], path_output_folder, chunk_size=2, num_threads=1, num_processes=1))
+    assert len(read_manifest(path_output_folder)["shards"]) == 2
+    df_loaded = load_pipeline_results(path_output_folder, ["salary", "experience"])
+    print(df_loaded)
+    assert df_loaded.loc[[10, 5, 7]].equals(df_extracted)
+
+    print("Test 2")
+    print(run_pipeline_checkpointed(df, ["salary", "experience"], path_output_folder, chunk_size=2, num_threads=1, num_processes=1))
+    assert run_pipeline_checkpointed(df, ["salary", "experience"], path_output_folder, chunk_size=2, num_threads=1, num_processes=1) == 0
+
+    print("Test 3")
+    # The duplicates in later chunks aren't extracted again, and the same pools are used for all the chunks
+    reset_summary()
+    num_extracted = run_pipeline_checkpointed(df_duplicates, ["experience"], tempfile.mkdtemp(), chunk_size=1, num_threads=1, num_processes=2)
+    print(num_extracted, get_summary())
+    assert num_extracted == 3
+    assert get_summary()["resolved_by"]["experience"] == {"regex": 1, "unresolved": 1, "duplicate": 1}
+
+    print("Test 4")
+    # Each row counts once in the summary, with all its fields
+    reset_summary()
+    num_extracted = run_pipeline_checkpointed(df_duplicates, ["experience", "salary"], tempfile.mkdtemp(), chunk_size=2, num_threads=1, num_processes=1)
+    print(num_extracted, get_summary())
+    assert num_extracted == 6
+    assert get_summary()["num_rows"] == 3
+    assert get_summary()["resolved_by"]["experience"] == {"regex": 1, "unresolved": 1, "duplicate": 1}
+    assert sum(get_summary()["resolved_by"]["salary"].values()) == 3
+
+    ##################################################################################
+    print("Tests for run_pipeline_streaming function:")
+
+    path_input = os.path.join(path_output_folder, "input.csv")
+    path_output = os.path.join(path_output_folder, "output.csv")
+    df.to_csv(path_input, index=False)
+
+    print("Test 1")
+    print(run_pipeline_streaming(path_input, ["salary", "experience"], path_output, os.path.join(path_output_folder, "parts"), batch_size=2, num_threads=1, num_processes=1))
+    df_output = pd.read_csv(path_output)
+    print(df_output)
+    assert len(df_output) == 3
+    assert df_output["experience_extracted"].tolist() == ["[]", "[]", "['3']"]
+
+    print("Test 2")
+    os.remove(path_output)
+    print(run_pipeline_streaming(path_input, ["salary", "experience"], path_output, os.path.join(path_output_folder, "parts"), batch_size=2, num_threads=1, num_processes=1))
+    assert pd.read_csv(path_output).equals(df_output)
+
+    print("Test 3")
+    # With another configuration, the parts are extracted again
+    print(run_pipeline_streaming(path_input, ["experience"], path_output, os.path.join(path_output_folder, "parts"), batch_size=1, num_threads=1, num_processes=1))
+    df_output_experience = pd.read_csv(path_output)
+    print(df_output_experience)
+    assert df_output_experience.columns.tolist() == ["text", "experience_extracted"]
+    assert df_output_experience["experience_extracted"].tolist() == ["[]", "[]", "['3']"]
+    assert len([file_name for file_name in os.listdir(os.path.join(path_output_folder, "parts")) if file_name.startswith("part_")]) == 3
+    print(read_manifest(os.path.join(path_output_folder, "parts")))
+    assert read_manifest(os.path.join(path_output_folder, "parts"))["batch_size"] == 1
+
+    print("Test 4")
+    # Keeping only some of the results for the duplicates gives the same output
+    path_input_duplicates = os.path.join(path_output_folder, "input_duplicates.csv")
+    pd.concat([df_duplicates] * 2).to_csv(path_input_duplicates, index=False)
+    reset_summary()
+    print(run_pipeline_streaming(path_input_duplicates, ["experience"], path_output, tempfile.mkdtemp(), batch_size=1, num_threads=1, num_processes=1, max_results=1))
+    print(get_summary())
+    assert pd.read_csv(path_output)["experience_extracted"].tolist() == ["['3']", "[]", "['3']"] * 2
+    assert get_summary()["resolved_by"]["experience"]["duplicate"] == 1
+
+    ##################################################################################
+    print("Tests for trim_known_results function:")
+
+    print("Test 1")
+    known_results = {"salary": OrderedDict([("a", 1), ("b", 2), ("c", 3)])}
+    known_results["salary"].move_to_end("a")
+    trim_known_results(known_results, 2)
+    print(known_results)
+    assert list(known_results["salary"]) == ["c", "a"]
+
+    ##################################################################################
+    print("All tests passed.")
@@ -0,0 +1,335 @@
+# Script with functions to save the reference data (US cities, organizations, ROR) as binary files that can be memory-mapped
+# Emilio Lehoucq
+
+# Parsing the reference data (JSON, CSV) at import takes time and every worker process keeps its own copy. The
+# data is saved once (see build_reference_artifacts.py) as columns of strings in a binary file (an artifact). The
+# artifact is memory-mapped, so loading it is instant and the processes share the same pages. The indexes built
+# from the data (e.g., the automata of the domains and the names) are built once in the main process, before
+# the worker processes are forked, so the workers share them too (see functions_pipeline.start_process_pool).
+#
+# Format of an artifact (integers are unsigned, 8 bytes, in the byte order of the machine that built it):
+# - magic (8 bytes)
+# - length of the header
+# - header (JSON): format version, version of the data, source, byte order and, for each column, where its parts are
+# - for each column:
+#     - "str": offsets of the strings (number of strings + 1) and the strings (UTF-8) one after the other
+#     - "list": offsets of the lists in the strings (number of lists + 1), then the strings as in "str"
+
+######################################### IMPORTING LIBRARIES #########################################
+import bisect
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+
+######################################### PATHS #########################################
+if os.environ.get("PIPELINE_RUN", "0") == "1":
+    path_artifacts_folder = "../data/artifacts/"
+else:
+    path_artifacts_folder = "data/artifacts/"
+
+######################################### PARAMETERS #########################################
+# Beginning of every artifact and version of the format
+magic = b"REFART\x00\x00"
+format_version = 1
+
+# Size of the integers (the parts of the file are aligned to it)
+integer_size = 8
+
+######################################### CLASSES #########################################
+
+class StringColumn(Sequence):
+    """
+    Column of strings of an artifact (read from the memory-mapped file when accessed).
+    """
+
+    def __init__(self, buffer, offsets_start, num_strings, strings_start):
+        self.offsets = buffer[offsets_start:offsets_start + (num_strings + 1) * integer_size].cast("Q")
+        self.strings = buffer[strings_start:strings_start + self.offsets[num_strings]]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Index out of range.")
+        return str(self.strings[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+class ListColumn(Sequence):
+    """
+    Column of lists of strings of an artifact (read from the memory-mapped file when accessed).
+    """
+
+    def __init__(self, buffer, lists_start, num_lists, items):
+        self.lists = buffer[lists_start:lists_start + (num_lists + 1) * integer_size].cast("Q")
+        self.items = items
+
+    def __len__(self):
+        return len(self.lists) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Index out of range.")
+        return [self.items[j] for j in range(self.lists[i], self.lists[i + 1])]
+
+class Records(Sequence):
+    """
+    Records (dictionaries) made from several columns of an artifact, like the list of dictionaries of the original data.
+    """
+
+    def __init__(self, columns):
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("The columns must have the same length.")
+        self.columns = columns
+        self.length = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        return {name: column[i] for name, column in self.columns.items()}
+
+class SortedMapping(Mapping):
+    """
+    Mapping from a column of keys (sorted) to a column of values, looked up with binary search.
+    """
+
+    def __init__(self, keys, values):
+        if len(keys) != len(values):
+            raise ValueError("The keys and values must have the same length.")
+        self.keys_column = keys
+        self.values_column = values
+
+    def __len__(self):
+        return len(self.keys_column)
+
+    def __iter__(self):
+        return iter(self.keys_column)
+
+    def __getitem__(self, key):
+        i = bisect.bisect_left(self.keys_column, key)
+        if i < len(self.keys_column) and self.keys_column[i] == key:
+            return self.values_column[i]
+        raise KeyError(key)
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def get_source_info(path_source):
+    """
+    Function to get what identifies the version of a source file (to know when an artifact is out of date).
+
+    Input:
+    - path_source (str): path of the source file.
+
+    Output:
+    - source (dict): "path", "size" and "mtime" of the file.
+    """
+    stat = os.stat(path_source)
+    return {"path": os.path.basename(path_source), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+def encode_strings(strings):
+    """
+    Function to encode strings as the offsets and the bytes of a "str" column.
+
+    Input:
+    - strings (list): strings.
+
+    Outputs:
+    - offsets (array): offsets of the strings in the bytes.
+    - encoded (bytes): strings one after the other.
+    """
+    offsets = array("Q", [0])
+    encoded = bytearray()
+    for string in strings:
+        if not isinstance(string, str):
+            raise TypeError("The values of the columns must be strings.")
+        encoded += string.encode("utf-8")
+        offsets.append(len(encoded))
+    return offsets, bytes(encoded)
+
+def write_artifact(path_artifact, columns, version, source=None):
+    """
+    Function to save columns of strings (or lists of strings) as an artifact.
+
+    Inputs:
+    - path_artifact (str): path of the artifact.
+    - columns (dict): name of each column: list of strings or list of lists of strings (columns can have different lengths).
+    - version (str): version of the data (checked when loading, see load_artifact).
+    - source (dict): what identifies the source of the data (see get_source_info). Optional.
+
+    Output: None
+    """
+    header = {"format_version": format_version, "version": version, "source": source, "byte_order": sys.byteorder, "columns": {}}
+
+    # Parts of the file after the header, with their position relative to the end of the header
+    parts = []
+    position = 0
+
+    def add_part(data):
+        nonlocal position
+        parts.append(data)
+        start = position
+        position += len(data)
+        padding = -position % integer_size
+        parts.append(b"\x00" * padding)
+        position += padding
+        return start
+
+    for name, values in columns.items():
+        values = list(values)
+        if values and all(isinstance(value, list) for value in values):
+            lists = array("Q", [0])
+            strings = []
+            for value in values:
+                strings.extend(value)
+                lists.append(len(strings))
+            offsets, encoded = encode_strings(strings)
+            header["columns"][name] = {"type": "list", "length": len(values), "lists": add_part(lists.tobytes()),
+                                       "num_strings": len(strings), "offsets": add_part(offsets.tobytes()), "strings": add_part(encoded)}
+        else:
+            offsets, encoded = encode_strings(values)
+            header["columns"][name] = {"type": "str", "length": len(values), "num_strings": len(values),
+                                       "offsets": add_part(offsets.tobytes()), "strings": add_part(encoded)}
+
+    # The header is padded so the parts after it stay aligned
+    encoded_header = json.dumps(header).encode("utf-8")
+    encoded_header += b" " * (-(len(magic) + integer_size + len(encoded_header)) % integer_size)
+
+    # Replacing the file at once so it's never half-written
+    os.makedirs(os.path.dirname(path_artifact) or ".", exist_ok=True)
+    with open(path_artifact + ".tmp", "wb") as file:
+        file.write(magic)
+        file.write(len(encoded_header).to_bytes(integer_size, sys.byteorder))
+        file.write(encoded_header)
+        for part in parts:
+            file.write(part)
+    os.replace(path_artifact + ".tmp", path_artifact)
+
+def load_artifact(path_artifact, version=None, path_source=None):
+    """
+    Function to load an artifact (memory-mapped, the strings are only read when accessed).
+
+    Inputs:
+    - path_artifact (str): path of the artifact.
+    - version (str): version of the data expected. Optional.
+    - path_source (str): path of the source of the data, to check that the artifact is up to date. Optional.
+
+    Output:
+    - artifact (dict): "header" and "columns" (name: StringColumn or ListColumn). None if the artifact doesn't exist,
+      is from another version (of the format or of the data) or is out of date.
+    """
+    if not os.path.exists(path_artifact):
+        return None
+
+    with open(path_artifact, "rb") as file:
+        if os.fstat(file.fileno()).st_size < len(magic) + integer_size:
+            return None
+        buffer = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+    # Header
+    if bytes(buffer[:len(magic)]) != magic:
+        return None
+    header_length = int.from_bytes(buffer[len(magic):len(magic) + integer_size], sys.byteorder)
+    header_start = len(magic) + integer_size
+    header = json.loads(bytes(buffer[header_start:header_start + header_length]))
+
+    # Check that the artifact can be used
+    if header["format_version"] != format_version or header["byte_order"] != sys.byteorder:
+        return None
+    if version is not None and header["version"] != version:
+        return None
+    if path_source is not None and os.path.exists(path_source) and header["source"] != get_source_info(path_source):
+        return None
+
+    # Columns
+    start = header_start + header_length
+    columns = {}
+    for name, column in header["columns"].items():
+        strings = StringColumn(buffer, start + column["offsets"], column["num_strings"], start + column["strings"])
+        if column["type"] == "list":
+            columns[name] = ListColumn(buffer, start + column["lists"], column["length"], strings)
+        else:
+            columns[name] = strings
+
+    return {"header": header, "columns": columns}
+
+if __name__ == "__main__":
+    print("Module with functions to save the reference data as binary files running as main.")
+    print("Running tests...")
+
+    import tempfile
+    path_test_folder = tempfile.mkdtemp()
+
+    ##################################################################################
+    print("Tests for write_artifact and load_artifact functions:")
+
+    print("Test 1")
+    path_test_artifact = os.path.join(path_test_folder, "test.refart")
+    write_artifact(path_test_artifact, {
+        "name": ["Northwestern University", "Universidad de Córdoba", ""],
+        "domains": [["northwestern.edu", "nu.edu"], [], ["x.org"]],
+        "key": ["a", "b"]
+        }, "v1")
+    artifact = load_artifact(path_test_artifact, "v1")
+    print(artifact["header"]["columns"])
+    assert list(artifact["columns"]["name"]) == ["Northwestern University", "Universidad de Córdoba", ""]
+    assert list(artifact["columns"]["domains"]) == [["northwestern.edu", "nu.edu"], [], ["x.org"]]
+    assert artifact["columns"]["name"][-1] == ""
+    assert artifact["columns"]["name"][1:] == ["Universidad de Córdoba", ""]
+    assert len(artifact["columns"]["key"]) == 2
+
+    print("Test 2")
+    assert load_artifact(path_test_artifact, "v2") == None
+    assert load_artifact(os.path.join(path_test_folder, "missing.refart")) == None
+
+    print("Test 3")
+    path_test_source = os.path.join(path_test_folder, "source.csv")
+    with open(path_test_source, "w") as file:
+        file.write("city\nEvanston\n")
+    write_artifact(path_test_artifact, {"city": ["Evanston"]}, "v1", get_source_info(path_test_source))
+    assert load_artifact(path_test_artifact, "v1", path_test_source) != None
+    with open(path_test_source, "a") as file:
+        file.write("Chicago\n")
+    assert load_artifact(path_test_artifact, "v1", path_test_source) == None
+
+    print("Test 4")
+    try:
+        write_artifact(path_test_artifact, {"city": ["Evanston", None]}, "v1")
+        assert False
+    except TypeError:
+        pass
+
+    ##################################################################################
+    print("Tests for Records and SortedMapping classes:")
+
+    print("Test 1")
+    write_artifact(path_test_artifact, {"name": ["A", "B"], "domains": [["a.edu"], ["b.edu", "b.org"]]}, "v1")
+    records = Records(load_artifact(path_test_artifact)["columns"])
+    print(list(records))
+    assert list(records) == [{"name": "A", "domains": ["a.edu"]}, {"name": "B", "domains": ["b.edu", "b.org"]}]
+
+    print("Test 2")
+    hosts = {"nu.edu": "Northwestern University", "a.org": "A", "z.com": "Z"}
+    write_artifact(path_test_artifact, {"host": sorted(hosts), "name": [hosts[host] for host in sorted(hosts)]}, "v1")
+    columns = load_artifact(path_test_artifact)["columns"]
+    mapping = SortedMapping(columns["host"], columns["name"])
+    print(dict(mapping))
+    assert dict(mapping) == hosts
+    assert mapping.get("nu.edu") == "Northwestern University"
+    assert mapping.get("b.org") == None
+
+    ##################################################################################
+    print("All tests passed.")
@@ -0,0 +1,137 @@
+# Script with functions to find many strings in a text at once (Aho-Corasick automaton)
+# Emilio Lehoucq
+
+# Checking whether each of thousands of names is in a text means going over the text once per name. The
+# automaton goes over the text once and finds all the names in it at the same time.
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def build_automaton(patterns):
+    """
+    Function to build an automaton to find several strings (patterns) in a text.
+
+    Input:
+    - patterns (list): strings to find (empty strings are ignored).
+
+    Output:
+    - automaton (dict): automaton to use with find_patterns:
+        - "goto": for each state, dictionary character: next state
+        - "fail": for each state, state to go when the next character doesn't continue the current match
+        - "pattern": for each state, index of the pattern that ends in that state (-1 if none)
+        - "output": for each state, next state in the fail chain where a pattern ends (0 if none)
+    """
+    # Check that the patterns are strings
+    if not all(isinstance(pattern, str) for pattern in patterns):
+        raise TypeError("Patterns must be strings.")
+
+    goto = [{}]
+    pattern_state = [-1]
+
+    # Trie of the patterns
+    for i, pattern in enumerate(patterns):
+        if not pattern:
+            continue
+        state = 0
+        for character in pattern:
+            next_state = goto[state].get(character)
+            if next_state is None:
+                next_state = len(goto)
+                goto[state][character] = next_state
+                goto.append({})
+                pattern_state.append(-1)
+            state = next_state
+
+        # If the same pattern is repeated, keep the first one
+        if pattern_state[state] == -1:
+            pattern_state[state] = i
+
+    # Fail and output links, in breadth-first order (the links of a state use the ones of shorter states)
+    fail = [0] * len(goto)
+    output = [0] * len(goto)
+    queue = list(goto[0].values())
+    for state in queue:
+        for character, next_state in goto[state].items():
+            queue.append(next_state)
+
+            # Longest proper suffix of the match that is also in the trie
+            fail_state = fail[state]
+            while fail_state and character not in goto[fail_state]:
+                fail_state = fail[fail_state]
+            fail_state = goto[fail_state].get(character, 0)
+            fail[next_state] = fail_state if fail_state != next_state else 0
+
+            # Nearest state in the fail chain where a pattern ends
+            output[next_state] = fail[next_state] if pattern_state[fail[next_state]] != -1 else output[fail[next_state]]
+
+    return {"goto": goto, "fail": fail, "pattern": pattern_state, "output": output}
+
+def find_patterns(automaton, text):
+    """
+    Function to find which patterns of an automaton are in a text (anywhere, as substrings).
+
+    Inputs:
+    - automaton (dict): automaton built with build_automaton.
+    - text (str): text to search.
+
+    Output:
+    - found (set): indexes of the patterns in the text.
+    """
+    # Check that the text is a string
+    if not isinstance(text, str):
+        raise TypeError("Text must be a string.")
+
+    goto = automaton["goto"]
+    fail = automaton["fail"]
+    pattern_state = automaton["pattern"]
+    output = automaton["output"]
+
+    found = set()
+    state = 0
+    for character in text:
+
+        # Follow the fail links until the character continues a match (or we're back at the root)
+        while state and character not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(character, 0)
+
+        # Patterns ending here
+        match_state = state if pattern_state[state] != -1 else output[state]
+        while match_state:
+            found.add(pattern_state[match_state])
+            match_state = output[match_state]
+
+    return found
+
+if __name__ == "__main__":
+    print("Module with functions to find many strings in a text running as main.")
+    print("Running tests...")
+
+    ##################################################################################
+    print("Tests for build_automaton and find_patterns functions:")
+
+    print("Test 1")
+    automaton = build_automaton(["he", "she", "his", "hers"])
+    print(find_patterns(automaton, "ushers"))
+    assert find_patterns(automaton, "ushers") == {0, 1, 3}
+
+    print("Test 2")
+    print(find_patterns(automaton, ""))
+    assert find_patterns(automaton, "") == set()
+
+    print("Test 3")
+    automaton = build_automaton(["northwestern university", "university", "", "northwestern university"])
+    print(find_patterns(automaton, "jobs at northwestern university in evanston"))
+    assert find_patterns(automaton, "jobs at northwestern university in evanston") == {0, 1}
+
+    print("Test 4")
+    # Same result as checking each pattern on random texts
+    import random
+    rng = random.Random(0)
+    for _ in range(300):
+        patterns = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 15))]
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+        expected = {patterns.index(pattern) for pattern in patterns if pattern in text}
+        assert find_patterns(build_automaton(patterns), text) == expected
+
+    ##################################################################################
+    print("All tests passed.")
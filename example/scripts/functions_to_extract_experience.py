@@ -3,35 +3,49 @@
 
 ######################################### IMPORTING LIBRARIES #########################################
 import re
+from functions_to_extract_skills import CHARACTERS_CASE_SPECIAL
+
+######################################### PARAMETERS #########################################
+# Dictionary to map word numbers to digits
+word_to_num = {
+    "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", 
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+    "eleven": "11", "twelve": "12", "thirteen": "13", "fourteen": "14",
+    "fifteen": "15", "sixteen": "16", "seventeen": "17", "eighteen": "18",
+    "nineteen": "19", "twenty": "20"
+}
+
+# Regex to match numbers 1-20 and ranges (compiled once)
+pattern_years = re.compile(r"\b(?:20|1[0-9]|[1-9])\s?(?:to|-|–)\s?(?:20|1[0-9]|[1-9])\b|" \
+                           r"\b(?:20|1[0-9]|[1-9])\b|" \
+                           r"\b(?:one|two|three|four|five|six|seven|eight|nine|ten|" \
+                           r"eleven|twelve|thirteen|fourteen|fifteen|sixteen|" \
+                           r"seventeen|eighteen|nineteen|twenty)\b", re.IGNORECASE)
+
+# Same regex without ignoring the case, for texts already lowercased (see find_years_experience)
+pattern_years_lower = re.compile(pattern_years.pattern)
 
 ######################################### FUNCTION DEFINITIONS #########################################
 
-def extract_years_experience(text, char_after=50):
+def find_years_experience(text, char_after=50):
     """
-    Function to extract years of experience from job postings.
+    Function to find the years of experience in a text (without checking the input, see extract_years_experience).
 
     Input: 
         text (str) - Text of a job posting.
+        char_after (int) - Number of characters after the number where "year" and "experience" must be.
     Output: 
         years_experience (list of str) - List of years of experience.
     """
-    # Dictionary to map word numbers to digits
-    word_to_num = {
-        "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", 
-        "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
-        "eleven": "11", "twelve": "12", "thirteen": "13", "fourteen": "14",
-        "fifteen": "15", "sixteen": "16", "seventeen": "17", "eighteen": "18",
-        "nineteen": "19", "twenty": "20"
-    }
-    # Regex to match numbers 1-20 and ranges
-    pattern = r"\b(?:20|1[0-9]|[1-9])\s?(?:to|-|–)\s?(?:20|1[0-9]|[1-9])\b|" \
-              r"\b(?:20|1[0-9]|[1-9])\b|" \
-              r"\b(?:one|two|three|four|five|six|seven|eight|nine|ten|" \
-              r"eleven|twelve|thirteen|fourteen|fifteen|sixteen|" \
-              r"seventeen|eighteen|nineteen|twenty)\b"
-
-    # Find all matches
-    matches = re.finditer(pattern, text, re.IGNORECASE)
+    # "year" and "experience" must be after the number, so if they're not in the text there's nothing to find
+    if "year" not in text or "experience" not in text:
+        return []
+
+    # Find all matches (in the text lowercased, which is faster, unless it has any of the characters for which that isn't the same)
+    if not any(character in text for character in CHARACTERS_CASE_SPECIAL):
+        matches = pattern_years_lower.finditer(text.lower())
+    else:
+        matches = pattern_years.finditer(text)
 
     # List to store years of experience
     years_experience = []
@@ -60,6 +74,38 @@ def extract_years_experience(text, char_after=50):
 
     return sorted(set(years_experience))
 
+def extract_years_experience(text, char_after=50):
+    """
+    Function to extract years of experience from job postings.
+
+    Input: 
+        text (str) - Text of a job posting.
+    Output: 
+        years_experience (list of str) - List of years of experience.
+    """
+    # Check that the input is a string
+    if not isinstance(text, str):
+        raise TypeError("Input must be a string.")
+
+    return find_years_experience(text, char_after)
+
+def extract_years_experience_batch(texts, char_after=50):
+    """
+    Function to extract years of experience from many job postings (see extract_years_experience).
+
+    Input: 
+        texts (list or pandas Series of str) - Texts of job postings.
+        char_after (int) - Number of characters after the number where "year" and "experience" must be.
+    Output: 
+        years_experience (list of lists of str) - List of years of experience of each text.
+    """
+    # Check that the inputs are strings
+    texts = list(texts)
+    if not all(isinstance(text, str) for text in texts):
+        raise TypeError("Inputs must be strings.")
+
+    return [find_years_experience(text, char_after) for text in texts]
+
 if __name__ == "__main__":
     print("Module to extract experience from job postings running as main script.")
     print("Running tests...")
@@ -107,5 +153,22 @@ if __name__ == "__main__":
     print(extract_years_experience(text))
     assert extract_years_experience(text) == []
 
+    ##################################################################################
+    print("Tests for extract_years_experience_batch function:")
+
+    print("Test 1")
+    texts = ["The candidate must have 3 years of experience.", "The candidate must have 1-2 year of experience.",
+             "The candidate must have 200 years of experience.", "Three YEARS of experience", "Five years of experience at \u0130stanbul University", ""]
+    print(extract_years_experience_batch(texts))
+    assert extract_years_experience_batch(texts) == [extract_years_experience(text) for text in texts]
+    assert extract_years_experience_batch(texts) == [["3"], ["1-2"], [], [], ["5"], []]
+
+    print("Test 2")
+    try:
+        extract_years_experience_batch(["3 years of experience", None])
+        assert False
+    except TypeError:
+        pass
+
     ##################################################################################
     print("All tests passed.")
\ No newline at end of file
@@ -13,10 +13,31 @@ else:
 path_prompt = "job_title.txt"
 
 ######################################### READING DATA #########################################
-prompt = open(path_prompts_folder + path_prompt, "r").read()
+# Read the first time it's needed (see get_prompt)
+prompt = None
 
 ######################################### FUNCTION DEFINITIONS #########################################
 
+def get_prompt():
+    """
+    Function to get the prompt (reading it the first time).
+
+    Output:
+    - prompt (str): prompt.
+    """
+    global prompt
+    if prompt is None:
+        prompt = open(path_prompts_folder + path_prompt, "r").read()
+    return prompt
+
+def warm_up():
+    """
+    Function to read the prompt now instead of the first time it's needed (e.g., before starting the workers).
+
+    Output: None
+    """
+    get_prompt()
+
 def extract_job_title(text):
     """
     Function to extract the job title from a job posting text.
@@ -32,7 +53,7 @@ def extract_job_title(text):
         raise ValueError("Input must be a string.")
     
     # Get response from model
-    return get_response_full_process(prompt, text, 5, 5, 10, 0.5)
+    return get_response_full_process(get_prompt(), text, 5, 5, 10, 0.5, single_request=True, early_stopping=True)
 
 if __name__ == "__main__":
     print("Module to extract job title from job postings running as main script.")
@@ -3,9 +3,10 @@
 
 ######################################### IMPORTING LIBRARIES #########################################
 import os
-import pandas as pd
 import re
 from functions_azure import get_response_full_process
+from functions_metrics import record_time, record_resolved
+from functions_reference_artifacts import path_artifacts_folder, load_artifact
 
 ######################################### PATHS #########################################
 if os.environ.get("PIPELINE_RUN", "0") == "1":
@@ -17,53 +18,392 @@ else:
 path_data_us_cities = "uscities_processed.csv"
 path_data_university_cities = "university_cities.csv"
 path_prompt = "location.txt"
+path_artifact_us_cities = "uscities.refart"
 
 ######################################### READING DATA #########################################
-us_cities = pd.read_csv(path_processed_data_folder + path_data_us_cities)
-cities = us_cities["city"].tolist()
-cities_ascii = us_cities['city_ascii'].to_list()
-state_abbreviations = us_cities["state_id"].tolist()
-state_full_name = us_cities["state_name"].tolist()
-assert len(cities) == len(cities_ascii) == len(state_abbreviations) == len(state_full_name), "Lengths of lists do not match."
-# # Commenting this out because I'm not searching only for cities
-# university_cities = pd.read_csv(path_processed_data_folder + path_data_university_cities)
-# university_cities = university_cities["city"].unique().tolist()
-prompt = open(path_prompts_folder + path_prompt, "r").read()
+# Read the first time they're needed (see get_us_cities, get_university_cities, get_prompt and warm_up)
+us_cities = None
+university_cities = None
+prompt = None
 
 ######################################### REGULAR EXPRESSIONS #########################################
 
-# 1) Regex for all US cities
+# 1) Index of all US city, state combinations (built the first time it's needed, see get_city_state_index)
+# It replaces a regex with all the combinations joined with "|", which tried every combination at each position of the text
+city_state_index = None
+
+# Number of characters of the beginning of the cities used to look them up
+city_prefix_length = 3
 
-# Precompile patterns
 common_pattern = r"[.,:;!?'\"(){}\[\]\-\—_…\s]"
 
-# Build regex for all city, state combinations
-city_state_patterns = [
-    fr"{re.escape(city)}(?:,\s|\s){re.escape(state)}"
-    for city, state in zip(cities_ascii, state_full_name)
-] + [
-    fr"{re.escape(city)}(?:,\s|\s){re.escape(state)}"
-    for city, state in zip(cities, state_abbreviations)
-]
+# 2) Index of the cities alone and the states alone (built the first time it's needed, see get_place_index)
+# Matching them with a regex per city was slow and matched too many false positives (University, Institute, etc.),
+# so the index leaves out city names that are common words and the mentions are ranked (see rank_places)
+place_index = None
+
+# Characters around a city or state alone (it has to be a whole word)
+boundary_characters = set(".,:;!?'\"(){}[]-—_…")
+
+# Cities that are common words (in job postings) and state abbreviations that are common words or abbreviations
+stop_words_cities = [
+    "University", "College", "Institute", "Campus", "Research", "Science", "Health", "Energy", "Industry", "Commerce",
+    "Opportunity", "Success", "Progress", "Enterprise", "Security", "Liberty", "Justice", "Independence", "Union",
+    "Center", "Central", "Mission", "Hospital", "Medical", "Lab", "Laboratory", "Data", "Manager", "Director",
+    "Professor", "Office", "Remote", "Hybrid", "Home", "Friendship", "Harmony", "Unity", "Freedom", "Victory",
+    "Hope", "Faith", "Providence", "Paradise", "Eden", "Bonus", "Salary", "Benefits", "Equity", "Diversity",
+    "Inclusion", "Excellence", "Summit", "Pioneer", "Columbia", "Princeton", "Stanford", "Harvard", "Cornell",
+    "Duke", "Temple", "Vanderbilt", "Rice", "Auburn", "Clemson", "Purdue", "Baylor"
+    ]
+stop_words_states = ["IN", "OR", "ME", "OK", "HI", "ID", "CO", "DE", "AL", "LA", "MD", "MS", "PA", "MA", "GA", "SC", "NE", "AS", "MT", "VA", "WA", "PR"]
+
+# Cities shorter than this are left out (too many false positives)
+min_length_city = 4
+
+# Scores of the mentions (see rank_places)
+score_header = 2 # Mention after a "Location" header
+score_state_nearby = 2 # City with one of its states nearby
+score_university_city = 1 # City with a university
+score_mention = 0.5 # Each other mention of the same place (up to max_score_mentions)
+max_score_mentions = 1
+min_score_place = 3 # Minimum score to use the place (otherwise, the LLM is used)
+
+# Number of characters after a header or around a city where the header or the state count
+window_header = 100
+window_state = 50
+
+# "Location" headers (e.g., "Location:", "Job Location -")
+location_header_regex = re.compile(r"\b(?:job\s+)?locations?\b\s*[:\-–—]?", re.IGNORECASE)
 
-# # Commenting this out because 1) it slows down the script and 2) introduces more errors than it solves because it
-# # matches too many false positives (University, Institute, etc.). There could be a way to deal with this (e.g., 
-# # deleting city names that are common words), but leaving it aside for now to try other alternatives.
-# # Build regex for just cities and states
-# city_only_patterns = [fr"(?<={common_pattern}){re.escape(city)}(?={common_pattern})" for city in cities_ascii + cities]
-# state_only_patterns = [fr"(?<={common_pattern}){re.escape(state)}(?={common_pattern})" for state in state_full_name + state_abbreviations]
+######################################### FUNCTION DEFINITIONS #########################################
 
-# Combine all patterns into a single regex
-full_pattern = "|".join(city_state_patterns)
-# full_pattern = "|".join(city_state_patterns + city_only_patterns + state_only_patterns)
+def get_us_cities():
+    """
+    Function to get the US cities (reading them the first time).
 
-# # 2) Regex for university cities
+    They're read from the artifact if it's there and up to date (see build_reference_artifacts.py), and from the CSV otherwise.
 
-# # Commenting this out since I'm not searching only for cities
-# city_only_patterns_university_cities = [fr"(?<={common_pattern}){re.escape(city)}(?={common_pattern})" for city in university_cities]
-# full_pattern_university_cities = "|".join(city_only_patterns_university_cities)
+    Output:
+    - us_cities (dict): "city", "city_ascii", "state_id" and "state_name" of the cities (lists of the same length).
+    """
+    global us_cities
+    if us_cities is None:
+        artifact_us_cities = load_artifact(path_artifacts_folder + path_artifact_us_cities, path_source=path_processed_data_folder + path_data_us_cities)
+        if artifact_us_cities is not None:
+            new_us_cities = {column: artifact_us_cities["columns"][column] for column in ["city", "city_ascii", "state_id", "state_name"]}
+        else:
+            import pandas as pd
+            data_us_cities = pd.read_csv(path_processed_data_folder + path_data_us_cities)
+            new_us_cities = {column: data_us_cities[column].tolist() for column in ["city", "city_ascii", "state_id", "state_name"]}
+        assert len(set(len(values) for values in new_us_cities.values())) == 1, "Lengths of lists do not match."
+        us_cities = new_us_cities
+    return us_cities
+
+def build_city_state_index(us_cities):
+    """
+    Function to build the index of the city, state combinations used by find_city_state.
 
-######################################### FUNCTION DEFINITIONS #########################################
+    The combinations are (city_ascii, state_name) for all cities and then (city, state_id) for all cities. The position
+    of each combination in this order is kept, so that find_city_state gives the same match as the regex
+    "city_1(?:,\\s|\\s)state_1|city_2(?:,\\s|\\s)state_2|...".
+
+    Input:
+    - us_cities (dict): "city", "city_ascii", "state_id" and "state_name" of the cities (see get_us_cities).
+
+    Output:
+    - city_state_index (dict):
+        - "states": for each city, dictionary state: position of the first combination with that city and state
+        - "prefixes": for each beginning of a city (its first city_prefix_length characters), cities that start with it
+        - "prefix_lengths": lengths of the beginnings (shorter for the cities shorter than city_prefix_length)
+    """
+    combinations = list(zip(us_cities["city_ascii"], us_cities["state_name"])) + list(zip(us_cities["city"], us_cities["state_id"]))
+
+    states = {}
+    for position, (city, state) in enumerate(combinations):
+        states.setdefault(city, {}).setdefault(state, position)
+
+    prefixes = {}
+    for city in states:
+        prefixes.setdefault(city[:city_prefix_length], []).append(city)
+
+    return {"states": states, "prefixes": prefixes, "prefix_lengths": sorted({len(prefix) for prefix in prefixes})}
+
+def get_city_state_index():
+    """
+    Function to get the index of the city, state combinations (building it the first time).
+
+    Output:
+    - city_state_index (dict): index (see build_city_state_index).
+    """
+    global city_state_index
+    if city_state_index is None:
+        city_state_index = build_city_state_index(get_us_cities())
+    return city_state_index
+
+def find_city_state(index, text):
+    """
+    Function to find the first city, state combination in a text, going over the text once.
+
+    As with a regex joining the combinations with "|": the match that starts first and, among the ones that start
+    at the same position, the one that comes first in the combinations. The city and the state are separated by
+    ", " or a space (any whitespace).
+
+    Inputs:
+    - index (dict): index of the combinations (see build_city_state_index).
+    - text (str): text to search.
+
+    Output:
+    - match (str): text of the match (None if there's no match).
+    """
+    states = index["states"]
+    prefixes = index["prefixes"]
+    prefix_lengths = index["prefix_lengths"]
+
+    for i in range(len(text)):
+        best_position = None
+        best_end = None
+
+        # Cities that start here
+        for length in prefix_lengths:
+            for city in prefixes.get(text[i:i + length], ()):
+                if not text.startswith(city, i):
+                    continue
+
+                # Separator: ",\s" or "\s"
+                j = i + len(city)
+                if text.startswith(",", j) and text[j + 1:j + 2].isspace():
+                    j += 2
+                elif text[j:j + 1].isspace():
+                    j += 1
+                else:
+                    continue
+
+                # States of the city that come after the separator
+                for state, position in states[city].items():
+                    if (best_position is None or position < best_position) and text.startswith(state, j):
+                        best_position = position
+                        best_end = j + len(state)
+
+        if best_position is not None:
+            return text[i:best_end]
+
+    return None
+
+def get_university_cities():
+    """
+    Function to get the cities with a university in the US (reading them the first time).
+
+    The file is optional (the cities with a university only add to the score of the places, see rank_places):
+    without it, no city counts as a university city.
+
+    Output:
+    - university_cities (set): names of the cities.
+    """
+    global university_cities
+    if university_cities is None:
+        path_university_cities = path_processed_data_folder + path_data_university_cities
+        if os.path.exists(path_university_cities):
+            import pandas as pd
+            university_cities = set(pd.read_csv(path_university_cities)["city"].dropna().unique().tolist())
+        else:
+            print(f"Warning: {path_university_cities} not found, no city counts as a university city (see rank_places).")
+            university_cities = set()
+    return university_cities
+
+def build_place_index(us_cities, university_cities):
+    """
+    Function to build the index of the cities alone and the states alone used by rank_places.
+
+    Inputs:
+    - us_cities (dict): "city", "city_ascii", "state_id" and "state_name" of the cities (see get_us_cities).
+    - university_cities (set): cities with a university.
+
+    Output:
+    - place_index (dict):
+        - "kinds": for each name, "city" or "state" (state for the names that are both, e.g., "New York")
+        - "prefixes": for each beginning of a name (its first city_prefix_length characters), names that start with it
+        - "prefix_lengths": lengths of the beginnings
+        - "states_of_city": for each city, its states (names and abbreviations)
+        - "university_cities": cities with a university
+    """
+    kinds = {}
+    states_of_city = {}
+    for city, city_ascii, state_id, state_name in zip(us_cities["city"], us_cities["city_ascii"], us_cities["state_id"], us_cities["state_name"]):
+        kinds[state_name] = "state"
+        if state_id not in stop_words_states:
+            kinds[state_id] = "state"
+        for name in {city, city_ascii}:
+            states_of_city.setdefault(name, set()).update([state_id, state_name])
+            if len(name) >= min_length_city and name not in stop_words_cities:
+                kinds.setdefault(name, "city")
+
+    prefixes = {}
+    for name in kinds:
+        prefixes.setdefault(name[:city_prefix_length], []).append(name)
+
+    return {"kinds": kinds, "prefixes": prefixes, "prefix_lengths": sorted({len(prefix) for prefix in prefixes}),
+            "states_of_city": states_of_city, "university_cities": set(university_cities)}
+
+def get_place_index():
+    """
+    Function to get the index of the cities alone and the states alone (building it the first time).
+
+    Output:
+    - place_index (dict): index (see build_place_index).
+    """
+    global place_index
+    if place_index is None:
+        place_index = build_place_index(get_us_cities(), get_university_cities())
+    return place_index
+
+def check_boundary(text, i):
+    """
+    Function to check if there's a word boundary at a position of a text (the start, the end, a space or a punctuation mark).
+
+    Inputs:
+    - text (str): text.
+    - i (int): position.
+
+    Output:
+    - is_boundary (bool): whether the character at the position is a boundary.
+    """
+    return i < 0 or i >= len(text) or text[i].isspace() or text[i] in boundary_characters
+
+def find_places(index, text):
+    """
+    Function to find the mentions of cities alone and states alone (as whole words) in a text.
+
+    Inputs:
+    - index (dict): index of the places (see build_place_index).
+    - text (str): text to search.
+
+    Output:
+    - places (list): (position, name, kind) of each mention, in the order of the text.
+    """
+    kinds = index["kinds"]
+    prefixes = index["prefixes"]
+    prefix_lengths = index["prefix_lengths"]
+
+    places = []
+    end = 0
+    for i in range(len(text)):
+        # Only at the beginning of words (and not inside the previous mention, e.g., "York" in "New York")
+        if i < end or not check_boundary(text, i - 1) or check_boundary(text, i):
+            continue
+
+        # Longest name that starts here (e.g., "New York" rather than "York")
+        longest = None
+        for length in prefix_lengths:
+            for name in prefixes.get(text[i:i + length], ()):
+                if (longest is None or len(name) > len(longest)) and text.startswith(name, i) and check_boundary(text, i + len(name)):
+                    longest = name
+        if longest is not None:
+            places.append((i, longest, kinds[longest]))
+            end = i + len(longest)
+
+    return places
+
+def rank_places(index, text):
+    """
+    Function to rank the cities alone and the states alone mentioned in a text by how likely they are the location.
+
+    Each place gets a point and:
+    - score_header if it's mentioned within window_header characters after a "Location" header (only for the states
+      and for the cities with another signal, a state nearby or a university, since many cities are also common words,
+      e.g., "Location: Remote. Mobile app development...")
+    - score_state_nearby if it's a city with one of its states mentioned within window_state characters
+      (then the location is "city, state")
+    - score_university_city if it's a city with a university
+    - score_mention for each other mention (up to max_score_mentions)
+
+    Inputs:
+    - index (dict): index of the places (see build_place_index).
+    - text (str): text to search.
+
+    Output:
+    - candidates (list): dictionaries with "location", "kind", "score" and "position" (of the first mention), from
+      the highest score to the lowest (then cities before states and first mentioned first).
+    """
+    places = find_places(index, text)
+    header_ends = [match.end() for match in location_header_regex.finditer(text)]
+    states = [(position, name) for position, name, kind in places if kind == "state"]
+
+    candidates = {}
+    for position, name, kind in places:
+        candidate = candidates.get(name)
+        if candidate is None:
+            candidate = candidates[name] = {"location": name, "kind": kind, "position": position, "mentions": 0, "header": False, "state": None}
+        candidate["mentions"] += 1
+
+        # After a "Location" header
+        if any(0 <= position - header_end <= window_header for header_end in header_ends):
+            candidate["header"] = True
+
+        # City with one of its states nearby (the nearest one)
+        if kind == "city" and candidate["state"] is None:
+            nearby = [(abs(state_position - position), state) for state_position, state in states
+                      if abs(state_position - position) <= window_state and state in index["states_of_city"].get(name, ())]
+            if nearby:
+                candidate["state"] = min(nearby)[1]
+
+    ranked = []
+    for name, candidate in candidates.items():
+        score = 1 + min(score_mention * (candidate["mentions"] - 1), max_score_mentions)
+        university_city = candidate["kind"] == "city" and name in index["university_cities"]
+        if candidate["header"] and (candidate["kind"] == "state" or candidate["state"] is not None or university_city):
+            score += score_header
+        if candidate["state"] is not None:
+            score += score_state_nearby
+        if university_city:
+            score += score_university_city
+        location = f"{name}, {candidate['state']}" if candidate["state"] is not None else name
+        ranked.append({"location": location, "kind": candidate["kind"], "score": score, "position": candidate["position"]})
+
+    return sorted(ranked, key=lambda candidate: (-candidate["score"], candidate["kind"] != "city", candidate["position"]))
+
+def extract_city_or_state(text):
+    """
+    Function to extract a city alone or a state alone from a job posting text (when there's no city, state combination).
+
+    Input:
+    - text (str): text of the job posting.
+
+    Output:
+    - location (str): location extracted from the job posting or None if no place has at least min_score_place.
+    """
+    # Validate input
+    if not isinstance(text, str):
+        raise ValueError("Input must be a string.")
+
+    with record_time("location_city_or_state"):
+        candidates = rank_places(get_place_index(), text)
+    if candidates and candidates[0]["score"] >= min_score_place:
+        record_resolved("location", "location_city_or_state")
+        return candidates[0]["location"]
+    return None
+
+def get_prompt():
+    """
+    Function to get the prompt (reading it the first time).
+
+    Output:
+    - prompt (str): prompt.
+    """
+    global prompt
+    if prompt is None:
+        prompt = open(path_prompts_folder + path_prompt, "r").read()
+    return prompt
+
+def warm_up():
+    """
+    Function to read the data and the prompt and build the index now instead of the first time they're needed
+    (e.g., before starting the workers).
+
+    Output: None
+    """
+    get_prompt()
+    get_city_state_index()
+    get_place_index()
 
 def extract_location(text):
     """
@@ -79,19 +419,52 @@ def extract_location(text):
     if not isinstance(text, str):
         raise ValueError("Input must be a string.")
     
+    # 1) and 2) Using the list of US cities
+    location = extract_location_without_llm(text)
+    if location:
+        return location
+
+    # 3) Use LLM
+    return extract_location_with_llm(text)
+
+def extract_location_without_llm(text):
+    """
+    Function to extract location from a job posting text without LLM.
+
+    Input:
+    - text (str): text of the job posting.
+
+    Output:
+    - location (str): location extracted from the job posting or None if not found.
+    """
     # 1) Using list of US cities, search for city, state combinations
     location = extract_uscities(text)
     if location:
         return location
 
-    # # Commenting this out because it didn't improve the accuracy and, particularly bad, added a lot of false positives
-    # # 2) Using list of cities where there are universities in the US, search for only city or state
-    # location = extract_university_cities(text)
-    # if location:
-    #     return location
+    # 2) Search for only city or state, keeping the most likely one
+    # (before, this added a lot of false positives; now common words are left out and the mentions are ranked)
+    return extract_city_or_state(text)
 
-    # 3) Use LLM
-    return get_response_full_process(prompt, text, 5, 5, 10, 0.5)
+def extract_location_with_llm(text):
+    """
+    Function to extract location from a job posting text using LLM.
+
+    Input:
+    - text (str): text of the job posting.
+
+    Output:
+    - location (str): location extracted from the job posting.
+    """
+    # Raise an error if the input is not a string
+    if not isinstance(text, str):
+        raise ValueError("Input must be a string.")
+    
+    with record_time("location_llm"):
+        location = get_response_full_process(get_prompt(), text, 5, 5, 10, 0.5, early_stopping=True)
+    record_resolved("location", "location_llm")
+
+    return location
 
 def extract_uscities(text):
     """
@@ -110,36 +483,89 @@ def extract_uscities(text):
         raise ValueError("Input must be a string.")
 
     # Search the text once
-    match = re.search(full_pattern, text)
+    with record_time("location_uscities"):
+        match = find_city_state(get_city_state_index(), text)
     if match:
-        return match.group()
+        record_resolved("location", "location_uscities")
+        return match
     return None
 
-# Commenting this out because I'm not searching only for cities
-# def extract_university_cities(text):
-#     """
-#     Function to extract university cities from a job posting text.
-
-#     Input:
-#     - text (str): Text of the job posting.
-
-#     Output:
-#     - location (str): Location extracted from the job posting or None if not found.
-#     """
-#     # Validate input
-#     if not isinstance(text, str):
-#         raise ValueError("Input must be a string.")
-    
-#     # Search the text
-#     match = re.search(full_pattern_university_cities, text)
-#     if match:
-#         return match.group()
-#     return None
-
 if __name__ == "__main__":
     print("Module to extract location from job postings running as main script.")
     print("Running tests...")
 
+    ##################################################################################
+    print("Tests for find_city_state function:")
+
+    print("Test 1")
+    us_cities_test = {"city": ["Evanston", "Saint Louis", "Springfield", "Springfield"], "city_ascii": ["Evanston", "Saint Louis", "Springfield", "Springfield"],
+                      "state_id": ["IL", "MO", "IL", "MA"], "state_name": ["Illinois", "Missouri", "Illinois", "Massachusetts"]}
+    index_test = build_city_state_index(us_cities_test)
+    print(find_city_state(index_test, "Offices in Saint Louis, MO and Evanston, Illinois."))
+    assert find_city_state(index_test, "Offices in Saint Louis, MO and Evanston, Illinois.") == "Saint Louis, MO"
+    assert find_city_state(index_test, "Springfield Massachusetts") == "Springfield Massachusetts"
+    assert find_city_state(index_test, "Springfield,Illinois") == None
+    assert find_city_state(index_test, "") == None
+
+    print("Test 2")
+    # Same match as the regex joining all the combinations, on random texts
+    import random
+    rng = random.Random(0)
+    for _ in range(300):
+        names = ["".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(8)]
+        us_cities_test = {"city": names[:4], "city_ascii": names[4:], "state_id": [rng.choice(["a", "ab", "b"]) for _ in range(4)],
+                          "state_name": [rng.choice(["ba", "a", "bab"]) for _ in range(4)]}
+        pattern = "|".join([fr"{re.escape(city)}(?:,\s|\s){re.escape(state)}" for city, state in zip(us_cities_test["city_ascii"], us_cities_test["state_name"])] +
+                           [fr"{re.escape(city)}(?:,\s|\s){re.escape(state)}" for city, state in zip(us_cities_test["city"], us_cities_test["state_id"])])
+        text = "".join(rng.choice(["a", "b", ",", " ", "\n", "\xa0"]) for _ in range(rng.randint(0, 30)))
+        match = re.search(pattern, text)
+        assert find_city_state(build_city_state_index(us_cities_test), text) == (match.group() if match else None)
+
+    ##################################################################################
+    print("Tests for get_university_cities function:")
+
+    print("Test 1")
+    # Without the file, no city counts as a university city
+    path_data_university_cities_test, path_data_university_cities = path_data_university_cities, "missing_university_cities.csv"
+    university_cities_test, university_cities = university_cities, None
+    print(get_university_cities())
+    assert get_university_cities() == set()
+    path_data_university_cities, university_cities = path_data_university_cities_test, university_cities_test
+
+    ##################################################################################
+    print("Tests for rank_places function:")
+
+    us_cities_test = {"city": ["Evanston", "Chicago", "York", "New York", "Research", "Springfield", "Mobile", "Normal"],
+                      "city_ascii": ["Evanston", "Chicago", "York", "New York", "Research", "Springfield", "Mobile", "Normal"],
+                      "state_id": ["IL", "IL", "PA", "NY", "CA", "MA", "AL", "IL"],
+                      "state_name": ["Illinois", "Illinois", "Pennsylvania", "New York", "California", "Massachusetts", "Alabama", "Illinois"]}
+    index_test = build_place_index(us_cities_test, {"Evanston"})
+
+    print("Test 1")
+    text = "Job Location: Evanston. Apply by email."
+    print(rank_places(index_test, text))
+    assert rank_places(index_test, text)[0] == {"location": "Evanston", "kind": "city", "score": 4, "position": 14}
+
+    print("Test 2")
+    text = "Our lab in Chicago (a great city in Illinois) does Research."
+    print(rank_places(index_test, text))
+    assert [candidate["location"] for candidate in rank_places(index_test, text)] == ["Chicago, Illinois", "Illinois"]
+
+    print("Test 3")
+    # Whole words only, the longest name and no stop words
+    text = "Chicagoland offices in New York. Research at Evanstonian labs."
+    print(rank_places(index_test, text))
+    assert [candidate["location"] for candidate in rank_places(index_test, text)] == ["New York"]
+    assert rank_places(index_test, "Springfield")[0]["score"] < min_score_place
+
+    print("Test 4")
+    # A city after a "Location" header isn't enough alone (it can be a common word)
+    for text in ["Location: Remote. Mobile app development experience required.", "Job location: Normal operations require on-call."]:
+        print(rank_places(index_test, text))
+        assert rank_places(index_test, text)[0]["score"] < min_score_place
+    assert rank_places(index_test, "Job location: Normal, Illinois.")[0] == {"location": "Normal, Illinois", "kind": "city", "score": 5, "position": 14}
+    assert rank_places(index_test, "Location: Illinois (hybrid).")[0]["score"] >= min_score_place
+
     ##################################################################################
     print("Tests for extract_location function:")
 
@@ -209,18 +635,22 @@ if __name__ == "__main__":
     # assert extract_uscities(text) == "IL"
 
     ##################################################################################
-    # # Commenting this out because I'm not searching only for cities
-    # print("Tests for extract_university_cities function:")
+    print("Tests for extract_city_or_state function:")
 
-    # print("Test 1")
-    # text = ""
-    # print(extract_university_cities(text))
-    # assert extract_university_cities(text) == None
+    print("Test 1")
+    text = ""
+    print(extract_city_or_state(text))
+    assert extract_city_or_state(text) == None
+
+    print("Test 2")
+    text = "Location: Evanston (main campus). Northwestern University is in Illinois."
+    print(extract_city_or_state(text))
+    assert extract_city_or_state(text) == "Evanston, Illinois"
 
-    # print("Test 2")
-    # text = "The position is in Evanston IL."
-    # print(extract_university_cities(text))
-    # assert extract_university_cities(text) == "Evanston"
+    print("Test 3")
+    for text in ["Location: Remote. Mobile app development experience required.", "Job location: Normal operations require on-call."]:
+        print(extract_city_or_state(text))
+        assert extract_city_or_state(text) == None
 
     ##################################################################################
     print("All tests passed.")
\ No newline at end of file
@@ -0,0 +1,318 @@
+# Script with functions to extract several fields from job postings with a single prompt
+# Emilio Lehoucq
+
+######################################### IMPORTING LIBRARIES #########################################
+import json
+import os
+from functions_azure import get_model_responses, get_majority_response, get_answer_part, check_failed_response, get_sample_index_retry
+from functions_metrics import add_count
+
+######################################### PATHS #########################################
+if os.environ.get("PIPELINE_RUN", "0") == "1":
+    path_prompts_folder = "../prompts/"
+else:
+    path_prompts_folder = "prompts/"
+
+# Prompt of each field
+path_prompts = {
+    "job_title": "job_title.txt",
+    "organization": "organization.txt",
+    "location": "location.txt",
+    "education": "education.txt",
+    "visa": "visa.txt"
+    }
+
+######################################### PARAMETERS #########################################
+# First and last lines of the prompts of each field (the combined prompt has its own)
+prompt_first_line = "Below I will provide a job posting."
+prompt_last_line = "Here is the job posting:"
+
+######################################### READING DATA #########################################
+# Read the first time they're needed (see get_prompts)
+prompts = None
+
+######################################### FUNCTION DEFINITIONS #########################################
+
+def get_prompts():
+    """
+    Function to get the prompt of each field (reading them the first time).
+
+    Output:
+    - prompts (dict): prompt of each field.
+    """
+    global prompts
+    if prompts is None:
+        prompts = {field: open(path_prompts_folder + path_prompt, "r").read() for field, path_prompt in path_prompts.items()}
+    return prompts
+
+def warm_up():
+    """
+    Function to read the prompts now instead of the first time they're needed (e.g., before starting the workers).
+
+    Output: None
+    """
+    get_prompts()
+
+def get_instructions_field(prompt):
+    """
+    Function to get the instructions of the prompt of a field (without the first and last lines).
+
+    Input:
+    - prompt (str): prompt of the field.
+
+    Output:
+    - instructions (str): instructions of the field.
+    """
+    # Check if the input is a string
+    if not isinstance(prompt, str):
+        raise TypeError("The prompt must be a string.")
+
+    # Remove the lines that introduce the job posting
+    lines = [line for line in prompt.strip().split("\n") if line.strip() not in [prompt_first_line, prompt_last_line]]
+
+    return "\n".join(lines).strip()
+
+def get_combined_prompt(fields):
+    """
+    Function to get a prompt asking for several fields at once, as a JSON object.
+
+    Input:
+    - fields (list): fields to extract (keys of path_prompts).
+
+    Output:
+    - prompt (str): combined prompt.
+    """
+    # Check the fields
+    if not fields:
+        raise ValueError("There must be at least one field.")
+    for field in fields:
+        if field not in path_prompts:
+            raise ValueError(f"Field {field} is not one of {list(path_prompts)}.")
+
+    # Instructions of each field
+    sections = [f'FIELD "{field}"\n\n' + get_instructions_field(get_prompts()[field]) for field in fields]
+
+    # Format of the answer
+    example = json.dumps({field: "<response for " + field + ">" for field in fields})
+    answer_format = (
+        "Your answer (after \"My answer is:\") must be a JSON object with one key per field and the response for "
+        f"each field as a string, following the instructions of each field. For example: {example}"
+        )
+
+    return "\n\n".join([prompt_first_line, "I want you to extract several fields from it. These are the instructions for each field."] + sections + [answer_format, prompt_last_line])
+
+def get_fields_from_response(response, fields):
+    """
+    Function to get the response for each field from a response of the model to the combined prompt.
+
+    Inputs:
+    - response (str): response from the model.
+    - fields (list): fields in the prompt.
+
+    Output:
+    - fields_response (dict): response for each field (None if the response is not in the correct format).
+    """
+    # Check if the input is a string
+    if not isinstance(response, str):
+        return None
+
+    # JSON response (see functions_azure.response_format_type): the answer is in "answer"
+    if response.strip().startswith("{"):
+        try:
+            fields_response = json.loads(response).get("answer")
+            if isinstance(fields_response, str):
+                fields_response = json.loads(fields_response)
+        except (json.JSONDecodeError, AttributeError):
+            return None
+
+    # Text response: the JSON object after "My answer is:" (as lenient with the format as functions_azure.parse_response)
+    else:
+        answer = get_answer_part(response)
+        if answer is None:
+            return None
+        start = answer.find("{")
+        end = answer.rfind("}")
+        if start == -1 or end < start:
+            return None
+        try:
+            fields_response = json.loads(answer[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+
+    # Check that all the fields are there
+    if not isinstance(fields_response, dict) or any(field not in fields_response for field in fields):
+        return None
+
+    return {field: str(fields_response[field]).strip() for field in fields}
+
+def get_multiple_fields_responses(text, fields, num_retries_failure, num_retries_format, num_responses):
+    """
+    Function to get several responses to the combined prompt, asking again for the ones not in the correct format.
+
+    Inputs:
+    - text (str): text of the job posting.
+    - fields (list): fields to extract.
+    - num_retries_failure (int): number of retries allowed if there's a problem getting the responses.
+    - num_retries_format (int): number of retries to get responses in the correct format.
+    - num_responses (int): number of responses to get.
+
+    Output:
+    - responses (list): list with the response for each field of each response (None for the ones never in the correct format).
+    """
+    # Check if the input text is a string
+    if not isinstance(text, str):
+        raise TypeError("The input text must be a string.")
+
+    user_message = get_combined_prompt(fields) + "\n\n" + text
+
+    # Responses used for voting
+    add_count("samples", num_responses)
+
+    # Initialize list to store the responses
+    responses = [None] * num_responses
+
+    # Iterate over the number of retries
+    for i in range(num_retries_format):
+
+        # Positions of the responses that we still need
+        missing = [j for j, response in enumerate(responses) if response is None]
+        if not missing:
+            break
+
+        # The previous responses in these positions weren't in the correct format
+        if i > 0:
+            add_count("format_retries", len(missing))
+
+        # Get responses for the positions that we still need (all in one request)
+        sample_indexes = [get_sample_index_retry(j, i) for j in missing]
+        new_responses = get_model_responses(user_message, num_retries_failure, len(missing), sample_indexes)
+
+        # Keep the responses in the correct format
+        for j, new_response in zip(missing, new_responses):
+            responses[j] = get_fields_from_response(new_response, fields)
+
+        # The model couldn't give responses: give up (asking again won't help)
+        if any(check_failed_response(response) for response in new_responses):
+            break
+
+    return responses
+
+def extract_multiple_fields(text, fields=None, num_responses=10, prop_majority=0.5):
+    """
+    Function to extract several fields from a job posting text with a single prompt.
+
+    Instead of sending the text once per field, the prompts of the fields are combined in one prompt asking
+    for a JSON object. Then, the majority response is taken for each field.
+
+    Inputs:
+    - text (str): text of the job posting.
+    - fields (list): fields to extract (keys of path_prompts). By default, all of them.
+    - num_responses (int): number of responses to get.
+    - prop_majority (float): proportion of responses that must match.
+
+    Output:
+    - fields_extracted (dict): response for each field (None if there's no majority).
+    """
+    # Raise an error if the input is not a string
+    if not isinstance(text, str):
+        raise ValueError("Input must be a string.")
+
+    # All the fields by default
+    if fields is None:
+        fields = list(path_prompts)
+
+    # Get responses from the model
+    responses = get_multiple_fields_responses(text, fields, 5, 5, num_responses)
+
+    # Majority response for each field (the responses never in the correct format count as problems, as with single fields)
+    return {
+        field: get_majority_response([response[field] if response is not None else "problem_with_response" for response in responses], prop_majority)
+        for field in fields
+        }
+
+if __name__ == "__main__":
+    print("Module to extract several fields from job postings running as main script.")
+    print("Running tests...")
+
+    ##################################################################################
+    print("Tests for get_instructions_field function:")
+
+    print("Test 1")
+    print(get_instructions_field(get_prompts()["organization"]))
+    assert get_instructions_field(get_prompts()["organization"]) == 'Based on the text of the job posting, tell me the hiring organization.\n\nIf the job posting doesn\'t mention the organization, respond "missing".'
+
+    ##################################################################################
+    print("Tests for get_combined_prompt function:")
+
+    print("Test 1")
+    print(get_combined_prompt(["education", "visa"]))
+    assert get_combined_prompt(["education", "visa"]).count(prompt_first_line) == 1
+    assert get_combined_prompt(["education", "visa"]).endswith(prompt_last_line)
+    assert 'FIELD "education"' in get_combined_prompt(["education", "visa"])
+
+    print("Test 2")
+    try:
+        get_combined_prompt(["salary"])
+        assert False
+    except ValueError:
+        pass
+
+    ##################################################################################
+    print("Tests for get_fields_from_response function:")
+
+    print("Test 1")
+    response = 'Reasoning: It says so. My answer is: {"education": "Ph.D.", "location": "St. Louis, MO"}'
+    print(get_fields_from_response(response, ["education", "location"]))
+    assert get_fields_from_response(response, ["education", "location"]) == {"education": "Ph.D.", "location": "St. Louis, MO"}
+
+    print("Test 2")
+    response = 'Reasoning: It says so. My answer is: {"education": "bachelor"}'
+    print(get_fields_from_response(response, ["education", "location"]))
+    assert get_fields_from_response(response, ["education", "location"]) == None
+
+    print("Test 3")
+    response = 'Reasoning: It says so. My answer is: education is bachelor.'
+    print(get_fields_from_response(response, ["education"]))
+    assert get_fields_from_response(response, ["education"]) == None
+
+    print("Test 4")
+    response = '{"reasoning": "It says so.", "answer": {"education": "master", "visa": "no"}}'
+    print(get_fields_from_response(response, ["education", "visa"]))
+    assert get_fields_from_response(response, ["education", "visa"]) == {"education": "master", "visa": "no"}
+
+    print("Test 5")
+    # Without "Reasoning:", in another case and without a space
+    response = 'my answer is:{"education": "master", "visa": "no"}'
+    print(get_fields_from_response(response, ["education", "visa"]))
+    assert get_fields_from_response(response, ["education", "visa"]) == {"education": "master", "visa": "no"}
+    response = 'It says so.\n\nMy Answer Is:\n{\n  "education": "master",\n  "visa": "no"\n}'
+    assert get_fields_from_response(response, ["education", "visa"]) == {"education": "master", "visa": "no"}
+
+    ##################################################################################
+    print("Tests for extract_multiple_fields function:")
+
+    # With the fake server (see fake_azure_openai_server.py), to not send requests to the API
+    import functions_azure
+    import functions_cache
+    from fake_azure_openai_server import start_server, stop_server
+    server, endpoint = start_server(latency_median=0.01, answers={"bachelor degree": '{"education": "bachelor", "visa": "yes", "location": "evanston, il"}'})
+    functions_azure.client = functions_azure.AzureOpenAI(azure_endpoint=endpoint, api_key="fake", api_version=functions_azure.api_version, max_retries=0)
+    functions_cache.set_cache_mode("off")
+
+    print("Test 1")
+    text = "Research Data Scientist at Northwestern University in Evanston, IL. A bachelor degree is required for this position. We sponsor visas."
+    fields_extracted = extract_multiple_fields(text, ["education", "visa", "location"])
+    print(fields_extracted)
+    assert fields_extracted == {"education": "bachelor", "visa": "yes", "location": "evanston, il"}
+
+    print("Test 2")
+    # The answers are never a JSON object with the fields, so they count as problems
+    text = "Research Data Scientist at Northwestern University in Evanston, IL."
+    fields_extracted = extract_multiple_fields(text, ["education", "visa"])
+    print(fields_extracted)
+    assert fields_extracted == {"education": "problem_with_response", "visa": "problem_with_response"}
+
+    stop_server(server)
+
+    ##################################################################################
+    print("All tests passed.")
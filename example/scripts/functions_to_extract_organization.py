@@ -4,30 +4,126 @@
 ######################################### IMPORTING LIBRARIES #########################################
 import json
 import os
-from enrich_world_universities_and_domains import data_world_universities
 from functions_helpers import clean_string
 from functions_azure import get_response_full_process
+from functions_metrics import record_time, record_resolved
+from functions_reference_artifacts import path_artifacts_folder, load_artifact, Records, SortedMapping
+from functions_string_matching import build_automaton, find_patterns
 
 ######################################### PATHS #########################################
 if os.environ.get("PIPELINE_RUN", "0") == "1":
     path_raw_data_folder = "../data/raw/"
+    path_processed_data_folder = "../data/processed/"
     path_prompts_folder = "../prompts/"
 else:
     path_raw_data_folder = "data/raw/"
+    path_processed_data_folder = "data/processed/"
     path_prompts_folder = "prompts/"
 path_data_ror = "v1.56-2024-11-19-ror-data.json"
+path_ror_index = "v1.56-2024-11-19-ror-index.json"
 path_data_national_labs = "national_laboratories.json"
 path_other_research_orgs = "other_research_organizations.json"
 path_prompt = "organization.txt"
+# World universities come from this script (its size and date tell when the artifact is out of date)
+path_data_world_universities = os.path.join(os.path.dirname(os.path.abspath(__file__)), "enrich_world_universities_and_domains.py")
+path_artifacts = {
+    "world_universities": "world_universities.refart",
+    "national_labs": "national_laboratories.refart",
+    "other_research_orgs": "other_research_organizations.refart",
+    "ror": "ror_index.refart"
+    }
 
 ######################################### READING DATA #########################################
-data_ror = json.load(open(path_raw_data_folder + path_data_ror))
-data_national_labs = json.load(open(path_raw_data_folder + path_data_national_labs))
-data_other_research_orgs = json.load(open(path_raw_data_folder + path_other_research_orgs))
-prompt = open(path_prompts_folder + path_prompt, "r").read()
+# Read the first time they're needed (see get_dataset, get_ror_index, get_prompt and warm_up)
+datasets = {}
+prompt = None
+
+######################################### PARAMETERS #########################################
+# Indexes of the domains of each data (see get_domain_index)
+domain_indexes = {}
+
+# Indexes of the names of each data (see get_name_index)
+name_indexes = {}
+
+# Whether to use ROR to get the organization from the URL and from the text (see extract_organization_without_llm)
+use_ror_url = False
+use_ror_text = True
+
+# Whether to also look for the aliases of the ROR organizations in the text
+use_ror_aliases = False
+
+# Index of ROR (loaded the first time it's needed, see get_ror_index)
+ror_index = None
+ror_index_version = 1
+
+# Number of characters of the beginning of the ROR names used to look them up (clean_ror_name only keeps names this long)
+ror_prefix_length = 13
 
 ######################################### FUNCTION DEFINITIONS #########################################
 
+def get_dataset(data_name):
+    """
+    Function to get the data of organizations and their domains (reading it the first time).
+
+    It's read from the artifact if it's there and up to date (see build_reference_artifacts.py), and from the
+    original data otherwise. For ROR, see get_ror_index.
+
+    Inputs:
+        data_name (str): Name of the data ("world_universities", "national_labs" or "other_research_orgs").
+
+    Output:
+        list: Organizations (dictionaries with "name" and "domains").
+    """
+    if data_name in datasets:
+        return datasets[data_name]
+
+    if data_name == "world_universities":
+        artifact = load_artifact(path_artifacts_folder + path_artifacts[data_name], path_source=path_data_world_universities)
+        if artifact is not None:
+            data = Records(artifact["columns"])
+        else:
+            from enrich_world_universities_and_domains import data_world_universities as data
+    elif data_name == "national_labs" or data_name == "other_research_orgs":
+        path_data = path_raw_data_folder + (path_data_national_labs if data_name == "national_labs" else path_other_research_orgs)
+        artifact = load_artifact(path_artifacts_folder + path_artifacts[data_name], path_source=path_data)
+        if artifact is not None:
+            data = Records(artifact["columns"])
+        else:
+            with open(path_data, "r") as file:
+                data = json.load(file)
+    else:
+        raise ValueError(f"Unknown data: {data_name}.")
+
+    # If another thread read it at the same time, keep the first one (the indexes are cached by data)
+    return datasets.setdefault(data_name, data)
+
+def get_prompt():
+    """
+    Function to get the prompt (reading it the first time).
+
+    Output:
+        str: Prompt.
+    """
+    global prompt
+    if prompt is None:
+        prompt = open(path_prompts_folder + path_prompt, "r").read()
+    return prompt
+
+def warm_up():
+    """
+    Function to read the data and the prompt and build the indexes now instead of the first time they're needed
+    (e.g., before starting the workers).
+
+    Output:
+        None
+    """
+    get_prompt()
+    for data_name in ["national_labs", "other_research_orgs", "world_universities"]:
+        get_domain_index(get_dataset(data_name), data_name)
+    get_name_index(get_dataset("world_universities"), None)  # Same key as extract_organization_from_text
+    if use_ror_url or use_ror_text:
+        get_ror_index()
+
 def extract_organization(url, text):
     """
     Function to extract the organization from a job posting.
@@ -40,6 +136,44 @@ def extract_organization(url, text):
     Output:
         str: Name of the organization extracted.
     """
+    # 1) and 2) Get the organization from the URL or the text, using the data
+    organization = extract_organization_without_llm(url, text)
+    if organization:
+        return organization
+    
+    # 3) Using LLM
+    # This can be pretty slow, but hopefully at this point there are few organizations to extract
+    return extract_organization_with_llm(text)
+
+def extract_organization_with_llm(text):
+    """
+    Function to extract the organization from a job posting using LLM.
+
+    Inputs:
+        text (str): Text of the job posting.
+
+    Output:
+        str: Name of the organization extracted.
+    """
+    with record_time("organization_llm"):
+        organization = extract_organization_from_text(text, None, llm=True)
+    record_resolved("organization", "organization_llm")
+
+    return organization
+
+def extract_organization_without_llm(url, text):
+    """
+    Function to extract the organization from a job posting using only the data (without LLM).
+
+    This is the part of extract_organization that doesn't send requests to the model, so it can run in a separate process.
+
+    Inputs:
+        url (str): URL of the job posting.
+        text (str): Text of the job posting.
+
+    Output:
+        str: Name of the organization extracted. Otherwise, None.
+    """
     # Check that URL is a string
     if not isinstance(url, str):
         raise ValueError("URL must be a string.")
@@ -54,54 +188,68 @@ def extract_organization(url, text):
 
     # With data_national_labs
     # This one first because list is short
-    organization_from_url = extract_organization_from_url(url, data_national_labs, "national_labs")
+    with record_time("organization_url"):
+        organization_from_url = extract_organization_from_url(url, get_dataset("national_labs"), "national_labs")
     if organization_from_url:
+        record_resolved("organization", "organization_url")
         return organization_from_url
     
     # With data_other_research_orgs
     # This one second because list is short
-    organization_from_url = extract_organization_from_url(url, data_other_research_orgs, "other_research_orgs")
+    with record_time("organization_url"):
+        organization_from_url = extract_organization_from_url(url, get_dataset("other_research_orgs"), "other_research_orgs")
     if organization_from_url:
+        record_resolved("organization", "organization_url")
         return organization_from_url
     
     # With data_world_universities
     # This one third because list is long
-    organization_from_url = extract_organization_from_url(url, data_world_universities, "world_universities")
+    with record_time("organization_url"):
+        organization_from_url = extract_organization_from_url(url, get_dataset("world_universities"), "world_universities")
     if organization_from_url:
+        record_resolved("organization", "organization_url")
         return organization_from_url
     
-    # # With data_ror
-    # # This slows down the script significantly
-    # # It increases the accuracy by a tiny bit, but also introducing errors
-    # # Not worth it
-    # organization_from_url = extract_organization_from_url(url, data_ror, "ror")
-    # if organization_from_url:
-    #     return organization_from_url
+    # With ROR
+    # It increases the accuracy by a tiny bit, but also introducing errors
+    # With the index it's fast, so it's a matter of accuracy (see use_ror_url)
+    if use_ror_url:
+        with record_time("organization_url_ror"):
+            organization_from_url = extract_organization_from_url(url, None, "ror")
+        if organization_from_url:
+            record_resolved("organization", "organization_url_ror")
+            return organization_from_url
     
     # 2) Get the organization from the text
 
     # With data_world_universities
     # This for sure slows down the script
     # Starting with only US universities would be faster
-    organization_from_text = extract_organization_from_text(text, data_world_universities)
-    if organization_from_text:
-        return organization_from_text
-    
-    # With data_ror
-    # This one second because list is long. It slows down the script even more
-    # It decreases the accuracy by introducing errors. Don't use it.
-    organization_from_text = extract_organization_from_text(text, data_ror, "ror")
+    with record_time("organization_text"):
+        organization_from_text = extract_organization_from_text(text, get_dataset("world_universities"))
     if organization_from_text:
+        record_resolved("organization", "organization_text")
         return organization_from_text
     
-    # 3) Using LLM
-    # This can be pretty slow, but hopefully at this point there are few organizations to extract
-    return extract_organization_from_text(text, None, llm=True)
+    # With ROR
+    # This one second because list is long. With the index it's fast (see get_ror_index)
+    # It decreases the accuracy by introducing errors (see use_ror_text)
+    if use_ror_text:
+        with record_time("organization_text_ror"):
+            organization_from_text = extract_organization_from_text(text, None, "ror")
+        if organization_from_text:
+            record_resolved("organization", "organization_text_ror")
+            return organization_from_text
 
 def extract_organization_from_url(url, data, data_name):
     """
     Function to get an organization name from the URL, if found in the data.
 
+    Instead of checking every domain of every organization, it finds all the domains that are in the URL at once
+    with an automaton of the domains of the data (see get_domain_index). As before, a domain is found anywhere in
+    the URL (e.g., "a.edu" also in "ba.edu"), the longest domain found wins and, if several organizations have that
+    domain, the first one in the data wins.
+
     Inputs:
         url (str): URL of the job posting.
         data (list): List of dictionaries with the data of organizations and their domains.
@@ -115,41 +263,61 @@ def extract_organization_from_url(url, data, data_name):
     
     # Not checking for the data
 
-    # Defining keys
+    # For ROR, the cleaned URL is looked up in the cleaned links (the data is in the index, see get_ror_index)
+    if data_name == "ror":
+        return get_ror_index()["hosts"].get(clean_url(url))
+
+    # Index of the domains of the data (built the first time)
+    domain_index = get_domain_index(data, data_name)
+
+    # Longest domain in the URL (the first one in the data if several are as long)
+    found = find_patterns(domain_index["automaton"], url)
+    if found:
+        best = max(found, key=lambda i: (len(domain_index["domains"][i]), -i))
+        return domain_index["names"][best]
+
+    # An empty domain is in any URL
+    return domain_index["empty_domain_name"]
+
+def get_domain_index(data, data_name):
+    """
+    Function to get an index of the domains of the organizations in the data (built the first time for each data).
+
+    Inputs:
+        data (list): List of dictionaries with the data of organizations and their domains.
+        data_name (str): Name of the data.
+
+    Output:
+        dict: "domains" (all the domains, in the order of the data), "names" (name of the organization of each domain),
+        "automaton" (automaton of the domains, see functions_string_matching.py) and "empty_domain_name" (name of the
+        first organization with an empty domain, None if none).
+    """
+    # Use the index already built for this data
+    if data_name in domain_indexes and domain_indexes[data_name][0] is data:
+        return domain_indexes[data_name][1]
+
+    # Defining keys (ROR has its own index, see get_ror_index)
     if data_name == "world_universities" or data_name == "national_labs" or data_name == "other_research_orgs":
         key_name = "name"
         key_domains = "domains"
-    elif data_name == "ror":
-        key_name = "name"
-        key_domains = "links"
-    
-    # Defining variable to store matches
-    matching_domains = []
+    else:
+        raise ValueError(f"Unknown data: {data_name}.")
 
-    # Iterate over organizations in data
+    domain_index = {"domains": [], "names": [], "empty_domain_name": None}
     for record in data:
-        # Iterate over domains of the organization
         for domain in record[key_domains]:
-            if data_name == "ror":
-                # Clean the URL
-                domain = clean_url(url)
-            # Check if domain is in the URL
-            if domain in url:
-                matching_domains.append(domain)
+            domain_index["domains"].append(domain)
+            domain_index["names"].append(record[key_name])
+            if not domain and domain_index["empty_domain_name"] is None:
+                domain_index["empty_domain_name"] = record[key_name]
+
+    # If the same domain is repeated, the automaton gives the first one (i.e., the first organization with that domain)
+    domain_index["automaton"] = build_automaton(domain_index["domains"])
+
+    domain_indexes[data_name] = (data, domain_index)
+
+    return domain_index
 
-    # If there are matches
-    if matching_domains:
-        # Find the longest match
-        longest_match = max(matching_domains, key=len)
-
-        # Find the organization name corresponding to the longest match
-        for record in data:
-            for domain in record[key_domains]:
-                if data_name == "ror":
-                    domain = clean_url(domain)
-                if domain == longest_match:
-                    return record[key_name]
-                
 def clean_url(url):
     """
     Function to clean a URL.
@@ -217,29 +385,26 @@ def extract_organization_from_text(text, data, data_name=None, llm=False):
     # If LLM is True
     if llm:
         # Use LLM to extract the organization
-        return get_response_full_process(prompt, text, 5, 5, 10, 0.5)
-
-    # Defining variable to store matches
-    matching_names = []
+        return get_response_full_process(get_prompt(), text, 5, 5, 10, 0.5, early_stopping=True)
+
+    # If it's the ROR data (the data is in the index, see get_ror_index)
+    if data_name == "ror":
+        # Check if the (cleaned) names of the organizations are in the text
+        # Not using clean_string here because it led to false matches
+        matching_names = find_ror_names(text)
+    else:
+        # Clean the text once
+        text_clean = clean_string(text)
+        # Checking whether it's not None, because clean_string can return None
+        if not text_clean:
+            return None
+        
+        # Find all the (cleaned) names of the data in the cleaned text at once (see get_name_index)
+        name_index = get_name_index(data, data_name)
+        matches = [match for i in find_patterns(name_index["automaton"], text_clean) for match in name_index["names"][i]]
 
-    # Iterate over organizations in data
-    for record in data:
-        # If it's the ROR data
-        if data_name == "ror":
-            # Clean the name
-            record["name"] = clean_ror_name(record["name"])
-            # Check if the name of the organization is in the text
-            # Not using clean_string here because it led to false matches
-            if str(record["name"]) in text:
-                matching_names.append(record["name"])
-        else:
-            # Check if the name of the organization is in the text
-            record_name_clean = clean_string(record["name"])
-            text_clean = clean_string(text)
-            # Checking whether they're not None, because clean_string can return None
-            if record_name_clean and text_clean:
-                if record_name_clean in text_clean:
-                        matching_names.append(record["name"])
+        # In the order of the data, so that the first of the longest names is returned as when iterating over the data
+        matching_names = [name for _, name in sorted(matches)]
 
     # If there are matches
     if matching_names:
@@ -248,6 +413,142 @@ def extract_organization_from_text(text, data, data_name=None, llm=False):
         # Not fully sure about this assumption
         return max(matching_names, key=len)
 
+def get_name_index(data, data_name):
+    """
+    Function to get an index of the cleaned names of the organizations in the data (built the first time for each data).
+
+    Inputs:
+        data (list): List of dictionaries with the data of organizations.
+        data_name (str): Name of the data.
+
+    Output:
+        dict: "automaton" (automaton of the cleaned names, see functions_string_matching) and "names" (for each
+        cleaned name, list of (position in the data, name) of the organizations with that cleaned name).
+    """
+    # Use the index already built for this data
+    if data_name in name_indexes and name_indexes[data_name][0] is data:
+        return name_indexes[data_name][1]
+
+    # Organizations with each cleaned name
+    names = {}
+    for position, record in enumerate(data):
+        record_name_clean = clean_string(record["name"])
+        # Checking whether it's not None, because clean_string can return None
+        if record_name_clean:
+            names.setdefault(record_name_clean, []).append((position, record["name"]))
+
+    name_index = {"automaton": build_automaton(list(names)), "names": list(names.values())}
+    name_indexes[data_name] = (data, name_index)
+
+    return name_index
+
+def build_ror_index(data):
+    """
+    Function to build the index of the ROR data (what extract_organization_from_url and extract_organization_from_text use).
+
+    Inputs:
+        data (list): ROR data.
+
+    Output:
+        dict: Index with:
+            "version": version of the index
+            "names": cleaned names (see clean_ror_name) in the order of the data
+            "aliases": cleaned aliases, as [cleaned alias, cleaned name of the organization]
+            "hosts": cleaned links (see clean_url): name of the first organization with that link
+    """
+    names = []
+    aliases = []
+    hosts = {}
+    for record in data:
+        name = clean_ror_name(record["name"])
+        for link in record.get("links") or []:
+            hosts.setdefault(clean_url(link), record["name"])
+
+        # Only the names that are long enough (clean_ror_name returns None otherwise)
+        if name is None:
+            continue
+        names.append(name)
+        for alias in record.get("aliases") or []:
+            alias = clean_ror_name(alias)
+            if alias is not None:
+                aliases.append([alias, name])
+
+    return {"version": ror_index_version, "names": names, "aliases": aliases, "hosts": hosts}
+
+def get_ror_index():
+    """
+    Function to get the index of the ROR data, loading it the first time.
+
+    The index is read from its artifact if it's there and up to date (see build_reference_artifacts.py).
+    Otherwise, it's saved in the processed data folder. If it's not there (or it's from another version), it's
+    built from the ROR data and saved, so the ROR data is only read once.
+
+    Output:
+        dict: Index of the ROR data (see build_ror_index), plus "prefixes" (first characters of the names 
+        and aliases: positions in "names" and "aliases").
+    """
+    global ror_index
+
+    if ror_index is not None:
+        return ror_index
+
+    # Load the index or build it
+    index = None
+    artifact = load_artifact(path_artifacts_folder + path_artifacts["ror"], f"ror-index-{ror_index_version}", path_raw_data_folder + path_data_ror)
+    if artifact is not None:
+        columns = artifact["columns"]
+        index = {"version": ror_index_version, "names": columns["names"], "aliases": columns["aliases"],
+                 "hosts": SortedMapping(columns["hosts"], columns["host_names"])}
+    elif os.path.exists(path_processed_data_folder + path_ror_index):
+        with open(path_processed_data_folder + path_ror_index, "r") as file:
+            index = json.load(file)
+    if index is None or index.get("version") != ror_index_version:
+        with open(path_raw_data_folder + path_data_ror, "r") as file:
+            index = build_ror_index(json.load(file))
+        os.makedirs(path_processed_data_folder, exist_ok=True)
+        with open(path_processed_data_folder + path_ror_index, "w") as file:
+            json.dump(index, file)
+
+    # Look-up table of the beginnings of the names (and aliases)
+    prefixes = {}
+    for i, name in enumerate(index["names"]):
+        prefixes.setdefault(name[:ror_prefix_length], []).append(("name", i))
+    for i, (alias, _) in enumerate(index["aliases"]):
+        prefixes.setdefault(alias[:ror_prefix_length], []).append(("alias", i))
+    index["prefixes"] = prefixes
+
+    ror_index = index
+    return ror_index
+
+def find_ror_names(text):
+    """
+    Function to find the names of the ROR organizations in a text (anywhere, as substrings).
+
+    Every name is at least ror_prefix_length characters long, so the text is gone over once and, at each 
+    position, only the names that start with the next ror_prefix_length characters are checked.
+
+    Inputs:
+        text (str): Text to search.
+
+    Output:
+        list: Names found, in the order of the data (the name of the organization for the aliases).
+    """
+    index = get_ror_index()
+    prefixes = index["prefixes"]
+
+    found = set()
+    for i in range(len(text) - ror_prefix_length + 1):
+        for kind, position in prefixes.get(text[i:i + ror_prefix_length], []):
+            if kind == "alias" and not use_ror_aliases:
+                continue
+            candidate = index["names"][position] if kind == "name" else index["aliases"][position][0]
+            if text.startswith(candidate, i):
+                found.add((kind, position))
+
+    # Names first in the order of the data, then the aliases
+    found = sorted(found, key=lambda match: (match[0] != "name", match[1]))
+    return [index["names"][position] if kind == "name" else index["aliases"][position][1] for kind, position in found]
+
 def extract_beginning_text(text, percentage, length):
     """
     Function that returns the maximum of the beginning of a text based on a percentage or a length.
@@ -310,18 +611,18 @@ if __name__ == "__main__":
 
     print("Test 1")
     text = "https://www.it.northwestern.edu/departments/it-services-support/research/research-events.html"
-    print(extract_organization_from_url(text, data_world_universities, "world_universities"))
-    assert extract_organization_from_url(text, data_world_universities, "world_universities") == "Northwestern University"
+    print(extract_organization_from_url(text, get_dataset("world_universities"), "world_universities"))
+    assert extract_organization_from_url(text, get_dataset("world_universities"), "world_universities") == "Northwestern University"
 
     print("Test 2")
     text = ""
-    print(extract_organization_from_url(text, data_world_universities, "world_universities"))
-    assert extract_organization_from_url(text, data_world_universities, "world_universities") == None
+    print(extract_organization_from_url(text, get_dataset("world_universities"), "world_universities"))
+    assert extract_organization_from_url(text, get_dataset("world_universities"), "world_universities") == None
 
     print("Test 3")
     text = "https://talent.stjude.org/careers/jobs/10425?lang=en-us"
-    print(extract_organization_from_url(text, data_ror, "ror"))
-    assert extract_organization_from_url(text, data_ror, "ror") == "St. Jude Children's Research Hospital"
+    print(extract_organization_from_url(text, None, "ror"))
+    assert extract_organization_from_url(text, None, "ror") == "St. Jude Children's Research Hospital"
 
     ##################################################################################
     print("Tests for extract_organization function:")
@@ -399,6 +700,41 @@ if __name__ == "__main__":
     # print(extract_organization(url, text))
     # # this goes to LLM, which said missing
 
+    ##################################################################################
+    print("Tests for extract_organization_without_llm function:")
+
+    print("Test 1")
+    url = "https://jobs.ornl.gov/job/Oak-Ridge-Senior-Research-Software-Engineer-Application-Engineering-TN-37830/898600400/	"
+    text = ""
+    print(extract_organization_without_llm(url, text))
+    assert extract_organization_without_llm(url, text) == "Oak Ridge National Laboratory"
+
+    print("Test 2")
+    url = ""
+    text = "Lehoucq Institute is hiring."
+    print(extract_organization_without_llm(url, text))
+    assert extract_organization_without_llm(url, text) == None
+
+    print("Test 4")
+    text = "https://hr.wisc.edu/pvl/\t"
+    print(extract_organization_from_url(text, get_dataset("world_universities"), "world_universities"))
+    assert extract_organization_from_url(text, get_dataset("world_universities"), "world_universities") == "University of Wisconsin - Madison"
+
+    print("Test 5")
+    data = [{"name": "A", "domains": ["a.edu"]}, {"name": "B", "domains": ["b.a.edu"]}, {"name": "C", "domains": ["a.edu"]}]
+    print(extract_organization_from_url("https://jobs.b.a.edu/1", data, "world_universities"))
+    assert extract_organization_from_url("https://jobs.b.a.edu/1", data, "world_universities") == "B"
+    assert extract_organization_from_url("https://jobs.a.edu/1", data, "world_universities") == "A"
+    assert extract_organization_from_url("https://jobs.ba.edu/1", data, "world_universities") == "A"
+    assert extract_organization_from_url("https://jobs.c.org/1", data, "world_universities") == None
+
+    print("Test 6")
+    data = [{"name": "A", "domains": ["jhu"]}, {"name": "B", "domains": ["apl.edu", "jhuapl.edu/careers"]}]
+    print(extract_organization_from_url("https://careers.jhuapl.edu/1", data, "other_research_orgs"))
+    assert extract_organization_from_url("https://careers.jhuapl.edu/1", data, "other_research_orgs") == "B"
+    assert extract_organization_from_url("https://careers.jhuapl.edu/careers/1", data, "other_research_orgs") == "B"
+    assert extract_organization_from_url("https://www.jhu.edu/1", data, "other_research_orgs") == "A"
+
     ##################################################################################
     print("Tests for clean_url function:")
 
@@ -422,13 +758,24 @@ if __name__ == "__main__":
 
     print("Test 1")
     text = "(35) PhD Research Software Developer/Senior Scientist | Simon Fraser University | LinkedIn"
-    print(extract_organization_from_text(text, data_world_universities))
-    assert extract_organization_from_text(text, data_world_universities) == "Simon Fraser University"
+    print(extract_organization_from_text(text, get_dataset("world_universities")))
+    assert extract_organization_from_text(text, get_dataset("world_universities")) == "Simon Fraser University"
 
     print("Test 2")
     text = "The Alan Turing Institute is great."
-    print(extract_organization_from_text(text, data_ror, "ror"))
-    assert extract_organization_from_text(text, data_ror, "ror") == "The Alan Turing Institute"
+    print(extract_organization_from_text(text, None, "ror"))
+    assert extract_organization_from_text(text, None, "ror") == "The Alan Turing Institute"
+
+    print("Test 3")
+    text = "None of the above. The Alan Turing Institute is great."
+    print(extract_organization_from_text(text, None, "ror"))
+    assert extract_organization_from_text(text, None, "ror") == "The Alan Turing Institute"
+
+    print("Test 4")
+    data = [{"name": "Texas University"}, {"name": "University"}, {"name": "Tech University"}, {"name": "Northwestern University"}]
+    text = "Jobs at Texas University and Tech University."
+    print(extract_organization_from_text(text, data, "test"))
+    assert extract_organization_from_text(text, data, "test") == "Texas University"
 
     # # Commenting this test to not keep sending requests to the API
     # print("Test 3")
@@ -4,6 +4,68 @@
 ######################################### IMPORTING LIBRARIES #########################################
 import re
 
+######################################### PARAMETERS #########################################
+# Keywords indicating that there's salary information
+salary_keywords = ["salary", "compensation", "pay", "remuneration", "wage", "hiring range", "offer"]
+
+# Keywords indicating that there's hourly salary information
+hour_keywords = ["hour", "hr", "/hr"]
+
+# Patterns of the salaries, compiled once (see extract_salary for the order in which they're used)
+salary_regexes = {
+    # $30,000 - $40,000
+    1: re.compile(r'[€£$]\s?\d{1,3}[,.]?\d{3}(?:\.\d{2})?\s?(?:-|–|up to|to|and)\s?[€£$]?\s?\d{1,3}[,.]?\d{3}(?:\.\d{2})?'),
+    # $30k - $40k
+    2: re.compile(r'[€£$]\s?\d{1,3}[kK]?\s?(?:-|–|up to|to|and)\s?[€£$]?\s?\d{1,3}[kK]?'),
+    # 30,000 - 40,000
+    3: re.compile(r'\d{2,3}[,.]?\d{3}(?:\.\d{2})?\s?(?:-|–|up to|to|and)\s?\d{2,3}[,.]?\d{3}(?:\.\d{2})?'),
+    # $30,000
+    4: re.compile(r'[€£$]\s?\d{2,3}[,.]?\d{3}(?:\.\d{2})?'),
+    # 30,000
+    5: re.compile(r'\d{2,3},?\d{3}\.\d{2}'),
+    # $3,000
+    6: re.compile(r'[€£$]\s?\d{1,2}[,.]?\d{3}(?:\.\d{2})?'),
+    # 3,000
+    7: re.compile(r'\d{1,2},?\d{3}\.\d{2}'),
+    # $10 - $20
+    # r'[€£$]\s?\d{2}(?:\.\d{2})?\s?(?!\s?M)\s?(?:-|–|up to|to|and)\s?[€£$]\s?\d{2}(?:\.\d{2})?\s?(?!\s?M)'
+    8: re.compile(r'[€£$]\s?\d{2}(?:\.\d{2})?\s?(?!\s?M)\s?(?:-|–|up to|to|and)\s?[€£$]\s?\d{2}(?:\.\d{2})?(?!\s?M)'),
+    # $10 
+    # r'[€£$]\s?\d{2}(?:\.\d{2})?\b\s?(?!\s?M)'
+    9: re.compile(r'[€£$]\s?\d{2}(?:\.\d{2})?\b(?!\s?M)')
+    }
+
+# Patterns of get_salary_flag
+# Money sign and digits
+flag_regex_money_sign = re.compile(r'[€£$]\s?\d{1,6}')
+# Numbers that look like salary
+flag_regex_numbers = re.compile(r'\b\d{1,3}[,.]?\d{3}\b')
+
+# Structured salaries (see parse_salary)
+# Currency of each money sign
+currencies = {"$": "USD", "€": "EUR", "£": "GBP"}
+
+# Words indicating the period of the salary, as whole words (e.g., not the "hr" of "three" or "through")
+# The short forms only right after a slash or a number (e.g., "$25/hr" or "25 hr", but not "HR" or "Columbia, MO")
+period_regexes = {
+    "hour": re.compile(r'\b(?:per\s+hour|an\s+hour|hourly)\b|/\s?hour\b|(?:/|\d)\s?hr\b'),
+    "month": re.compile(r'\b(?:per\s+month|a\s+month|monthly)\b|/\s?month\b|(?:/|\d)\s?mo\b'),
+    "year": re.compile(r'\b(?:per\s+year|a\s+year|per\s+annum|annually|annual|yearly)\b|/\s?year\b|(?:/|\d)\s?yr\b')
+    }
+
+# Number of characters before and after the salary information where the words of the period are searched
+period_window = 30
+
+# Salaries up to these amounts can be per hour or per month (above them, they're per year)
+max_salary_hour = 1000
+max_salary_month = 20000
+
+# Numbers in the salary information (e.g., "30,000", "18.50", "45.000", "30k")
+salary_number_regex = re.compile(r'(\d+(?:[,.]\d+)*)\s?([kK])?')
+
+# Fields of the structured salaries and their types in the columns (see pack_salaries)
+salary_columns = {"min": "float64", "max": "float64", "currency": "U3", "period": "U5"}
+
 ######################################### FUNCTION DEFINITIONS #########################################
 
 def get_salary_flag(text):
@@ -24,18 +86,14 @@ def get_salary_flag(text):
     
     # Check if the text mentions keywords
     if 'salary' in text or 'compensation' in text or 'pay' in text:
-        # Pattern for money sign and digits
-        pattern = r'[€£$]\s?\d{1,6}'
-        # Check if the pattern is found in the text
-        flag = re.search(pattern, text)
+        # Check if the pattern for money sign and digits is found in the text
+        flag = flag_regex_money_sign.search(text)
         # If the pattern is found, return 'money_sign_digits'
         if flag:
             return 'money_sign_digits'
         
-        # Pattern for numbers that look like salary
-        pattern = r'\b\d{1,3}[,.]?\d{3}\b'
-        # Check if the pattern is found in the text
-        flag = re.search(pattern, text)
+        # Check if the pattern for numbers that look like salary is found in the text
+        flag = flag_regex_numbers.search(text)
         # If the pattern is found, return 'keyword_numbers'
         if flag:
             return 'keyword_numbers'
@@ -44,98 +102,217 @@ def extract_salary(text):
     """
     Function to extract salary from the text of a job posting.
 
+    The patterns are only searched when the order of the cascade gets to them (e.g., if there's a range like
+    "$30,000 - $40,000", the patterns for hourly salaries are never searched), and the text is lowercased once.
+
     Input: text (str) - Text of a job posting.
     Output: salary_info (list) - List of salary information extracted from the text.
 
-    Dependencies: check_salary_keywords, find_matches, check_hour
+    Dependencies: find_salary
     """
     # Check that the input is a string
     if not isinstance(text, str):
         raise TypeError("Input must be a string.")
     
-    # Check if the text contains a keyword indicating that there's salary information
-    if not check_salary_keywords(text):
-        return None
-    
-    # Check for various possible patterns
-    
-    # $30,000 - $40,000
-    regex_1 = r'[€£$]\s?\d{1,3}[,.]?\d{3}(?:\.\d{2})?\s?(?:-|–|up to|to|and)\s?[€£$]?\s?\d{1,3}[,.]?\d{3}(?:\.\d{2})?'
-    salary_info_1 = find_matches(text, regex_1)
-
-    # $30k - $40k
-    regex_2 = r'[€£$]\s?\d{1,3}[kK]?\s?(?:-|–|up to|to|and)\s?[€£$]?\s?\d{1,3}[kK]?'
-    salary_info_2 = find_matches(text, regex_2)
-
-    # 30,000 - 40,000
-    regex_3 = r'\d{2,3}[,.]?\d{3}(?:\.\d{2})?\s?(?:-|–|up to|to|and)\s?\d{2,3}[,.]?\d{3}(?:\.\d{2})?'
-    salary_info_3 = find_matches(text, regex_3)
-
-    # $30,000
-    regex_4 = r'[€£$]\s?\d{2,3}[,.]?\d{3}(?:\.\d{2})?'
-    salary_info_4 = find_matches(text, regex_4)
-
-    # 30,000
-    regex_5 = r'\d{2,3},?\d{3}\.\d{2}'
-    salary_info_5 = find_matches(text, regex_5)
-
-    # $3,000
-    regex_6 = r'[€£$]\s?\d{1,2}[,.]?\d{3}(?:\.\d{2})?'
-    salary_info_6 = find_matches(text, regex_6)
+    # Lowercase the text once (for the keywords)
+    return find_salary(text, text.lower())
 
-    # 3,000
-    regex_7 = r'\d{1,2},?\d{3}\.\d{2}'
-    salary_info_7 = find_matches(text, regex_7)
+def find_salary(text, text_lower):
+    """
+    Function to find the salary information in a text (without checking the input, see extract_salary).
 
-    # $10 - $20
-    # regex_8 = r'[€£$]\s?\d{2}(?:\.\d{2})?\s?(?!\s?M)\s?(?:-|–|up to|to|and)\s?[€£$]\s?\d{2}(?:\.\d{2})?\s?(?!\s?M)'
-    regex_8 = r'[€£$]\s?\d{2}(?:\.\d{2})?\s?(?!\s?M)\s?(?:-|–|up to|to|and)\s?[€£$]\s?\d{2}(?:\.\d{2})?(?!\s?M)'
-    salary_info_8 = find_matches(text, regex_8)
+    Input: text (str) - Text of a job posting.
+           text_lower (str) - Text lowercased (for the keywords).
+    Output: salary_info (list) - List of salary information extracted from the text.
 
-    # $10 
-    # regex_9 = r'[€£$]\s?\d{2}(?:\.\d{2})?\b\s?(?!\s?M)'
-    regex_9 = r'[€£$]\s?\d{2}(?:\.\d{2})?\b(?!\s?M)'
-    salary_info_9 = find_matches(text, regex_9)
+    Dependencies: contains_keyword, find_matches, combine_lists, check_harvard
+    """
+    # Check if the text contains a keyword indicating that there's salary information
+    if not contains_keyword(text_lower, salary_keywords):
+        return None
+    
+    # Matches of each pattern, searched the first time they're needed
+    matches = {}
+    def get_salary_info(number):
+        if number not in matches:
+            matches[number] = find_matches(text, salary_regexes[number])
+        return matches[number]
 
     # Return desired results
 
-    if salary_info_1: # $30,000 - $40,000
-        if salary_info_4: # $30,000
-            return combine_lists(salary_info_1, salary_info_4)
+    if get_salary_info(1): # $30,000 - $40,000
+        if get_salary_info(4): # $30,000
+            return combine_lists(get_salary_info(1), get_salary_info(4))
         else:
-            return sorted(list(set(salary_info_1)))
+            return sorted(list(set(get_salary_info(1))))
 
-    if salary_info_3: # 30,000 - 40,000
-        if salary_info_5: # 30,000
-            return combine_lists(salary_info_3, salary_info_5)
+    if get_salary_info(3): # 30,000 - 40,000
+        if get_salary_info(5): # 30,000
+            return combine_lists(get_salary_info(3), get_salary_info(5))
         else:
-            return sorted(list(set(salary_info_3)))
+            return sorted(list(set(get_salary_info(3))))
         
-    if salary_info_2: # $30k - $40k
-        return sorted(list(set(salary_info_2)))
+    if get_salary_info(2): # $30k - $40k
+        return sorted(list(set(get_salary_info(2))))
     
-    if salary_info_4: # $30,000
-        return sorted(list(set(salary_info_4)))
+    if get_salary_info(4): # $30,000
+        return sorted(list(set(get_salary_info(4))))
     
-    if salary_info_5: # 30,000
-        return sorted(list(set(salary_info_5)))
+    if get_salary_info(5): # 30,000
+        return sorted(list(set(get_salary_info(5))))
     
-    if salary_info_6: # $3,000
+    if get_salary_info(6): # $3,000
         if not check_harvard(text):
-            return sorted(list(set(salary_info_6)))
+            return sorted(list(set(get_salary_info(6))))
     
-    if salary_info_7: # 3,000
-        return sorted(list(set(salary_info_7)))
+    if get_salary_info(7): # 3,000
+        return sorted(list(set(get_salary_info(7))))
     
     # Check that the text talks about hour
-    if check_hour(text):
+    if contains_keyword(text_lower, hour_keywords):
 
-        if salary_info_8: # $10 - $20
-            return sorted(list(set(salary_info_8)))
+        if get_salary_info(8): # $10 - $20
+            return sorted(list(set(get_salary_info(8))))
         
-        if salary_info_9: # $10
+        if get_salary_info(9): # $10
             if not check_harvard(text):
-                return sorted(list(set(salary_info_9)))
+                return sorted(list(set(get_salary_info(9))))
+
+def parse_salary_number(number, thousands=False):
+    """
+    Function to get the value of a number in the salary information.
+
+    A "." or "," followed by exactly two digits at the end is taken as the decimals ("18.50", "72,500.00"),
+    and the others as separators of thousands ("30,000", "45.000").
+
+    Input: number (str) - Number (e.g., "30,000").
+           thousands (bool) - Whether the number was followed by "k".
+    Output: value (float) - Value of the number.
+    """
+    # Decimals
+    decimals = 0.0
+    if re.search(r'[,.]\d{2}$', number):
+        decimals = int(number[-2:]) / 100
+        number = number[:-3]
+
+    value = int(number.replace(",", "").replace(".", "")) + decimals
+    return value * 1000 if thousands else value
+
+def get_text_near_salary(salary_info, text_lower):
+    """
+    Function to get the text around the salary information (where the words of the period are searched).
+
+    Input: salary_info (list) - Salary information extracted from the text (see extract_salary).
+           text_lower (str) - Text of the job posting lowercased.
+    Output: text_near (str) - Text up to period_window characters before and after each occurrence of the salary
+            information (separated by new lines). The whole text if the salary information isn't in it.
+    """
+    windows = []
+    for info in salary_info:
+        info_lower = info.lower()
+        start = text_lower.find(info_lower)
+        while start != -1:
+            windows.append(text_lower[max(start - period_window, 0):start + len(info_lower) + period_window])
+            start = text_lower.find(info_lower, start + 1)
+
+    return "\n".join(windows) if windows else text_lower
+
+def parse_salary(salary_info, text, text_lower=None):
+    """
+    Function to get the structured salary from the salary information extracted from a job posting.
+
+    Input: salary_info (list) - Salary information extracted from the text (see extract_salary).
+           text (str) - Text of the job posting (for the period).
+           text_lower (str) - Text lowercased, if it already is (optional).
+    Output: salary (dict) - "min" and "max" (float), "currency" ("USD", "EUR", "GBP" or None) and "period"
+            ("hour", "month", "year" or None). None if there's no salary information.
+    """
+    if not salary_info:
+        return None
+
+    # Lowest and highest amounts of all the salary information (e.g., several ranges)
+    values = [parse_salary_number(number, bool(thousands)) for info in salary_info for number, thousands in salary_number_regex.findall(info)]
+    if not values:
+        return None
+    salary_min = min(values)
+    salary_max = max(values)
+
+    # First money sign
+    currency = None
+    for info in salary_info:
+        signs = [character for character in info if character in currencies]
+        if signs:
+            currency = currencies[signs[0]]
+            break
+
+    # Period, from the words around the salary information and the amounts
+    text_near = get_text_near_salary(salary_info, text.lower() if text_lower is None else text_lower)
+    if salary_max < max_salary_hour and period_regexes["hour"].search(text_near):
+        period = "hour"
+    elif salary_max < max_salary_month and period_regexes["month"].search(text_near):
+        period = "month"
+    elif salary_max >= max_salary_month or period_regexes["year"].search(text_near):
+        period = "year"
+    else:
+        period = None
+
+    return {"min": salary_min, "max": salary_max, "currency": currency, "period": period}
+
+def extract_salary_structured(text):
+    """
+    Function to extract the structured salary from the text of a job posting.
+
+    Input: text (str) - Text of a job posting.
+    Output: salary (dict) - "min", "max", "currency" and "period" (see parse_salary). None if there's no salary information.
+    """
+    return parse_salary(extract_salary(text), text)
+
+def extract_salary_batch(texts, structured=False):
+    """
+    Function to extract the salary from many job postings (see extract_salary), checking the inputs once and lowercasing each text once.
+
+    Input: texts (list or pandas Series of str) - Texts of job postings.
+           structured (bool) - If True, the structured salaries packed in columns (see extract_salary_structured and pack_salaries).
+    Output: salaries (list) - Salary information of each text (None if there's none), or columns (dict) if structured.
+    """
+    # Check that the inputs are strings
+    texts = list(texts)
+    if not all(isinstance(text, str) for text in texts):
+        raise TypeError("Inputs must be strings.")
+
+    texts_lower = [text.lower() for text in texts]
+    salaries = [find_salary(text, text_lower) for text, text_lower in zip(texts, texts_lower)]
+
+    if structured:
+        return pack_salaries([parse_salary(salary_info, text, text_lower) for salary_info, text, text_lower in zip(salaries, texts, texts_lower)])
+    return salaries
+
+def pack_salaries(salaries):
+    """
+    Function to pack structured salaries in columns (NumPy arrays), to compute over many job postings without parsing strings.
+
+    Input: salaries (list) - Structured salaries (see extract_salary_structured), None for the job postings without salary.
+    Output: columns (dict) - "min" and "max" (float64, NaN if missing), "currency" and "period" (strings, "" if missing).
+    """
+    # Only needed here (the rest of the module only needs re)
+    import numpy as np
+
+    columns = {}
+    for field, dtype in salary_columns.items():
+        missing = float("nan") if dtype == "float64" else ""
+        values = [salary[field] if salary is not None and salary[field] is not None else missing for salary in salaries]
+        columns[field] = np.array(values, dtype=dtype)
+    return columns
+
+def contains_keyword(text_lower, keywords):
+    """
+    Function to check if a lowercased text contains any of some keywords.
+
+    Input: text_lower (str) - Lowercased text.
+           keywords (list) - Keywords (lowercase).
+    Output: has_keywords (bool) - True if the text contains any of the keywords, False otherwise.
+    """
+    return any(keyword in text_lower for keyword in keywords)
 
 def check_salary_keywords(text):
     """
@@ -148,11 +325,8 @@ def check_salary_keywords(text):
     if not isinstance(text, str):
         raise TypeError("Input must be a string.")
     
-    # List of keywords indicating that there's salary information
-    salary_keywords = ["salary", "compensation", "pay", "remuneration", "wage", "hiring range", "offer"]
-    
-    # Check if the text contains any of the keywords
-    has_salary_keywords = any(keyword in text.lower() for keyword in salary_keywords)
+    # Check if the text contains any of the keywords (see salary_keywords)
+    has_salary_keywords = contains_keyword(text.lower(), salary_keywords)
     
     return has_salary_keywords
 
@@ -161,17 +335,17 @@ def find_matches(text, regex):
     Function to find all matches of a regular expression in a text.
 
     Input: text (str) - Text to search for matches.
-           regex (str) - Regular expression to search for.
+           regex (str or re.Pattern) - Regular expression to search for (compiled or not).
     Outputs: matches (list) - List of matches found in the text.
 
     Dependencies: re
     """
     # Check that the input is a string
-    if not isinstance(text, str) or not isinstance(regex, str):
+    if not isinstance(text, str) or not isinstance(regex, (str, re.Pattern)):
         raise TypeError("Input must be a string.")
         
     # Find all matches of the regular expression in the text
-    matches = re.findall(regex, text)
+    matches = re.findall(regex, text) if isinstance(regex, str) else regex.findall(text)
 
     # Return matches if there are
     if len(matches) > 0:
@@ -188,11 +362,8 @@ def check_hour(text):
     if not isinstance(text, str):
         raise TypeError("Input must be a string.")
     
-    # List of keywords indicating that there's hourly salary information
-    hour_keywords = ["hour", "hr", "/hr"]
-    
-    # Check if the text contains any of the keywords
-    has_hour_keywords = any(keyword in text.lower() for keyword in hour_keywords)
+    # Check if the text contains any of the keywords (see hour_keywords)
+    has_hour_keywords = contains_keyword(text.lower(), hour_keywords)
     
     return has_hour_keywords
 
@@ -272,6 +443,14 @@ if __name__ == "__main__":
     print(check_salary_keywords(text))
     assert check_salary_keywords(text) == False
 
+    ##################################################################################
+    print("Tests for contains_keyword function:")
+
+    print("Test 1")
+    print(contains_keyword("the pay is $20/hr", hour_keywords))
+    assert contains_keyword("the pay is $20/hr", hour_keywords) == True
+    assert contains_keyword("the pay is $20", hour_keywords) == False
+
     ##################################################################################
     print("Tests for find_matches function:")
 
@@ -287,6 +466,10 @@ if __name__ == "__main__":
     print(find_matches(text, regex))
     assert find_matches(text, regex) == ["$100", "$200"]
 
+    print("Test 3")
+    print(find_matches(text, salary_regexes[4]))
+    assert find_matches(text, salary_regexes[4]) == ["$100,000", "$200,000"]
+
     ##################################################################################
     print("Tests for check_hour function:")
 
@@ -459,6 +642,55 @@ if __name__ == "__main__":
     print(extract_salary(text))
     assert extract_salary(text) == None
 
+    print("Test 20")
+    # Outputs recorded on a regression corpus before the patterns were compiled and searched lazily
+    regression_corpus = [
+        ('Salary: $30,000 - $40,000 per year. Starting at $30,000.', ['$30,000 - $40,000']),
+        ('Compensation: $55,000 to $65,000, with a $5,000 signing bonus.', ['$55,000 to $65,000']),
+        ('The hiring range is $60,000 and $70,000 depending on experience.', ['$60,000 and $70,000']),
+        ('Pay: 45,000 - 55,000 USD per year; base 50,000.00', ['45,000 - 55,000', '50,000.00']),
+        ('salary 45.000 - 55.000 EUR', ['45.000 - 55.000']),
+        ('Salary: €40,000 - €50,000', ['€40,000 - €50,000']),
+        ('Salary: £35,000 up to £42,000 per annum', ['£35,000 up to £42,000']),
+        ('Pay range $25k-$35k', ['$25k-$35k']),
+        ('Pay range $25K to 35K', ['$25K to 35K']),
+        ('Salary: $72,500.00 per year', ['$72,500.00']),
+        ('Remuneration: 82,000.00 annually', ['82,000.00']),
+        ('Stipend pay of $2,500 per month', ['$2,500']),
+        ('Monthly pay 2,500.00', ['2,500.00']),
+        ('Wage: $18.50 - $22.00 per hour', ['$18.50 - $22.00']),
+        ('Wage: $18 per hr', ['$18']),
+        ('Wage: $18 per year', None),
+        ('Pay is $15/hr to $20/hr', ['$15', '$20']),
+        ('We offer $25 per hour for students.', ['$25']),
+        ('Funding of $10M - $20M is available; salary is competitive.', None),
+        ('Compensation $40 M grant, hourly work', None),
+        ('salary: $100,000 - $120,000; bonus up to $10,000; hourly rate $50', ['$10,000', '$100,000 - $120,000']),
+        ('Pay: $50,000 - $60,000 and 45,000 - 50,000', ['$50,000 - $60,000']),
+        ('Pay: 1,000 - 2,000 and 10,000 - 20,000', ['10,000 - 20,000']),
+        ('Offer: $ 90,000 - $ 95,000', ['$ 90,000 - $ 95,000']),
+        ('Offer: $90,000 – $95,000', ['$90,000 – $95,000']),
+        ('Our salary band: $80,000–$90,000', ['$80,000–$90,000']),
+        ('The compensation is 90000 - 100000 per year', ['90000 - 100000']),
+        ('The compensation is $90000 - $100000 per year', ['$90000 - $100000']),
+        ('Salary: $1,234,567', ['$1,234']),
+        ('Salary of $9,999.99 monthly', ['$9,999.99']),
+        ('Pay at Harvard University: $5,250 tuition, $20 per hour', None),
+        ('Harvard: hourly pay $40 per class', None),
+        ('No money mentioned, but a competitive salary.', None),
+        ('Call 217.333.2137 about the pay.', None),
+        ('Salary: USD 85,000', None),
+        ('salary: $30,000 - $40,000 per year\nsalary: $30,000 - $40,000 per year', ['$30,000 - $40,000']),
+        ('Pay $12 - $15 hourly; alternatively $12-$15/hr', ['$12 - $15', '$12-$15']),
+        ('Pay $12.50 and $13.75 per hour', ['$12.50 and $13.75']),
+        ('', None),
+        ('Salary: $99 per hour and $100 per hour', ['$99']),
+        ('The offer is $30k', None),
+        ('Pay: $300,000 - $400,000 Million dollar grants', ['$300,000 - $400,000']),
+        ]
+    for text, salary_info in regression_corpus:
+        assert extract_salary(text) == salary_info, text
+
     ##################################################################################
     print("Tests for extract_salary_info function:")
 
@@ -497,5 +729,140 @@ if __name__ == "__main__":
     print(get_salary_flag(text))
     assert get_salary_flag(text) == 'input_is_not_string'
 
+    ##################################################################################
+    print("Tests for parse_salary_number function:")
+
+    print("Test 1")
+    numbers = [("30,000", False, 30000), ("45.000", False, 45000), ("18.50", False, 18.5), ("72,500.00", False, 72500), ("25", True, 25000), ("1,234,567", False, 1234567)]
+    for number, thousands, value in numbers:
+        print(number, parse_salary_number(number, thousands))
+        assert parse_salary_number(number, thousands) == value
+
+    ##################################################################################
+    print("Tests for parse_salary function:")
+
+    print("Test 1")
+    text = "The salary for this position is $90,000 - $95,000."
+    salary = parse_salary(extract_salary(text), text)
+    print(salary)
+    assert salary == {"min": 90000, "max": 95000, "currency": "USD", "period": "year"}
+
+    print("Test 2")
+    text = "Pay: $18.50 - $22.00 per hour."
+    salary = parse_salary(extract_salary(text), text)
+    print(salary)
+    assert salary == {"min": 18.5, "max": 22, "currency": "USD", "period": "hour"}
+
+    print("Test 3")
+    text = "Salary: €3,500 per month."
+    salary = parse_salary(["€3,500"], text)
+    print(salary)
+    assert salary == {"min": 3500, "max": 3500, "currency": "EUR", "period": "month"}
+
+    print("Test 4")
+    text = "Salary range 25k to 35k."
+    salary = parse_salary(["25k to 35k"], text)
+    print(salary)
+    assert salary == {"min": 25000, "max": 35000, "currency": None, "period": "year"}
+
+    print("Test 5")
+    # Too much for an hour, even if the text mentions hours
+    text = "Full-time (40 hours per week). Salary: $60,000."
+    salary = parse_salary(["$60,000"], text)
+    print(salary)
+    assert salary["period"] == "year"
+
+    print("Test 6")
+    # "hr" inside other words isn't the hour
+    text = "Salary: $500 through the program, three times"
+    salary = parse_salary(["$500"], text)
+    print(salary)
+    assert salary["period"] == None
+
+    print("Test 7")
+    # Words of the period far from the amount don't count
+    text = "Stipend: $500 for the summer." + " Our team" * 20 + " reports to HR and meets monthly."
+    salary = parse_salary(["$500"], text)
+    print(salary)
+    assert salary["period"] == None
+
+    print("Test 8")
+    text = "Pay rate: $25/hr."
+    salary = parse_salary(["$25"], text)
+    print(salary)
+    assert salary["period"] == "hour"
+
+    print("Test 9")
+    # "MO" (Missouri) and "HR" aren't the period
+    text = "Salary: $4,500. Based in Columbia, MO."
+    salary = parse_salary(["$4,500"], text)
+    print(salary)
+    assert salary["period"] == None
+    text = "Pay: $15.00 - $18.00. Contact HR with questions."
+    salary = parse_salary(["$15.00 - $18.00"], text)
+    print(salary)
+    assert salary["period"] == None
+    text = "Salary: $4,500/mo, paid 18 hr shifts."
+    assert parse_salary(["$4,500/mo"], text)["period"] == "month"
+
+    print("Test 10")
+    print(parse_salary(None, "No salary here."), parse_salary([], "No salary here."))
+    assert parse_salary(None, "No salary here.") == None
+    assert parse_salary([], "No salary here.") == None
+
+    ##################################################################################
+    print("Tests for extract_salary_structured function:")
+
+    print("Test 1")
+    text = "The salary for this position is $30,000 per year."
+    print(extract_salary_structured(text))
+    assert extract_salary_structured(text) == {"min": 30000, "max": 30000, "currency": "USD", "period": "year"}
+
+    print("Test 2")
+    text = "We offer a competitive salary."
+    print(extract_salary_structured(text))
+    assert extract_salary_structured(text) == None
+
+    ##################################################################################
+    print("Tests for pack_salaries function:")
+
+    print("Test 1")
+    salaries = [{"min": 90000, "max": 95000, "currency": "USD", "period": "year"}, None, {"min": 18.5, "max": 22, "currency": None, "period": "hour"}]
+    columns = pack_salaries(salaries)
+    print(columns)
+    assert list(columns) == ["min", "max", "currency", "period"]
+    assert columns["min"][0] == 90000 and columns["max"][2] == 22
+    assert columns["min"][1] != columns["min"][1]
+    assert list(columns["currency"]) == ["USD", "", ""]
+    assert list(columns["period"]) == ["year", "", "hour"]
+
+    print("Test 2")
+    columns = pack_salaries([])
+    print(columns)
+    assert all(len(column) == 0 for column in columns.values())
+
+    ##################################################################################
+    print("Tests for extract_salary_batch function:")
+
+    print("Test 1")
+    texts = [text for text, _ in regression_corpus]
+    print(extract_salary_batch(texts[:3]))
+    assert extract_salary_batch(texts) == [extract_salary(text) for text in texts]
+
+    print("Test 2")
+    columns = extract_salary_batch(texts, structured=True)
+    expected = pack_salaries([extract_salary_structured(text) for text in texts])
+    print(columns["period"][:5])
+    assert list(columns["currency"]) == list(expected["currency"]) and list(columns["period"]) == list(expected["period"])
+    assert all(a == b or (a != a and b != b) for a, b in zip(columns["min"], expected["min"]))
+    assert all(a == b or (a != a and b != b) for a, b in zip(columns["max"], expected["max"]))
+
+    print("Test 3")
+    try:
+        extract_salary_batch(["The salary is $30,000.", 30000])
+        assert False
+    except TypeError:
+        pass
+
     ##################################################################################
     print("All tests passed.")
\ No newline at end of file
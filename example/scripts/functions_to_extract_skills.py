@@ -3,6 +3,7 @@
 
 ######################################### IMPORTING LIBRARIES #########################################
 import re
+from bisect import bisect_left
 
 ######################################### PARAMETERS #########################################
 
@@ -39,58 +40,378 @@ KEYWORDS_SKILLS = [
     "need to be",
 ]
 
+# Keywords of PhD (see check_phd)
+PHD_KEYWORDS = ["PhD", "Ph.D", "Ph.D.", "Doctorate", "Doctoral"]
+
+# List of programming languages (from ChatGPT)
+PROGRAMMING_LANGUAGES = [
+    "Python",
+    "JavaScript",
+    "Java",
+    "C#",
+    "C++",
+    " C ",
+    " C,",
+    "Ruby",
+    "PHP",
+    "Swift",
+    "Kotlin",
+    " R ",
+    " R,",      
+    "Go",
+    "TypeScript",
+    "Rust",
+    "SQL",
+    "Perl",
+    "Scala",
+    "Dart",
+    "MATLAB",
+    "Shell",
+    "Julia",       # Common in scientific computing and research
+    "Fortran",     # Still widely used in scientific research
+    "SAS",         # Used for statistical analysis
+    "SPSS",        # Popular for research and data analysis
+    "Stata",       # Statistical software used in research
+    "LaTeX",       # For creating technical and scientific documentation
+    "Lisp",        # Occasionally used in AI and academic research
+    "Prolog"       # Common in logic programming and research
+]
+
+# List of statistical skills
+STATS_SKILLS = [
+    "statistics",
+    "statistical analysis",
+    "statistical modeling",
+    "bayesian",
+    "regression analysis",
+    "regression modeling",
+    "regression",
+    "anova",
+    "time series",
+    "panel",
+    "survival analysis",
+    "hypothesis testing",
+    "experimental design",
+    "experimental analysis",
+    "sampling",
+    "causal inference"
+]
+
+# List of ML and AI skills
+ML_AI_SKILLS = [
+    "machine learning",
+    "artificial intelligence",
+    " ai ",
+    " ai,",
+    "/ai",
+    "ai/",
+    "deep learning",
+    "neural networks",
+    "computer vision",
+    "natural language processing",
+    "reinforcement learning",
+    "unsupervised learning",
+    "supervised learning",
+    "clustering",
+    "classification",
+    "regression",
+    "random forest",
+    "gradient boosting",
+    "boosted trees",
+    "boosting",
+    "decision trees",
+    "ensemble learning",
+    "feature engineering",
+    "feature selection",
+    "model selection",
+    "model evaluation",
+    "model deployment",
+    "Scikit-Learn",
+    "sklearn",
+    "Scikit Learn",
+    "TensorFlow",
+    "Keras",
+    "PyTorch"
+]
+
+# List of software engineering skills
+SWE_SKILLS = [
+    "CI/CD",
+    "continuous integration",
+    "continuous deployment",
+    "version control",
+    "git",
+    "github",
+    "gitlab",
+    "docker",
+    "kubernetes",
+    "microservices",
+    "RESTful",
+    "API",
+    "web development",
+    "backend",
+    "frontend",
+    "full stack",
+    "cloud",
+    "AWS",
+    "Azure",
+    "Google Cloud",
+    "GCP",
+    "serverless",
+    "agile",
+    "scrum",
+    "kanban",
+    "devops",
+    "testing",
+    "unit testing",
+    "integration testing",
+    "end-to-end testing",
+    "object oriented programming",
+    "functional programming",
+    "design patterns",
+    "refactoring",
+    "code review",
+    "architecture",
+    "scalability",
+    "scalable",
+    "scale",
+    "security",
+    "automation",
+    "monitoring",
+    "logging",
+    "profiling",
+    "debugging",
+    "troubleshooting",
+    "algorithms",
+    "data structures",
+    "parallel computing",
+    "parallelism",
+    "parallel processing",
+    "parallelization",
+    "MPI",
+    "OpenMP",
+    "CUDA",
+    "GPU",
+    "concurrency",
+    "slurm",
+    "hpc",
+    "high performance computing",
+    "high-performance computing",
+    "distributed computing",
+    "distributed systems",
+    "supercomputing",
+    "supercomputer",
+    "grid computing",
+    "workflow automation",
+    "pipeline automation",
+    "container",
+    "documentation",
+    "maintenance",
+    "maintainability",
+    "maintainable",
+    "legacy",
+    "technical debt"
+]
+
+# List of soft skills
+SOFT_SKILLS = [
+    "communication",
+    "teamwork",
+    "collaboration",
+    "problem solving",
+    "critical thinking",
+    "creativity",
+    "adaptability",
+    "flexibility",
+    "resilience",
+    "emotional intelligence",
+    "empathy",
+    "leadership",
+    "lead",
+    "organization",
+    "time management",
+    "project management",
+    "prioritization",
+    "decision making",
+    "negotiation",
+    "conflict resolution",
+    "conflict management",
+    "listening",
+    "patience",
+    "persistence",
+    "motivation",
+    "initiative",
+    "self-motivation",
+    "coordinat",
+    "oversee",
+    "supervise",
+    "facilitat",
+    "recruit",
+    "liais",
+    "mentor"
+]
+
+# Characters that ignoring the case matches to ASCII letters but lowercasing doesn't turn into them (or the other way
+# around, or lowercasing makes them longer): "İ", "ı", "ſ" and the Kelvin sign (see get_matches_batch)
+CHARACTERS_CASE_SPECIAL = ["\u0130", "\u0131", "\u017f", "\u212a"]
+
+# Patterns of the lists of keywords, compiled the first time they are used (see get_pattern)
+patterns = {}
+
 ######################################### FUNCTION DEFINITIONS #########################################
 
-def get_matches(list_keywords, text, case_sensitive=False, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH, word_boundaries=False):
+def get_pattern(list_keywords, case_sensitive=False, word_boundaries=False):
     """
-    Function to get matches if text contains any of the keywords in a list.
+    Function to get the regex pattern of a list of keywords (compiled the first time, see patterns).
 
     Inputs:
-    - list_keywords (list of str) - List of keywords to check.
-    - text (str) - Text to check.
-    - case_sensitive (bool) - If True, the check is case sensitive.
-    - char_before (int) - Number of characters before the match to consider.
-    - char_after (int) - Number of characters after the match to consider.
+    - list_keywords (list of str) - List of keywords.
+    - case_sensitive (bool) - If True, the pattern is case sensitive.
+    - word_boundaries (bool) - If True, the keywords must be whole words.
 
-    Output: matches (list of str) - List of matches.
+    Output: pattern (re.Pattern) - Pattern matching any of the keywords.
     """
-    # Check that the input is a string
-    if not isinstance(text, str):
-        raise TypeError("Input must be a string.")
-
-    if word_boundaries:
-        # Create a regex pattern for the keywords with word boundaries
-        if case_sensitive:
-            pattern = re.compile(r"\b(" + r"|".join([re.escape(keyword) for keyword in list_keywords]) + r")\b")
-        else:
-            pattern = re.compile(r"\b(" + r"|".join([re.escape(keyword) for keyword in list_keywords]) + r")\b", re.IGNORECASE)
-    else:
-        # Create a regex pattern for the keywords
-        if case_sensitive:
-            pattern = re.compile(r"|".join([re.escape(keyword) for keyword in list_keywords]))
+    key = (tuple(list_keywords), case_sensitive, word_boundaries)
+    if key not in patterns:
+        if word_boundaries:
+            # Create a regex pattern for the keywords with word boundaries
+            if case_sensitive:
+                pattern = re.compile(r"\b(" + r"|".join([re.escape(keyword) for keyword in list_keywords]) + r")\b")
+            else:
+                pattern = re.compile(r"\b(" + r"|".join([re.escape(keyword) for keyword in list_keywords]) + r")\b", re.IGNORECASE)
         else:
-            pattern = re.compile(r"|".join([re.escape(keyword) for keyword in list_keywords]), re.IGNORECASE)
+            # Create a regex pattern for the keywords
+            if case_sensitive:
+                pattern = re.compile(r"|".join([re.escape(keyword) for keyword in list_keywords]))
+            else:
+                pattern = re.compile(r"|".join([re.escape(keyword) for keyword in list_keywords]), re.IGNORECASE)
+        patterns[key] = pattern
+    return patterns[key]
+
+def get_skills_keywords_positions(text_lower):
+    """
+    Function to get where the skill keywords (see KEYWORDS_SKILLS) are in a text, to check if they're around a match without searching for them again.
 
-    # Find all matches of the keywords
-    matches = pattern.finditer(text)
+    Input: text_lower (str) - Text lowercased.
+    Output: starts (list of int) - Start of each occurrence of the keywords, sorted.
+            min_ends (list of int) - For each occurrence, the first end of the occurrences starting there or after.
+    """
+    # All the occurrences (they can overlap)
+    occurrences = []
+    for keyword in KEYWORDS_SKILLS:
+        start = text_lower.find(keyword)
+        while start != -1:
+            occurrences.append((start, start + len(keyword)))
+            start = text_lower.find(keyword, start + 1)
+    occurrences.sort()
+
+    # A keyword is in text_lower[start_index:end_index] if an occurrence starts at start_index or after and ends at end_index or before
+    min_ends = [end for _, end in occurrences]
+    for i in range(len(min_ends) - 2, -1, -1):
+        min_ends[i] = min(min_ends[i], min_ends[i + 1])
+
+    return [start for start, _ in occurrences], min_ends
+
+def find_matches_near_skills(pattern, text, text_lower=None, case_sensitive=False):
+    """
+    Function to get the matches of a pattern that have skill keywords (see KEYWORDS_SKILLS) around them.
 
+    Inputs:
+    - pattern (re.Pattern) - Pattern of the keywords (see get_pattern).
+    - text (str) - Text to check.
+    - text_lower (str) - Text lowercased, with the same length as the text. If given, the skill keywords are found once
+      in the whole text (see get_skills_keywords_positions). If None, they're searched in the text around each match.
+    - case_sensitive (bool) - If True, the matches are kept as they are in the text (lowercased otherwise).
+
+    Output: matches (list of str) - List of matches.
+    """
     # Variable to store the matches
     matches_list = []
 
+    # Skill keywords in the whole text
+    if text_lower is not None:
+        starts, min_ends = get_skills_keywords_positions(text_lower)
+
     # Check if any of the matches are close to the skills keywords
-    for match in matches:
+    for match in pattern.finditer(text):
         # Extract the characters around the match
         start_index = max(match.start() - CHARACTERS_AROUND_MATCH, 0)
         end_index = min(match.end() + CHARACTERS_AROUND_MATCH, len(text))
-        surrounding_text = text[start_index:end_index].lower()
 
         # Check if any of the skill keywords are in the surrounding text
-        if any(keyword in surrounding_text for keyword in KEYWORDS_SKILLS):
+        if text_lower is not None:
+            i = bisect_left(starts, start_index)
+            near_skills = i < len(starts) and min_ends[i] <= end_index
+        else:
+            surrounding_text = text[start_index:end_index].lower()
+            near_skills = any(keyword in surrounding_text for keyword in KEYWORDS_SKILLS)
+
+        if near_skills:
             matches_list.append(match.group() if case_sensitive else match.group().lower())
         
     # Return unique elements in alphabetical order
     return sorted(list(set(matches_list)))
 
+def get_matches(list_keywords, text, case_sensitive=False, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH, word_boundaries=False):
+    """
+    Function to get matches if text contains any of the keywords in a list.
+
+    Inputs:
+    - list_keywords (list of str) - List of keywords to check.
+    - text (str) - Text to check.
+    - case_sensitive (bool) - If True, the check is case sensitive.
+    - char_before (int) - Number of characters before the match to consider.
+    - char_after (int) - Number of characters after the match to consider.
+
+    Output: matches (list of str) - List of matches.
+    """
+    # Check that the input is a string
+    if not isinstance(text, str):
+        raise TypeError("Input must be a string.")
+
+    # Find the matches of the keywords with skill keywords around them
+    return find_matches_near_skills(get_pattern(list_keywords, case_sensitive, word_boundaries), text, None, case_sensitive)
+
+def get_matches_batch(list_keywords, texts, case_sensitive=False, word_boundaries=False):
+    """
+    Function to get the matches of the keywords in a list in many texts (see get_matches).
+
+    The pattern is compiled once, and each text is lowercased and searched for the skill keywords once (instead of
+    the text around each match). Case-insensitive keywords are searched in the text lowercased when possible.
+
+    Inputs:
+    - list_keywords (list of str) - List of keywords to check.
+    - texts (list or pandas Series of str) - Texts to check.
+    - case_sensitive (bool) - If True, the check is case sensitive.
+    - word_boundaries (bool) - If True, the keywords must be whole words.
+
+    Output: matches (list of lists of str) - List of matches of each text.
+    """
+    # Check that the inputs are strings
+    texts = list(texts)
+    if not all(isinstance(text, str) for text in texts):
+        raise TypeError("Inputs must be strings.")
+
+    pattern = get_pattern(list_keywords, case_sensitive, word_boundaries)
+
+    # Ignoring the case is the same as looking for the keywords lowercased in the text lowercased (which is much faster),
+    # as long as the keywords are ASCII and the text doesn't have any of CHARACTERS_CASE_SPECIAL
+    if not case_sensitive and all(keyword.isascii() for keyword in list_keywords):
+        pattern_lower = get_pattern([keyword.lower() for keyword in list_keywords], True, word_boundaries)
+    else:
+        pattern_lower = None
+
+    matches = []
+    for text in texts:
+        text_lower = text.lower()
+        if pattern_lower is not None and not any(character in text for character in CHARACTERS_CASE_SPECIAL):
+            matches.append(find_matches_near_skills(pattern_lower, text_lower, text_lower, True))
+
+        # Lowercasing can make the text longer (e.g., "İ"), and then the positions of the matches wouldn't be the same
+        else:
+            matches.append(find_matches_near_skills(pattern, text, text_lower if len(text_lower) == len(text) else None, case_sensitive))
+    return matches
+
 def check_phd(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
     """
     Function to check if text makes reference to PhD.
@@ -98,61 +419,51 @@ def check_phd(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_A
     Input: text (str) - Text of a job posting.
     Output: has_phd (bool) - True if text makes reference to PhD, False otherwise.
     """
-    # List of keywords to check
-    phd_keywords = ["PhD", "Ph.D", "Ph.D.", "Doctorate", "Doctoral"]
-
     # Return True if any of the keywords are in the text
-    return len(get_matches(phd_keywords, text, case_sensitive=False, char_before=char_before, char_after=char_after)) > 0
+    return len(get_matches(PHD_KEYWORDS, text, case_sensitive=False, char_before=char_before, char_after=char_after)) > 0
 
-def extract_programming_languages(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
+def check_phd_batch(texts):
     """
-    Function to extract programming languages from text.
+    Function to check if many texts make reference to PhD (see check_phd).
 
-    Input: text (str) - Text of a job posting.
-    Output: programming_languages (list of str) - List of programming languages.
+    Input: texts (list or pandas Series of str) - Texts of job postings.
+    Output: has_phd (list of bool) - True for each text that makes reference to PhD, False otherwise.
+    """
+    return [len(matches) > 0 for matches in get_matches_batch(PHD_KEYWORDS, texts, case_sensitive=False)]
+
+def clean_programming_languages(matches):
     """
-    # List of programming languages (from ChatGPT)
-    common_programming_languages_highered_research = [
-        "Python",
-        "JavaScript",
-        "Java",
-        "C#",
-        "C++",
-        " C ",
-        " C,",
-        "Ruby",
-        "PHP",
-        "Swift",
-        "Kotlin",
-        " R ",
-        " R,",      
-        "Go",
-        "TypeScript",
-        "Rust",
-        "SQL",
-        "Perl",
-        "Scala",
-        "Dart",
-        "MATLAB",
-        "Shell",
-        "Julia",       # Common in scientific computing and research
-        "Fortran",     # Still widely used in scientific research
-        "SAS",         # Used for statistical analysis
-        "SPSS",        # Popular for research and data analysis
-        "Stata",       # Statistical software used in research
-        "LaTeX",       # For creating technical and scientific documentation
-        "Lisp",        # Occasionally used in AI and academic research
-        "Prolog"       # Common in logic programming and research
-    ]
-
-    matches = get_matches(common_programming_languages_highered_research, text, case_sensitive=True, char_before=char_before, char_after=char_after, word_boundaries=False)
+    Function to clean the matches of the programming languages.
 
+    Input: matches (list of str) - Matches of PROGRAMMING_LANGUAGES.
+    Output: programming_languages (list of str) - List of programming languages.
+    """
     # Remove any white spaces or commas 
     matches_clean = [match.strip().replace(",", "") for match in matches]
 
     # Return clean matches
     return sorted(list(set(matches_clean)))
 
+def extract_programming_languages(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
+    """
+    Function to extract programming languages from text.
+
+    Input: text (str) - Text of a job posting.
+    Output: programming_languages (list of str) - List of programming languages.
+    """
+    matches = get_matches(PROGRAMMING_LANGUAGES, text, case_sensitive=True, char_before=char_before, char_after=char_after, word_boundaries=False)
+
+    return clean_programming_languages(matches)
+
+def extract_programming_languages_batch(texts):
+    """
+    Function to extract programming languages from many texts (see extract_programming_languages).
+
+    Input: texts (list or pandas Series of str) - Texts of job postings.
+    Output: programming_languages (list of lists of str) - List of programming languages of each text.
+    """
+    return [clean_programming_languages(matches) for matches in get_matches_batch(PROGRAMMING_LANGUAGES, texts, case_sensitive=True)]
+
 def extract_stats_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
     """
     Function to extract skills in statistics.
@@ -160,78 +471,27 @@ def extract_stats_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=C
     Input: text (str) - Text of a job posting.
     Output: stats_skills (list of str) - List of statistical skills.
     """
-    # List of statistical skills
-    stats_skills = [
-        "statistics",
-        "statistical analysis",
-        "statistical modeling",
-        "bayesian",
-        "regression analysis",
-        "regression modeling",
-        "regression",
-        "anova",
-        "time series",
-        "panel",
-        "survival analysis",
-        "hypothesis testing",
-        "experimental design",
-        "experimental analysis",
-        "sampling",
-        "causal inference"
-    ]
-
-    matches = get_matches(stats_skills, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
+    matches = get_matches(STATS_SKILLS, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
 
     # Return clean matches
     return sorted(list(set(matches)))
 
-def extract_ml_ai_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
+def extract_stats_skills_batch(texts):
     """
-    Function to extract skills in machine learning and artificial intelligence.
+    Function to extract skills in statistics from many texts (see extract_stats_skills).
 
-    Input: text (str) - Text of a job posting.
-    Output: ml_ai_skills (list of str) - List of ML and AI skills.
+    Input: texts (list or pandas Series of str) - Texts of job postings.
+    Output: stats_skills (list of lists of str) - List of statistical skills of each text.
     """
-    # List of ML and AI skills
-    ml_ai_skills = [
-        "machine learning",
-        "artificial intelligence",
-        " ai ",
-        " ai,",
-        "/ai",
-        "ai/",
-        "deep learning",
-        "neural networks",
-        "computer vision",
-        "natural language processing",
-        "reinforcement learning",
-        "unsupervised learning",
-        "supervised learning",
-        "clustering",
-        "classification",
-        "regression",
-        "random forest",
-        "gradient boosting",
-        "boosted trees",
-        "boosting",
-        "decision trees",
-        "ensemble learning",
-        "feature engineering",
-        "feature selection",
-        "model selection",
-        "model evaluation",
-        "model deployment",
-        "Scikit-Learn",
-        "sklearn",
-        "Scikit Learn",
-        "TensorFlow",
-        "Keras",
-        "PyTorch"
-    ]
+    return [sorted(list(set(matches))) for matches in get_matches_batch(STATS_SKILLS, texts, case_sensitive=False)]
 
-    # Get matches
-    matches = get_matches(ml_ai_skills, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
+def clean_ml_ai_skills(matches):
+    """
+    Function to clean the matches of the ML and AI skills.
 
+    Input: matches (list of str) - Matches of ML_AI_SKILLS.
+    Output: ml_ai_skills (list of str) - List of ML and AI skills.
+    """
     # Treat these as "ai": " ai ", " ai,", "/ai", "ai/", otherwise leave the match as is
     matches = ["ai" if match in [" ai ", " ai,", "/ai", "ai/", "artificial intelligence"] else match for match in matches]
 
@@ -241,95 +501,34 @@ def extract_ml_ai_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=C
     # Return clean matches
     return sorted(list(set(matches)))
 
-def extract_swe_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
+def extract_ml_ai_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
     """
-    Function to extract skills in software engineering.
+    Function to extract skills in machine learning and artificial intelligence.
 
     Input: text (str) - Text of a job posting.
-    Output: swe_skills (list of str) - List of software engineering skills.
+    Output: ml_ai_skills (list of str) - List of ML and AI skills.
     """
-    # List of software engineering skills
-    swe_skills = [
-        "CI/CD",
-        "continuous integration",
-        "continuous deployment",
-        "version control",
-        "git",
-        "github",
-        "gitlab",
-        "docker",
-        "kubernetes",
-        "microservices",
-        "RESTful",
-        "API",
-        "web development",
-        "backend",
-        "frontend",
-        "full stack",
-        "cloud",
-        "AWS",
-        "Azure",
-        "Google Cloud",
-        "GCP",
-        "serverless",
-        "agile",
-        "scrum",
-        "kanban",
-        "devops",
-        "testing",
-        "unit testing",
-        "integration testing",
-        "end-to-end testing",
-        "object oriented programming",
-        "functional programming",
-        "design patterns",
-        "refactoring",
-        "code review",
-        "architecture",
-        "scalability",
-        "scalable",
-        "scale",
-        "security",
-        "automation",
-        "monitoring",
-        "logging",
-        "profiling",
-        "debugging",
-        "troubleshooting",
-        "algorithms",
-        "data structures",
-        "parallel computing",
-        "parallelism",
-        "parallel processing",
-        "parallelization",
-        "MPI",
-        "OpenMP",
-        "CUDA",
-        "GPU",
-        "concurrency",
-        "slurm",
-        "hpc",
-        "high performance computing",
-        "high-performance computing",
-        "distributed computing",
-        "distributed systems",
-        "supercomputing",
-        "supercomputer",
-        "grid computing",
-        "workflow automation",
-        "pipeline automation",
-        "container",
-        "documentation",
-        "maintenance",
-        "maintainability",
-        "maintainable",
-        "legacy",
-        "technical debt"
-    ]
-
     # Get matches
-    matches = get_matches(swe_skills, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
+    matches = get_matches(ML_AI_SKILLS, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
+
+    return clean_ml_ai_skills(matches)
 
+def extract_ml_ai_skills_batch(texts):
+    """
+    Function to extract skills in machine learning and artificial intelligence from many texts (see extract_ml_ai_skills).
+
+    Input: texts (list or pandas Series of str) - Texts of job postings.
+    Output: ml_ai_skills (list of lists of str) - List of ML and AI skills of each text.
+    """
+    return [clean_ml_ai_skills(matches) for matches in get_matches_batch(ML_AI_SKILLS, texts, case_sensitive=False)]
+
+def clean_swe_skills(matches):
+    """
+    Function to clean the matches of the software engineering skills.
+
+    Input: matches (list of str) - Matches of SWE_SKILLS.
+    Output: swe_skills (list of str) - List of software engineering skills.
+    """
     # Treat these as "hpc": "high performance computing", "high-performance computing", "supercomputing", "supercomputer", "grid computing"
     matches = ["hpc" if match in ["high performance computing", "high-performance computing", "supercomputing", "supercomputer", "grid computing"] else match for match in matches]
 
@@ -357,60 +556,61 @@ def extract_swe_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHA
     # Return clean matches
     return sorted(list(set(matches)))
 
-def extract_soft_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
+def extract_swe_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
     """
-    Function to extract soft skills from text.
+    Function to extract skills in software engineering.
 
     Input: text (str) - Text of a job posting.
-    Output: soft_skills (list of str) - List of soft skills.
+    Output: swe_skills (list of str) - List of software engineering skills.
     """
-    # List of soft skills
-    soft_skills = [
-        "communication",
-        "teamwork",
-        "collaboration",
-        "problem solving",
-        "critical thinking",
-        "creativity",
-        "adaptability",
-        "flexibility",
-        "resilience",
-        "emotional intelligence",
-        "empathy",
-        "leadership",
-        "lead",
-        "organization",
-        "time management",
-        "project management",
-        "prioritization",
-        "decision making",
-        "negotiation",
-        "conflict resolution",
-        "conflict management",
-        "listening",
-        "patience",
-        "persistence",
-        "motivation",
-        "initiative",
-        "self-motivation",
-        "coordinat",
-        "oversee",
-        "supervise",
-        "facilitat",
-        "recruit",
-        "liais",
-        "mentor"
-    ]
-
     # Get matches
-    matches = get_matches(soft_skills, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
+    matches = get_matches(SWE_SKILLS, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
+
+    return clean_swe_skills(matches)
+
+def extract_swe_skills_batch(texts):
+    """
+    Function to extract skills in software engineering from many texts (see extract_swe_skills).
+
+    Input: texts (list or pandas Series of str) - Texts of job postings.
+    Output: swe_skills (list of lists of str) - List of software engineering skills of each text.
+    """
+    return [clean_swe_skills(matches) for matches in get_matches_batch(SWE_SKILLS, texts, case_sensitive=False)]
+
+def clean_soft_skills(matches):
+    """
+    Function to clean the matches of the soft skills.
 
+    Input: matches (list of str) - Matches of SOFT_SKILLS.
+    Output: soft_skills (list of str) - List of soft skills.
+    """
     # Treat these as collaboration: "collaboration", "teamwork"
     matches = ["collaboration" if match in ["collaboration", "teamwork"] else match for match in matches]
 
     # Return clean matches
     return sorted(list(set(matches)))
 
+def extract_soft_skills(text, char_before=CHARACTERS_AROUND_MATCH, char_after=CHARACTERS_AROUND_MATCH):
+    """
+    Function to extract soft skills from text.
+
+    Input: text (str) - Text of a job posting.
+    Output: soft_skills (list of str) - List of soft skills.
+    """
+    # Get matches
+    matches = get_matches(SOFT_SKILLS, text, case_sensitive=False, char_before=char_before, char_after=char_after, word_boundaries=False)
+
+    return clean_soft_skills(matches)
+
+def extract_soft_skills_batch(texts):
+    """
+    Function to extract soft skills from many texts (see extract_soft_skills).
+
+    Input: texts (list or pandas Series of str) - Texts of job postings.
+    Output: soft_skills (list of lists of str) - List of soft skills of each text.
+    """
+    return [clean_soft_skills(matches) for matches in get_matches_batch(SOFT_SKILLS, texts, case_sensitive=False)]
+
 if __name__ == "__main__":
     print("Module to extract skills from job postings running as main script.")
     print("Running tests...")
@@ -500,5 +700,40 @@ if __name__ == "__main__":
     print(extract_ml_ai_skills(text))
     assert extract_ml_ai_skills(text) == ['scikit-learn']
 
+    ##################################################################################
+    print("Tests for get_matches_batch function:")
+
+    print("Test 1")
+    texts = ["The ideal candidate should have a proven track record of success.", "TRACK RECORD", "Skills: \u212aeras and track record"]
+    print(get_matches_batch(["track record", "success", "keras"], texts))
+    assert get_matches_batch(["track record", "success", "keras"], texts) == [get_matches(["track record", "success", "keras"], text) for text in texts]
+    assert get_matches_batch(["track record", "success", "keras"], texts) == [["success", "track record"], ["track record"], ["keras", "track record"]]
+
+    print("Test 2")
+    try:
+        get_matches_batch(["track record"], ["skills", 1])
+        assert False
+    except TypeError:
+        pass
+
+    ##################################################################################
+    print("Tests for the batch functions of the extractors:")
+
+    print("Test 1")
+    texts = [
+        "The candidate must have a PhD.",
+        "The candidate must have experience with Python, R, and SQL.",
+        "The candidate must have experience with hypothesis testing and time series analysis. bayesian Bayesian",
+        "The candidate must have experience with machine learning and artificial intelligence and ai and ai/ and ai, .",
+        "The candidate must have experience with sklearn scikit-learn scikit learn Scikit-Learn.",
+        "Required skills: teamwork, Collaboration, unit testing, GCP and high-performance computing at \u0130stanbul.",
+        ""
+        ]
+    for function, function_batch in [(check_phd, check_phd_batch), (extract_programming_languages, extract_programming_languages_batch),
+                                     (extract_stats_skills, extract_stats_skills_batch), (extract_ml_ai_skills, extract_ml_ai_skills_batch),
+                                     (extract_swe_skills, extract_swe_skills_batch), (extract_soft_skills, extract_soft_skills_batch)]:
+        print(function_batch(texts))
+        assert function_batch(texts) == [function(text) for text in texts]
+
     ##################################################################################
     print("All tests passed.")
\ No newline at end of file
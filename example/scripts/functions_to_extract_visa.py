@@ -3,7 +3,7 @@
 
 ######################################### IMPORTING LIBRARIES #########################################
 import os
-from functions_azure import get_response_full_process
+from functions_azure import get_response_full_process, set_answer_schema
 
 ######################################### PATHS #########################################
 if os.environ.get("PIPELINE_RUN", "0") == "1":
@@ -13,10 +13,36 @@ else:
 path_prompt = "visa.txt"
 
 ######################################### READING DATA #########################################
-prompt = open(path_prompts_folder + path_prompt, "r").read()
+# Read the first time it's needed (see get_prompt)
+prompt = None
 
 ######################################### FUNCTION DEFINITIONS #########################################
 
+def get_prompt():
+    """
+    Function to get the prompt (reading it the first time).
+
+    Output:
+    - prompt (str): prompt.
+    """
+    global prompt
+    if prompt is None:
+        new_prompt = open(path_prompts_folder + path_prompt, "r").read()
+
+        # Options for the answer (enforced by the API when the responses use a JSON schema, see functions_azure)
+        # Set before the prompt so that no request uses the prompt without its schema
+        set_answer_schema(new_prompt, {"type": "string", "enum": ["yes", "no", "missing"]})
+        prompt = new_prompt
+    return prompt
+
+def warm_up():
+    """
+    Function to read the prompt now instead of the first time it's needed (e.g., before starting the workers).
+
+    Output: None
+    """
+    get_prompt()
+
 def extract_visa(text):
     """
     Function to extract visa information from a job posting text.
@@ -32,7 +58,7 @@ def extract_visa(text):
         raise ValueError("Input must be a string.")
     
     # Get response from model
-    return get_response_full_process(prompt, text, 5, 5, 10, 0.5)
+    return get_response_full_process(get_prompt(), text, 5, 5, 10, 0.5, single_request=True, early_stopping=True)
 
 if __name__ == "__main__":
     print("Module to extract visa information from job postings running as main script.")